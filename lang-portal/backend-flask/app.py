@@ -5,8 +5,17 @@ import os
 from dotenv import load_dotenv
 from openai import OpenAI
 from pathlib import Path
+from shared.llm_cache import llm_cache_stats
 
 from lib.db import Db
+from lib.pagination import CountCache
+from lib.dashboard_stats import DashboardStats
+from lib.sampler import WordSampler
+from lib.http_cache import ResponseCache
+from lib.audio_cache import AudioCache
+from lib.tts import OpenAITTS
+from lib.prerender import PrerenderJob
+from lib.jobs import JobQueue
 
 import routes.words
 import routes.groups
@@ -14,8 +23,12 @@ import routes.study_sessions as study_sessions
 import routes.dashboard
 import routes.study_activities
 import routes.song_vocabulary
+import routes.imports
 from routes.activities import activities
 from routes.audio import audio
+# song-vocab's caches; song-vocab is on sys.path once routes.song_vocabulary is imported
+from tools.chunk_cache import chunk_cache
+from tools.http_cache import http_client
 
 # Load environment variables from root directory
 root_dir = Path(__file__).resolve().parent.parent.parent
@@ -56,9 +69,46 @@ def create_app(test_config=None):
     
     # Initialize OpenAI client with explicit API key
     app.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+
+    # Speech is rendered once per (text, voice, speed, model) and kept on disk
+    app.tts = OpenAITTS(app.openai_client)
+    app.audio_cache = AudioCache(
+        app.config.get('AUDIO_CACHE_DIR', 'audio_cache'),
+        max_bytes=app.config.get('AUDIO_CACHE_BYTES', 256 * 1024 * 1024)
+    )
+    # Pre-rendered pronunciations are linked from word rows, so they get a
+    # store of their own that never evicts
+    app.audio_store = AudioCache(app.config.get('AUDIO_STORE_DIR', 'audio_store'), max_bytes=None)
+    app.prerender_job = PrerenderJob(
+        app.config['DATABASE'], app.tts, app.audio_store,
+        workers=app.config.get('PRERENDER_WORKERS', 4)
+    )
     
     # Initialize database first since we need it for CORS configuration
-    app.db = Db(database=app.config['DATABASE'])
+    app.db = Db(database=app.config['DATABASE'], pool_size=app.config.get('DB_POOL_SIZE', 5))
+
+    # Cached COUNT(*) totals for paginated listings
+    app.count_cache = CountCache(ttl=app.config.get('COUNT_CACHE_TTL', 60))
+
+    # Dashboard/progress snapshot, invalidated by review and session writes
+    app.dashboard_stats = DashboardStats(ttl=app.config.get('DASHBOARD_STATS_TTL', 300))
+
+    # Random word draws for flashcards / listening practice
+    app.word_sampler = WordSampler(ttl=app.config.get('SAMPLER_TTL', 300))
+
+    # ETag / 304 handling and serialized payloads for read-mostly GETs
+    app.response_cache = ResponseCache(
+        max_entries=app.config.get('RESPONSE_CACHE_ENTRIES', 512),
+        max_bytes=app.config.get('RESPONSE_CACHE_BYTES', 16 * 1024 * 1024),
+        ttl=app.config.get('RESPONSE_CACHE_TTL', 300)
+    )
+
+    # Song searches run the lyrics agent for many turns, off the request threads
+    app.song_jobs = JobQueue(
+        workers=app.config.get('SONG_JOB_WORKERS', 2),
+        max_pending=app.config.get('SONG_JOB_MAX_PENDING', 20),
+        name='song-search'
+    )
     
     # Get allowed origins from study_activities table
     allowed_origins = get_allowed_origins(app)
@@ -80,7 +130,7 @@ def create_app(test_config=None):
     app.register_blueprint(activities)
     app.register_blueprint(audio)
 
-    # Close database connection
+    # Return the request's database connection to the pool
     @app.teardown_appcontext
     def close_db(exception):
         app.db.close()
@@ -92,11 +142,28 @@ def create_app(test_config=None):
     routes.dashboard.load(app)
     routes.study_activities.load(app)
     routes.song_vocabulary.load(app)
+    routes.imports.load(app)
 
     @app.route('/api/test', methods=['GET'])
     def test():
         return jsonify({'status': 'ok', 'message': 'Flask server is running'})
 
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        return jsonify({
+            'db_pool': app.db.pool.stats(),
+            'dashboard_stats': app.dashboard_stats.stats(),
+            'sampler': app.word_sampler.stats(),
+            'response_cache': app.response_cache.stats(),
+            'audio_cache': app.audio_cache.stats(),
+            'audio_store': app.audio_store.stats(),
+            'song_jobs': app.song_jobs.stats(),
+            'song_cache': app.song_cache.stats(),
+            'page_cache': http_client.stats(),
+            'vocabulary_chunk_cache': chunk_cache.stats(),
+            'llm_cache': llm_cache_stats()
+        })
+
     return app
 
 if __name__ == '__main__':
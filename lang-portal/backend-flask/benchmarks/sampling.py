@@ -0,0 +1,75 @@
+"""Compare ORDER BY RANDOM() with lib.sampler on synthetic vocabulary tables.
+
+    python -m benchmarks.sampling                # 10k, 100k and 1M rows
+    python -m benchmarks.sampling --rows 50000 --repeat 50
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from lib.sampler import WordSampler
+
+ORDER_BY_RANDOM = 'SELECT id, spanish, english FROM vocabulary ORDER BY RANDOM() LIMIT ?'
+
+def build_database(path, rows, groups=20):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE groups (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+        CREATE TABLE vocabulary (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            spanish TEXT NOT NULL,
+            english TEXT NOT NULL,
+            group_id INTEGER NOT NULL
+        );
+        CREATE UNIQUE INDEX idx_vocabulary_group_spanish ON vocabulary(group_id, spanish);
+        CREATE TABLE word_reviews (word_id INTEGER PRIMARY KEY, rolling_accuracy REAL);
+    ''')
+    conn.executemany('INSERT INTO groups (id, name) VALUES (?, ?)',
+                     [(g, f'group {g}') for g in range(1, groups + 1)])
+    conn.executemany('INSERT INTO vocabulary (spanish, english, group_id) VALUES (?, ?, ?)',
+                     ((f'palabra {i}', f'word {i}', i % groups + 1) for i in range(rows)))
+    # Deleted words leave holes in the rowid range; reviews feed weighted mode
+    conn.execute('DELETE FROM vocabulary WHERE id % 10 = 0')
+    conn.execute('INSERT INTO word_reviews SELECT id, (id % 7) / 7.0 FROM vocabulary WHERE id % 3 = 0')
+    conn.commit()
+    return conn
+
+def timed(fn, repeat):
+    fn()  # warm up: page cache, population load
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def run(rows, k, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_database(os.path.join(tmp, 'bench.db'), rows)
+        sampler = WordSampler(ttl=3600)
+        cases = [
+            ('ORDER BY RANDOM()', lambda: conn.execute(ORDER_BY_RANDOM, (k,)).fetchall()),
+            ('sampler unbiased', lambda: sampler.sample(conn, k)),
+            ('sampler group', lambda: sampler.sample(conn, k, group_id=3)),
+            ('sampler weighted', lambda: sampler.sample(conn, k, mode='weighted')),
+            ('sampler session deck', lambda: sampler.sample(conn, k, session_id=1)),
+        ]
+        results = [(name, timed(fn, repeat)) for name, fn in cases]
+        conn.close()
+
+    baseline = results[0][1]
+    print(f'{rows:>9,} rows, k={k}')
+    for name, ms in results:
+        print(f'  {name:<22} {ms:9.3f} ms   {baseline / ms:8.1f}x')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, action='append', help='Table size (repeatable)')
+    parser.add_argument('-k', type=int, default=10, help='Words per sample')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per case')
+    args = parser.parse_args()
+    for rows in args.rows or [10_000, 100_000, 1_000_000]:
+        run(rows, args.k, args.repeat)
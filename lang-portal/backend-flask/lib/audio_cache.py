@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# Content-addressed cache of rendered speech.
+#
+# A file's name is the hash of everything that affects the audio (text, voice,
+# speed, model, format), so the same word spoken the same way is rendered
+# once and then served straight from disk. Files are fanned out over
+# 256 sub-directories and the cache is kept under `max_bytes` by evicting the
+# least recently used files; use order survives restarts through each file's
+# mtime, which is bumped on every hit. With `max_bytes=None` nothing is ever
+# evicted, for audio whose URL is stored elsewhere (lib/prerender.py).
+
+def audio_key(text, voice, speed, model, fmt='mp3'):
+  params = {'text': text, 'voice': voice, 'speed': round(float(speed), 3), 'model': model, 'format': fmt}
+  raw = json.dumps(params, sort_keys=True, ensure_ascii=False).encode('utf-8')
+  return hashlib.sha256(raw).hexdigest()
+
+class AudioCache:
+  def __init__(self, directory, max_bytes=256 * 1024 * 1024, fmt='mp3'):
+    self.directory = Path(directory)
+    self.max_bytes = max_bytes
+    self.fmt = fmt
+    self._index = None  # key -> size, least recently used first
+    self._bytes = 0
+    self._lock = threading.Lock()
+    self._renders = {}  # key -> lock, so concurrent misses render once
+
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.render_errors = 0
+
+  def path(self, key):
+    return self.directory / key[:2] / f'{key}.{self.fmt}'
+
+  def _load_index(self):
+    # Called with the lock held
+    if self._index is not None:
+      return
+    files = []
+    if self.directory.exists():
+      for path in self.directory.glob(f'*/*.{self.fmt}'):
+        try:
+          stat = path.stat()
+        except OSError:
+          continue
+        files.append((stat.st_mtime, path.stem, stat.st_size))
+    files.sort()
+    self._index = OrderedDict((key, size) for _, key, size in files)
+    self._bytes = sum(self._index.values())
+
+  def get(self, key):
+    """Path of a cached file, or None."""
+    path = self.path(key)
+    with self._lock:
+      self._load_index()
+      if key not in self._index:
+        self.misses += 1
+        return None
+      if not path.exists():
+        # Removed behind our back
+        self._bytes -= self._index.pop(key)
+        self.misses += 1
+        return None
+      self._index.move_to_end(key)
+      self.hits += 1
+    try:
+      os.utime(path)
+    except OSError:
+      pass
+    return path
+
+  def open(self, key):
+    """Cached file opened for reading, or None.
+
+    The file is opened under the lock, so an eviction can't delete it
+    between the lookup and the open; once open, the handle stays readable
+    even if the file is evicted while it is being sent."""
+    with self._lock:
+      self._load_index()
+      f = self._open_indexed(key)
+      if f is None:
+        self.misses += 1
+        return None
+      self._index.move_to_end(key)
+      self.hits += 1
+    try:
+      os.utime(self.path(key))
+    except OSError:
+      pass
+    return f
+
+  def _open_indexed(self, key):
+    # Called with the lock held
+    if key not in self._index:
+      return None
+    try:
+      return self.path(key).open('rb')
+    except FileNotFoundError:
+      # Removed behind our back
+      self._bytes -= self._index.pop(key)
+      return None
+
+  def put(self, key, chunks):
+    """Write an iterable of byte chunks under `key` and return its path.
+
+    The data goes to a temporary file first and is renamed into place, so
+    readers never see a partial file."""
+    path = self.path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.part')
+    size = 0
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        for chunk in chunks:
+          f.write(chunk)
+          size += len(chunk)
+      if size == 0:
+        raise ValueError('Refusing to cache empty audio')
+      os.replace(tmp, path)
+    except BaseException:
+      try:
+        os.unlink(tmp)
+      except OSError:
+        pass
+      raise
+
+    with self._lock:
+      self._load_index()
+      self._bytes -= self._index.pop(key, 0)
+      self._index[key] = size
+      self._bytes += size
+      self._evict(keep=key)
+    return path
+
+  def _evict(self, keep):
+    if self.max_bytes is None:
+      return
+    while self._bytes > self.max_bytes and len(self._index) > 1:
+      key = next(iter(self._index))
+      if key == keep:
+        self._index.move_to_end(key)
+        continue
+      self._bytes -= self._index.pop(key)
+      self.evictions += 1
+      try:
+        self.path(key).unlink()
+      except OSError:
+        pass
+
+  def get_or_render(self, key, render):
+    """Cached path for `key`, calling `render()` (an iterable of byte chunks)
+    on a miss. Returns (path, hit)."""
+    path = self.get(key)
+    if path is not None:
+      return path, True
+
+    with self._lock:
+      render_lock = self._renders.setdefault(key, threading.Lock())
+    with render_lock:
+      try:
+        # Another request may have rendered it while we waited
+        path = self.path(key)
+        with self._lock:
+          rendered = key in self._index and path.exists()
+        if rendered:
+          return path, True
+        try:
+          return self.put(key, render()), False
+        except Exception:
+          with self._lock:
+            self.render_errors += 1
+          raise
+      finally:
+        with self._lock:
+          self._renders.pop(key, None)
+
+  def open_or_render(self, key, render):
+    """Like get_or_render(), but returns the file opened for reading:
+    (file, hit). A file evicted before it could be opened is rendered
+    again."""
+    f = self.open(key)
+    if f is not None:
+      return f, True
+    while True:
+      _, hit = self.get_or_render(key, render)
+      with self._lock:
+        f = self._open_indexed(key)
+      if f is not None:
+        return f, hit
+
+  def stats(self):
+    with self._lock:
+      self._load_index()
+      lookups = self.hits + self.misses
+      return {
+        'entries': len(self._index),
+        'bytes': self._bytes,
+        'max_bytes': self.max_bytes,
+        'hits': self.hits,
+        'misses': self.misses,
+        'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        'evictions': self.evictions,
+        'render_errors': self.render_errors,
+      }
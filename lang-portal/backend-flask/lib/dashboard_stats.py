@@ -0,0 +1,202 @@
+import math
+import threading
+import time
+from datetime import date
+
+# Dashboard statistics engine.
+#
+# /dashboard/stats, /api/dashboard/stats and /api/progress all report slices
+# of the same aggregates. Instead of each endpoint running its own set of
+# full-table queries, one snapshot is computed with a few combined queries and
+# kept in memory until a write to study_sessions / word_review_items
+# invalidates it. A TTL bounds staleness of the date-relative figures
+# ("active in the last 30 days", the 7-day trend) when nothing is written.
+
+def _pct_round(value):
+  # SQLite's ROUND() rounds half away from zero and returns a REAL
+  return float(math.floor(value + 0.5))
+
+def _streak(study_dates):
+  """Number of study days that follow another study day, plus the first day."""
+  streak = 0
+  previous = None
+  for study_date in study_dates:
+    current = date.fromisoformat(study_date)
+    if previous is None or (current - previous).days == 1:
+      streak += 1
+    previous = current
+  return streak
+
+def compute_snapshot(conn):
+  cursor = conn.cursor()
+
+  # 1. study_sessions, one pass: sessions per (day, group) gives the session
+  #    total, the study days for the streak and both "active group" windows
+  cursor.execute('''
+    SELECT
+      date(created_at) as study_date,
+      group_id,
+      COUNT(*) as sessions,
+      MAX(created_at) >= date('now', '-30 days') as active_since_date,
+      MAX(created_at) >= datetime('now', '-30 days') as active_since_datetime
+    FROM study_sessions
+    GROUP BY study_date, group_id
+  ''')
+  total_sessions = 0
+  study_dates = set()
+  active_groups = set()
+  active_groups_30d = set()
+  for row in cursor.fetchall():
+    total_sessions += row['sessions']
+    if row['study_date']:
+      study_dates.add(row['study_date'])
+    if row['active_since_date']:
+      active_groups.add(row['group_id'])
+    if row['active_since_datetime']:
+      active_groups_30d.add(row['group_id'])
+
+  # 2. word_reviews, one pass: per-word stats maintained on write
+  cursor.execute('''
+    WITH word_stats AS (
+      SELECT
+        correct_count,
+        correct_count + wrong_count as attempts,
+        correct_count * 100.0 / NULLIF(correct_count + wrong_count, 0) as accuracy
+      FROM word_reviews
+    )
+    SELECT
+      COUNT(*) as words_attempted,
+      COALESCE(SUM(correct_count), 0) as correct,
+      COALESCE(SUM(attempts), 0) as attempts,
+      COUNT(CASE WHEN attempts >= 5 AND accuracy >= 80 THEN 1 END) as mastered_5,
+      COUNT(CASE WHEN attempts >= 3 AND accuracy >= 80 THEN 1 END) as mastered,
+      COUNT(CASE WHEN attempts >= 3 AND accuracy >= 60 AND accuracy < 80 THEN 1 END) as proficient,
+      COUNT(CASE WHEN attempts >= 3 AND accuracy >= 40 AND accuracy < 60 THEN 1 END) as learning,
+      COUNT(CASE WHEN attempts >= 3 AND accuracy < 40 THEN 1 END) as needs_practice
+    FROM word_stats
+  ''')
+  reviews = cursor.fetchone()
+
+  # 3. vocabulary joined to its stats, grouped per group
+  cursor.execute('''
+    SELECT
+      g.id,
+      g.name,
+      COUNT(v.id) as total_words,
+      COUNT(wr.word_id) as words_attempted,
+      COALESCE(SUM(wr.correct_count) * 100.0 / SUM(wr.correct_count + wr.wrong_count), 0) as accuracy
+    FROM groups g
+    LEFT JOIN vocabulary v ON v.group_id = g.id
+    LEFT JOIN word_reviews wr ON wr.word_id = v.id
+    GROUP BY g.id, g.name
+    ORDER BY g.name
+  ''')
+  groups = [dict(row) for row in cursor.fetchall()]
+  cursor.execute('SELECT COUNT(*) FROM vocabulary')
+  total_vocabulary = cursor.fetchone()[0]
+
+  # 4. success rate trend over the last 7 days (date-bounded range read)
+  cursor.execute('''
+    WITH RECURSIVE dates(date) AS (
+      SELECT date('now', '-6 days')
+      UNION ALL
+      SELECT date(date, '+1 day')
+      FROM dates
+      WHERE date < date('now')
+    ),
+    daily_stats AS (
+      SELECT
+        date(wri.created_at) as day,
+        AVG(CASE WHEN wri.correct = 1 THEN 100.0 ELSE 0 END) as daily_accuracy
+      FROM word_review_items wri
+      WHERE wri.created_at >= date('now', '-6 days')
+      GROUP BY date(wri.created_at)
+    )
+    SELECT
+      dates.date as day,
+      COALESCE(daily_stats.daily_accuracy, 0) as accuracy
+    FROM dates
+    LEFT JOIN daily_stats ON dates.date = daily_stats.day
+    ORDER BY dates.date
+  ''')
+  trend = [{'day': row['day'], 'accuracy': row['accuracy']} for row in cursor.fetchall()]
+
+  success_rate = reviews['correct'] / reviews['attempts'] if reviews['attempts'] else None
+
+  return {
+    'total_vocabulary': total_vocabulary,
+    'total_sessions': total_sessions,
+    'active_groups': len(active_groups),
+    'active_groups_30d': len(active_groups_30d),
+    'current_streak': _streak(sorted(study_dates)),
+    'words_attempted': reviews['words_attempted'],
+    'mastered_words': reviews['mastered_5'],
+    'success_rate': success_rate,
+    'success_rate_pct': _pct_round(success_rate * 100) if success_rate is not None else 0,
+    'mastery_levels': {
+      'mastered': reviews['mastered'],
+      'proficient': reviews['proficient'],
+      'learning': reviews['learning'],
+      'needs_practice': reviews['needs_practice']
+    },
+    'groups': groups,
+    'trend': trend
+  }
+
+class DashboardStats:
+  """Holds the current dashboard snapshot for one app."""
+
+  def __init__(self, ttl=300):
+    self.ttl = ttl
+    self._snapshot = None
+    self._expires_at = 0.0
+    self._generation = 0
+    self._lock = threading.Lock()
+    self._compute_lock = threading.Lock()
+
+    self.hits = 0
+    self.misses = 0
+    self.last_compute_ms = None
+
+  def snapshot(self, conn):
+    with self._lock:
+      if self._snapshot is not None and time.monotonic() < self._expires_at:
+        self.hits += 1
+        return self._snapshot
+
+    # Only one request recomputes; concurrent readers wait and reuse its result
+    with self._compute_lock:
+      with self._lock:
+        if self._snapshot is not None and time.monotonic() < self._expires_at:
+          self.hits += 1
+          return self._snapshot
+        generation = self._generation
+
+      started = time.perf_counter()
+      snapshot = compute_snapshot(conn)
+      compute_ms = round((time.perf_counter() - started) * 1000, 3)
+      snapshot['compute_ms'] = compute_ms
+
+      with self._lock:
+        self.misses += 1
+        self.last_compute_ms = compute_ms
+        # A write that landed mid-compute makes this result stale; serve it
+        # once but don't keep it
+        if generation == self._generation:
+          self._snapshot = snapshot
+          self._expires_at = time.monotonic() + self.ttl
+      return snapshot
+
+  def invalidate(self):
+    with self._lock:
+      self._generation += 1
+      self._snapshot = None
+
+  def stats(self):
+    with self._lock:
+      return {
+        'hits': self.hits,
+        'misses': self.misses,
+        'cached': self._snapshot is not None,
+        'last_compute_ms': self.last_compute_ms
+      }
@@ -1,16 +1,26 @@
-import sqlite3
 import json
 from flask import g
 
+from lib import table_versions
+from lib.pool import ConnectionPool
+
 class Db:
-  def __init__(self, database='database.db'):
+  def __init__(self, database='database.db', pool_size=5):
     self.database = database
-    self.connection = None
+    self.pool_size = pool_size
+    self._pool = None
+
+  @property
+  def pool(self):
+    # Opened lazily so importing the module never touches the database file
+    if self._pool is None:
+      self._pool = ConnectionPool(self.database, size=self.pool_size)
+    return self._pool
 
   def get(self):
+    # Borrow a pooled connection for the lifetime of the request context
     if 'db' not in g:
-      g.db = sqlite3.connect(self.database)
-      g.db.row_factory = sqlite3.Row  # Return rows as dictionaries
+      g.db = self.pool.checkout()
     return g.db
 
   def commit(self):
@@ -22,9 +32,10 @@ class Db:
     return connection.cursor()
 
   def close(self):
+    # Hand the connection back to the pool rather than closing it
     db = g.pop('db', None)
     if db is not None:
-      db.close()
+      self.pool.checkin(db)
 
   # Function to load SQL from a file
   def sql(self, filepath):
@@ -59,6 +70,13 @@ class Db:
     cursor.execute(self.sql('setup/create_table_study_sessions.sql'))
     self.get().commit()
 
+    # Several statements, so run as a script
+    cursor.executescript(self.sql('setup/create_indexes.sql'))
+    self.get().commit()
+
+    cursor.executescript(table_versions.schema_sql(table_versions.SETUP_TABLES))
+    self.get().commit()
+
   def import_study_activities_json(self,cursor,data_json_path):
     study_actvities = self.load_json(data_json_path)
     for activity in study_actvities:
@@ -0,0 +1,181 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, current_app, request
+
+# Conditional-GET and response caching for read-mostly endpoints.
+#
+# Every cached endpoint declares the tables (or files) its payload is built
+# from. Triggers bump a per-table counter in `table_versions` on every write
+# (lib/table_versions.py), so one primary-key lookup tells whether anything
+# the payload depends on has changed:
+#
+# - the ETag is derived from the request path and those versions, so a client
+#   revalidating with If-None-Match gets a 304 without the view running;
+# - otherwise the serialized body is served from an in-process LRU keyed by
+#   the same ETag, and only a miss runs the query and serialization.
+#
+# Because versions come from triggers, writes made outside the app (imports,
+# seed scripts, the sqlite shell) invalidate just as well as API writes.
+#
+# Last-Modified is sent for information only. Its one-second resolution can't
+# tell apart two writes in the same second, so If-Modified-Since never earns a
+# 304 on its own; the ETag is the only validator.
+
+def table_versions(conn, tables):
+  """[(table, version, updated_at)] for `tables`; unknown tables are version 0."""
+  placeholders = ','.join('?' * len(tables))
+  rows = conn.execute(
+    f'SELECT name, version, updated_at FROM table_versions WHERE name IN ({placeholders})',
+    list(tables)
+  ).fetchall()
+  found = {row[0]: (row[1], row[2]) for row in rows}
+  return [(table, *found.get(table, (0, None))) for table in tables]
+
+def _utc(value):
+  return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+class ResponseCache:
+  """LRU of serialized GET responses, bounded by entry count, bytes and TTL."""
+
+  def __init__(self, max_entries=512, max_bytes=16 * 1024 * 1024, ttl=300):
+    self.max_entries = max_entries
+    self.max_bytes = max_bytes
+    # One payload may not take more than this share of the cache
+    self.max_entry_bytes = max_bytes // 8
+    self.ttl = ttl
+    self._entries = OrderedDict()
+    self._bytes = 0
+    self._lock = threading.Lock()
+
+    self.hits = 0
+    self.misses = 0
+    self.not_modified = 0
+    self.evictions = 0
+    self.bypassed = 0
+
+  def get(self, key):
+    now = time.monotonic()
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None:
+        self.misses += 1
+        return None
+      if entry[0] <= now:
+        self._remove(key)
+        self.misses += 1
+        return None
+      self._entries.move_to_end(key)
+      self.hits += 1
+      return entry[1], entry[2]
+
+  def put(self, key, body, mimetype):
+    if len(body) > self.max_entry_bytes:
+      return
+    with self._lock:
+      if key in self._entries:
+        self._remove(key)
+      self._entries[key] = (time.monotonic() + self.ttl, body, mimetype)
+      self._bytes += len(body)
+      while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+        self._remove(next(iter(self._entries)))
+        self.evictions += 1
+
+  def _remove(self, key):
+    entry = self._entries.pop(key)
+    self._bytes -= len(entry[1])
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+      self._bytes = 0
+
+  def _validators(self, tables, files, view_args):
+    """(validator parts, last modified) or None when the payload can't be
+    versioned, e.g. a missing file or a database without table_versions."""
+    parts = []
+    last_modified = None
+    if tables:
+      try:
+        versions = table_versions(current_app.db.get(), tables)
+      except sqlite3.Error:
+        return None
+      for table, version, updated_at in versions:
+        parts.append(f'{table}={version}')
+        if updated_at:
+          modified = _utc(updated_at)
+          last_modified = max(last_modified or modified, modified)
+    if files:
+      for path in files(**view_args):
+        try:
+          stat = path.stat()
+        except OSError:
+          return None
+        parts.append(f'{path.name}={stat.st_mtime_ns}:{stat.st_size}')
+        modified = datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+        last_modified = max(last_modified or modified, modified)
+    return parts, last_modified
+
+  def cached(self, tables=(), files=None):
+    """Decorate a GET view whose output depends only on the request URL and
+    `tables` (names in table_versions) and/or `files` (a callable taking the
+    view's arguments and returning Paths)."""
+    tables = tuple(tables)
+
+    def decorator(view):
+      @wraps(view)
+      def wrapper(**view_args):
+        validators = self._validators(tables, files, view_args)
+        if validators is None:
+          with self._lock:
+            self.bypassed += 1
+          return view(**view_args)
+        parts, last_modified = validators
+
+        digest = hashlib.sha1('|'.join([request.full_path, *parts]).encode('utf-8')).hexdigest()
+        etag = digest[:24]
+
+        if request.if_none_match and request.if_none_match.contains(etag):
+          with self._lock:
+            self.not_modified += 1
+          return self._finish(Response(status=304), etag, last_modified)
+
+        entry = self.get(etag)
+        if entry is not None:
+          body, mimetype = entry
+          return self._finish(Response(body, mimetype=mimetype), etag, last_modified)
+
+        response = current_app.make_response(view(**view_args))
+        if response.status_code != 200 or response.direct_passthrough:
+          return response
+        self.put(etag, response.get_data(), response.mimetype)
+        return self._finish(response, etag, last_modified)
+      return wrapper
+    return decorator
+
+  def _finish(self, response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified:
+      response.last_modified = last_modified
+    # Clients may keep the payload but must revalidate before reusing it
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+  def stats(self):
+    with self._lock:
+      lookups = self.hits + self.misses
+      return {
+        'entries': len(self._entries),
+        'bytes': self._bytes,
+        'hits': self.hits,
+        'misses': self.misses,
+        'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        'not_modified': self.not_modified,
+        'evictions': self.evictions,
+        'bypassed': self.bypassed,
+      }
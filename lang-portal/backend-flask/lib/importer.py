@@ -0,0 +1,237 @@
+import codecs
+import json
+import time
+
+# Bulk vocabulary importer.
+#
+# The word list is read incrementally, so a 100k-word file never has to sit in
+# memory as one parsed document, and rows go to SQLite in executemany()
+# batches inside a single transaction. Words are upserted on their natural key
+# (group_id, spanish), which makes re-importing the same file a no-op apart
+# from refreshing the translation/grammar columns.
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_TYPE = 'other'
+READ_SIZE = 64 * 1024
+
+UPSERT_SQL = '''
+  INSERT INTO vocabulary (
+    spanish, pronunciation, english, type,
+    gender, conjugation_group, is_irregular, notes, group_id
+  ) VALUES (
+    :spanish, :pronunciation, :english, :type,
+    :gender, :conjugation_group, :is_irregular, :notes, :group_id
+  )
+  ON CONFLICT(group_id, spanish) DO UPDATE SET
+    english = excluded.english,
+    type = excluded.type,
+    pronunciation = COALESCE(excluded.pronunciation, pronunciation),
+    gender = COALESCE(excluded.gender, gender),
+    conjugation_group = COALESCE(excluded.conjugation_group, conjugation_group),
+    is_irregular = excluded.is_irregular,
+    notes = COALESCE(excluded.notes, notes)
+'''
+
+class InvalidWordFile(ValueError):
+  pass
+
+class _JsonStream:
+  """Just enough of a pull parser to walk one top-level array or object
+  without loading the document; each value inside is decoded whole."""
+
+  def __init__(self, fp, read_size=READ_SIZE):
+    self.fp = fp
+    self.read_size = read_size
+    self.buf = ''
+    self.pos = 0
+    self.eof = False
+    self.decoder = json.JSONDecoder()
+    # Byte streams (e.g. a request body) may split a UTF-8 character between reads
+    self.text = codecs.getincrementaldecoder('utf-8')()
+
+  def _fill(self):
+    if self.eof:
+      return False
+    chunk = self.fp.read(self.read_size)
+    if isinstance(chunk, bytes):
+      chunk = self.text.decode(chunk, final=not chunk)
+    if not chunk:
+      self.eof = True
+      return False
+    # Drop what has been consumed so the buffer stays around one value long
+    self.buf = self.buf[self.pos:] + chunk
+    self.pos = 0
+    return True
+
+  def peek(self):
+    while True:
+      while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+        self.pos += 1
+      if self.pos < len(self.buf):
+        return self.buf[self.pos]
+      if not self._fill():
+        return ''
+
+  def expect(self, chars):
+    char = self.peek()
+    if not char or char not in chars:
+      raise InvalidWordFile(f'Expected one of {chars!r}, found {char or "end of input"!r}')
+    self.pos += 1
+    return char
+
+  def value(self):
+    self.peek()
+    while True:
+      try:
+        value, end = self.decoder.raw_decode(self.buf, self.pos)
+      except json.JSONDecodeError as e:
+        if self._fill():
+          continue
+        raise InvalidWordFile(f'Invalid JSON: {e.msg}')
+      # A number or literal cut off at the buffer edge still decodes; make
+      # sure the value really ended before trusting it
+      if end == len(self.buf) and self._fill():
+        continue
+      self.pos = end
+      return value
+
+  def array(self):
+    self.expect('[')
+    if self.peek() == ']':
+      self.pos += 1
+      return
+    while True:
+      yield self.value()
+      if self.expect(',]') == ']':
+        return
+
+def iter_words(fp, defaults=None):
+  """Yield word dicts from a JSON file object.
+
+  Accepts either a bare array of words or the seed-file shape
+  `{"group_id": 1, "words": [...]}`. Top-level keys other than `words` are
+  applied as defaults to every word; a word's own keys win.
+  """
+  stream = _JsonStream(fp)
+  defaults = dict(defaults or {})
+  if stream.peek() == '[':
+    for word in stream.array():
+      yield _with_defaults(word, defaults)
+    return
+
+  stream.expect('{')
+  if stream.peek() == '}':
+    return
+  while True:
+    key = stream.value()
+    stream.expect(':')
+    if key == 'words':
+      for word in stream.array():
+        yield _with_defaults(word, defaults)
+    else:
+      # Keys that come after "words" in the file can't apply to words already
+      # streamed, which is why callers may pass group settings explicitly
+      defaults.setdefault(key, stream.value())
+    if stream.expect(',}') == '}':
+      return
+
+def _with_defaults(word, defaults):
+  if not isinstance(word, dict):
+    raise InvalidWordFile(f'Expected a word object, found {type(word).__name__}')
+  return {**defaults, **word}
+
+def _row(word, group_id):
+  try:
+    spanish = word['spanish'].strip()
+    english = word['english'].strip()
+  except (KeyError, AttributeError):
+    raise InvalidWordFile(f'Word needs "spanish" and "english" strings: {word!r}')
+  group_id = word.get('group_id', group_id)
+  if group_id is None:
+    raise InvalidWordFile(f'No group for word {spanish!r}')
+  return {
+    'spanish': spanish,
+    'pronunciation': word.get('pronunciation'),
+    'english': english,
+    'type': word.get('type') or DEFAULT_TYPE,
+    'gender': word.get('gender'),
+    'conjugation_group': word.get('conjugation_group'),
+    'is_irregular': 1 if word.get('is_irregular') else 0,
+    'notes': word.get('notes'),
+    'group_id': group_id,
+  }
+
+def _group_id(cursor, group_name):
+  cursor.execute('SELECT id FROM groups WHERE name = ?', (group_name,))
+  row = cursor.fetchone()
+  if row:
+    return row[0]
+  cursor.execute('INSERT INTO groups (name) VALUES (?)', (group_name,))
+  return cursor.lastrowid
+
+def _count_words(cursor):
+  cursor.execute('SELECT COUNT(*) FROM vocabulary')
+  return cursor.fetchone()[0]
+
+def import_words(conn, fp, group_name=None, group_id=None, batch_size=DEFAULT_BATCH_SIZE):
+  """Stream words from `fp` into the vocabulary table in one transaction.
+
+  Words without their own group_id go to `group_id`, or to the group called
+  `group_name` (created if missing). Any error rolls the whole import back.
+  Returns counts and throughput.
+  """
+  started = time.perf_counter()
+  cursor = conn.cursor()
+  if conn.in_transaction:
+    conn.commit()
+  cursor.execute('BEGIN IMMEDIATE')
+  try:
+    if group_name is not None:
+      group_id = _group_id(cursor, group_name)
+    before = _count_words(cursor)
+
+    rows = 0
+    touched_groups = set()
+    batch = []
+    for word in iter_words(fp):
+      row = _row(word, group_id)
+      batch.append(row)
+      touched_groups.add(row['group_id'])
+      if len(batch) >= batch_size:
+        cursor.executemany(UPSERT_SQL, batch)
+        rows += len(batch)
+        batch = []
+    if batch:
+      cursor.executemany(UPSERT_SQL, batch)
+      rows += len(batch)
+
+    if touched_groups:
+      placeholders = ','.join('?' * len(touched_groups))
+      cursor.execute(f'SELECT id FROM groups WHERE id IN ({placeholders})', list(touched_groups))
+      missing = touched_groups - {row[0] for row in cursor.fetchall()}
+      if missing:
+        raise InvalidWordFile(f'Unknown group ids: {sorted(missing)}')
+
+    inserted = _count_words(cursor) - before
+    cursor.executemany('''
+      UPDATE groups SET words_count = (SELECT COUNT(*) FROM vocabulary WHERE group_id = groups.id)
+      WHERE id = ?
+    ''', [(gid,) for gid in touched_groups])
+    conn.commit()
+  except Exception:
+    conn.rollback()
+    raise
+
+  seconds = time.perf_counter() - started
+  return {
+    'rows': rows,
+    'inserted': inserted,
+    'updated': rows - inserted,
+    'groups': sorted(touched_groups),
+    'seconds': round(seconds, 3),
+    'rows_per_sec': round(rows / seconds) if seconds > 0 else rows,
+  }
+
+def import_file(conn, path, **kwargs):
+  with open(path, 'r', encoding='utf-8') as fp:
+    return import_words(conn, fp, **kwargs)
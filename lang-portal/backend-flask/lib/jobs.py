@@ -0,0 +1,162 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Background jobs for long-running requests.
+#
+# A request enqueues its work and gets a job id back straight away; a bounded
+# pool of worker threads runs the jobs and clients follow them through the
+# job's status. Each job carries an Event that is set the moment it finishes,
+# so anything waiting on it (a long-poll, a test) wakes up immediately instead
+# of checking on a timer. Finished jobs are kept for a while so their result
+# can still be fetched, then forgotten oldest first.
+#
+# Jobs submitted with a key are coalesced: while one is queued or running,
+# submitting the same key again returns the existing job instead of doing the
+# work twice. An empty key (e.g. a request that couldn't be parsed) is no key.
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+class QueueFull(Exception):
+  pass
+
+class Job:
+  def __init__(self, kind):
+    self.id = uuid.uuid4().hex
+    self.kind = kind
+    self.state = QUEUED
+    self.progress = {}
+    self.result = None
+    self.error = None
+    self.created_at = time.time()
+    self.started_at = None
+    self.finished_at = None
+    self.done = threading.Event()
+
+  def report(self, **progress):
+    """Merge progress details into the job's status; called by the job itself."""
+    self.progress = {**self.progress, **progress}
+
+  def wait(self, timeout=None):
+    """Block until the job has finished or `timeout` passed. Returns whether
+    it finished."""
+    return self.done.wait(timeout)
+
+  @property
+  def finished(self):
+    return self.done.is_set()
+
+  def to_dict(self):
+    status = {
+      'id': self.id,
+      'kind': self.kind,
+      'state': self.state,
+      'progress': self.progress,
+      'created_at': self.created_at,
+      'started_at': self.started_at,
+      'finished_at': self.finished_at,
+    }
+    if self.state == SUCCEEDED:
+      status['result'] = self.result
+    elif self.state == FAILED:
+      status['error'] = self.error
+    return status
+
+class JobQueue:
+  """Runs `fn(job, *args, **kwargs)` on `workers` threads.
+
+  At most `max_pending` jobs may wait for a worker; submit() raises QueueFull
+  beyond that. The last `max_finished` finished jobs stay available to get().
+  A non-empty `key` passed to submit() joins an unfinished job with the same
+  key.
+  """
+
+  def __init__(self, workers=2, max_pending=20, max_finished=200, name='jobs'):
+    self.workers = workers
+    self.max_pending = max_pending
+    self.max_finished = max_finished
+    self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+    self._jobs = OrderedDict()  # id -> Job, oldest first
+    self._inflight = {}  # key -> unfinished Job
+    self._lock = threading.Lock()
+
+    self.submitted = 0
+    self.succeeded = 0
+    self.failed = 0
+    self.rejected = 0
+    self.coalesced = 0
+    self._run_seconds = 0.0
+
+  def submit(self, fn, *args, kind='job', key=None, **kwargs):
+    job = Job(kind)
+    with self._lock:
+      if key and key in self._inflight:
+        self.coalesced += 1
+        return self._inflight[key]
+      pending = sum(1 for j in self._jobs.values() if j.state == QUEUED)
+      if pending >= self.max_pending:
+        self.rejected += 1
+        raise QueueFull(f'{pending} jobs are already waiting')
+      self._jobs[job.id] = job
+      if key:
+        self._inflight[key] = job
+      self.submitted += 1
+      self._prune()
+    self._executor.submit(self._run, job, key, fn, args, kwargs)
+    return job
+
+  def _run(self, job, key, fn, args, kwargs):
+    job.state = RUNNING
+    job.started_at = time.time()
+    try:
+      job.result = fn(job, *args, **kwargs)
+      job.state = SUCCEEDED
+    except Exception as e:
+      job.error = str(e) or e.__class__.__name__
+      job.state = FAILED
+    finally:
+      job.finished_at = time.time()
+      with self._lock:
+        if self._inflight.get(key) is job:
+          del self._inflight[key]
+        if job.state == SUCCEEDED:
+          self.succeeded += 1
+        else:
+          self.failed += 1
+        self._run_seconds += job.finished_at - job.started_at
+        self._prune()
+      job.done.set()
+
+  def _prune(self):
+    # Called with the lock held; only finished jobs are ever dropped
+    finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+    for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+      del self._jobs[job_id]
+
+  def get(self, job_id):
+    with self._lock:
+      return self._jobs.get(job_id)
+
+  def shutdown(self, wait=True):
+    self._executor.shutdown(wait=wait)
+
+  def stats(self):
+    with self._lock:
+      states = [job.state for job in self._jobs.values()]
+      finished = self.succeeded + self.failed
+      return {
+        'workers': self.workers,
+        'queued': states.count(QUEUED),
+        'running': states.count(RUNNING),
+        'submitted': self.submitted,
+        'succeeded': self.succeeded,
+        'failed': self.failed,
+        'rejected': self.rejected,
+        'coalesced': self.coalesced,
+        'avg_seconds': round(self._run_seconds / finished, 3) if finished else None,
+      }
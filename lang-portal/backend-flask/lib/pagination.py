@@ -0,0 +1,92 @@
+import base64
+import json
+import threading
+import time
+
+# Keyset ("cursor") pagination helpers.
+#
+# A cursor is an opaque token holding the sort value and id of the last row on
+# the previous page. The next page is read with a row-value comparison that a
+# (sort column, id) index can seek to directly, so deep pages cost the same as
+# the first one instead of scanning and discarding OFFSET rows.
+
+class InvalidCursor(ValueError):
+  pass
+
+def encode_cursor(sort_value, row_id):
+  raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode('utf-8')
+  return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+  try:
+    padded = token + '=' * (-len(token) % 4)
+    sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    return sort_value, int(row_id)
+  except Exception:
+    raise InvalidCursor('Invalid cursor')
+
+def keyset_condition(sort_expr, id_expr, order):
+  """SQL fragment selecting rows after the cursor; bind (sort_value, id)."""
+  op = '<' if order == 'desc' else '>'
+  return f'({sort_expr}, {id_expr}) {op} (?, ?)'
+
+def page_args(request, default_per_page, max_per_page=100):
+  """Read the shared paging query parameters.
+
+  `cursor` switches to keyset mode (an empty value means the first page);
+  without it the existing `page`/offset paging is used. `include_total=false`
+  skips the COUNT(*) entirely.
+  """
+  per_page = request.args.get('per_page', default_per_page, type=int)
+  per_page = min(max(1, per_page), max_per_page)
+  page = max(1, request.args.get('page', 1, type=int))
+  cursor = request.args.get('cursor')
+  include_total = request.args.get('include_total', 'true').lower() not in ('0', 'false', 'no')
+  return {
+    'per_page': per_page,
+    'page': page,
+    'cursor': decode_cursor(cursor) if cursor else None,
+    'keyset': cursor is not None,
+    'include_total': include_total,
+  }
+
+def next_cursor(rows, per_page, sort_key, id_key='id'):
+  """Cursor for the page after `rows`, or None when this is the last page.
+
+  Callers fetch per_page + 1 rows; the extra row only signals that more exist.
+  """
+  if len(rows) <= per_page:
+    return None
+  last = rows[per_page - 1]
+  return encode_cursor(last[sort_key], last[id_key])
+
+class CountCache:
+  """Caches COUNT(*) totals for paginated listings.
+
+  Entries are tagged with the tables they depend on and dropped when one of
+  those tables is written to, with a TTL as a backstop for writes made outside
+  the app (imports, migrations).
+  """
+
+  def __init__(self, ttl=60):
+    self.ttl = ttl
+    self._entries = {}
+    self._lock = threading.Lock()
+
+  def get(self, key, tables, compute):
+    now = time.monotonic()
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry and entry[0] > now:
+        return entry[2]
+
+    value = compute()
+    with self._lock:
+      self._entries[key] = (now + self.ttl, frozenset(tables), value)
+    return value
+
+  def invalidate(self, *tables):
+    """Drop every entry tagged with any of `tables`."""
+    with self._lock:
+      for key in [k for k, entry in self._entries.items() if entry[1].intersection(tables)]:
+        del self._entries[key]
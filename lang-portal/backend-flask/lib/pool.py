@@ -0,0 +1,154 @@
+import queue
+import sqlite3
+import threading
+import time
+
+# Pragmas applied once to every pooled connection. WAL lets readers run
+# alongside the single writer, NORMAL sync is safe under WAL, and the cache /
+# mmap sizes keep the hot pages of a small portal database in memory.
+DEFAULT_PRAGMAS = {
+  'journal_mode': 'WAL',
+  'synchronous': 'NORMAL',
+  'cache_size': -16000,      # negative = KiB, so ~16MB of page cache
+  'mmap_size': 268435456,    # 256MB
+  'temp_store': 'MEMORY',
+}
+
+class PoolTimeout(Exception):
+  pass
+
+class ConnectionPool:
+  """A small fixed-size pool of SQLite connections.
+
+  Connections are opened lazily (up to `size`), configured once and then lent
+  out to request contexts with checkout()/checkin(). Each connection keeps its
+  own prepared-statement cache (`cached_statements`), so repeated route queries
+  skip the parse/prepare step after the first hit.
+  """
+
+  def __init__(self, database, size=5, timeout=10.0, pragmas=None, cached_statements=256):
+    self.database = database
+    # Every connection to ':memory:' is a separate database, so never hand out more than one
+    self.size = 1 if database == ':memory:' else size
+    self.timeout = timeout
+    self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+    self.cached_statements = cached_statements
+
+    self._idle = queue.LifoQueue()
+    self._lock = threading.Lock()
+    self._opened = 0
+    self._closed = False
+
+    # Counters exposed through stats()
+    self._checkouts = 0
+    self._waits = 0
+    self._timeouts = 0
+    self._wait_total = 0.0
+    self._wait_max = 0.0
+    self._hold_total = 0.0
+    self._hold_max = 0.0
+    self._checked_out_at = {}
+
+  def _connect(self):
+    conn = sqlite3.connect(
+      self.database,
+      timeout=self.timeout,
+      check_same_thread=False,  # connections move between request threads
+      cached_statements=self.cached_statements
+    )
+    conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+    for name, value in self.pragmas.items():
+      conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+  def checkout(self):
+    if self._closed:
+      raise RuntimeError('Connection pool is closed')
+
+    started = time.perf_counter()
+    conn = None
+    try:
+      conn = self._idle.get_nowait()
+    except queue.Empty:
+      with self._lock:
+        can_open = self._opened < self.size
+        if can_open:
+          self._opened += 1
+      if can_open:
+        try:
+          conn = self._connect()
+        except Exception:
+          with self._lock:
+            self._opened -= 1
+          raise
+      else:
+        try:
+          conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+          with self._lock:
+            self._timeouts += 1
+          raise PoolTimeout(f'No database connection available after {self.timeout}s')
+        with self._lock:
+          self._waits += 1
+
+    waited = time.perf_counter() - started
+    with self._lock:
+      self._checkouts += 1
+      self._wait_total += waited
+      self._wait_max = max(self._wait_max, waited)
+      self._checked_out_at[id(conn)] = time.perf_counter()
+    return conn
+
+  def checkin(self, conn):
+    with self._lock:
+      started = self._checked_out_at.pop(id(conn), None)
+      if started is not None:
+        held = time.perf_counter() - started
+        self._hold_total += held
+        self._hold_max = max(self._hold_max, held)
+
+    # Never hand an open transaction to the next request
+    try:
+      if conn.in_transaction:
+        conn.rollback()
+    except sqlite3.Error:
+      self._discard(conn)
+      return
+
+    if self._closed:
+      self._discard(conn)
+    else:
+      self._idle.put(conn)
+
+  def _discard(self, conn):
+    try:
+      conn.close()
+    finally:
+      with self._lock:
+        self._opened -= 1
+
+  def close(self):
+    self._closed = True
+    while True:
+      try:
+        conn = self._idle.get_nowait()
+      except queue.Empty:
+        break
+      self._discard(conn)
+
+  def stats(self):
+    with self._lock:
+      checkouts = self._checkouts
+      return {
+        'size': self.size,
+        'open': self._opened,
+        'idle': self._idle.qsize(),
+        'in_use': len(self._checked_out_at),
+        'checkouts': checkouts,
+        'waits': self._waits,
+        'timeouts': self._timeouts,
+        'avg_wait_ms': round(self._wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+        'max_wait_ms': round(self._wait_max * 1000, 3),
+        'avg_hold_ms': round(self._hold_total / checkouts * 1000, 3) if checkouts else 0.0,
+        'max_hold_ms': round(self._hold_max * 1000, 3),
+      }
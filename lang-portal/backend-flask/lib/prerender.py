@@ -0,0 +1,171 @@
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from lib.audio_cache import audio_key
+from lib.tts import DEFAULT_SPEED, DEFAULT_VOICE
+
+# Background pre-rendering of pronunciation audio.
+#
+# Walks the word tables for rows without an audio_url, renders the missing
+# pronunciations through a bounded pool of TTS workers into a content-addressed
+# audio store, and records `/audio/<key>.mp3` on each row. The store must not
+# evict (AudioCache with max_bytes=None): the URL outlives any LRU entry.
+# Should a file disappear anyway, its URL answers 404 until a run with
+# `verify` clears the row and renders it again.
+# Workers only talk to the TTS provider and the cache; every database write
+# happens on the calling thread, in executemany() batches.
+
+# Tables that can hold pronunciations: they need id, spanish and audio_url
+WORD_TABLES = ('vocabulary', 'words')
+
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # seconds before the first retry, doubled after each
+UPDATE_BATCH_SIZE = 100
+
+def audio_url(key):
+  return f'/audio/{key}.mp3'
+
+def word_tables(conn):
+  tables = []
+  for table in WORD_TABLES:
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    if {'id', 'spanish', 'audio_url'} <= columns:
+      tables.append(table)
+  return tables
+
+def pending_words(conn, table, limit=None):
+  sql = f"SELECT id, spanish FROM {table} WHERE audio_url IS NULL AND TRIM(spanish) != '' ORDER BY id"
+  params = ()
+  if limit:
+    sql += ' LIMIT ?'
+    params = (limit,)
+  return conn.execute(sql, params).fetchall()
+
+def clear_missing(conn, table, cache):
+  """Reset audio_url on rows whose audio file is missing, so the
+  next run renders them again. Returns the number of rows reset."""
+  missing = []
+  for word_id, url in conn.execute(f'SELECT id, audio_url FROM {table} WHERE audio_url IS NOT NULL'):
+    key = url.rsplit('/', 1)[-1].split('.', 1)[0]
+    if not cache.path(key).exists():
+      missing.append((word_id,))
+  conn.executemany(f'UPDATE {table} SET audio_url = NULL WHERE id = ?', missing)
+  conn.commit()
+  return len(missing)
+
+def render_with_retry(cache, tts, text, voice, speed, retries, backoff, sleep=time.sleep):
+  """Render one pronunciation into the cache, retrying failures with
+  exponential backoff and jitter. Returns (key, hit)."""
+  key = audio_key(text, voice, speed, tts.model)
+  attempt = 0
+  while True:
+    try:
+      path, hit = cache.get_or_render(key, lambda: tts.stream(text, voice=voice, speed=speed))
+      return key, hit
+    except Exception:
+      attempt += 1
+      if attempt > retries:
+        raise
+      sleep(backoff * (2 ** (attempt - 1)) * (1 + random.random() / 2))
+
+def prerender(conn, tts, cache, voice=DEFAULT_VOICE, speed=DEFAULT_SPEED,
+              workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+              limit=None, verify=False, progress=None, sleep=time.sleep):
+  """Render every word without audio. Returns counts for the run.
+
+  At most `workers` renders run at once and at most twice that many words
+  are queued, so a large vocabulary never turns into a large backlog of
+  futures. `verify` first re-queues words whose audio file is missing.
+  `progress`, if given, is called with the running counts.
+  """
+  started = time.perf_counter()
+  counts = {'rendered': 0, 'cached': 0, 'failed': 0, 'errors': []}
+
+  def flush(table, updates):
+    if updates:
+      conn.executemany(f'UPDATE {table} SET audio_url = ? WHERE id = ?', updates)
+      conn.commit()
+      updates.clear()
+
+  with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prerender') as pool:
+    for table in word_tables(conn):
+      if verify:
+        counts['reset'] = counts.get('reset', 0) + clear_missing(conn, table, cache)
+      words = iter(pending_words(conn, table, limit))
+      running = {}
+      updates = []
+      while True:
+        while len(running) < workers * 2:
+          word = next(words, None)
+          if word is None:
+            break
+          word_id, text = word
+          future = pool.submit(render_with_retry, cache, tts, text.strip(), voice, speed, retries, backoff, sleep)
+          running[future] = (word_id, text)
+        if not running:
+          break
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+          word_id, text = running.pop(future)
+          try:
+            key, hit = future.result()
+          except Exception as e:
+            counts['failed'] += 1
+            if len(counts['errors']) < 20:
+              counts['errors'].append(f'{table} {word_id} ({text}): {e}')
+            continue
+          counts['cached' if hit else 'rendered'] += 1
+          updates.append((audio_url(key), word_id))
+        if len(updates) >= UPDATE_BATCH_SIZE:
+          flush(table, updates)
+        if progress:
+          progress(counts)
+      flush(table, updates)
+
+  counts['seconds'] = round(time.perf_counter() - started, 3)
+  return counts
+
+class PrerenderJob:
+  """Runs prerender() on a background thread, one run at a time."""
+
+  def __init__(self, database, tts, cache, **options):
+    self.database = database
+    self.tts = tts
+    self.cache = cache
+    self.options = options
+    self._lock = threading.Lock()
+    self._thread = None
+    self.status = {'state': 'idle'}
+
+  def start(self, **overrides):
+    with self._lock:
+      if self._thread is not None and self._thread.is_alive():
+        return False
+      self.status = {'state': 'running', 'rendered': 0, 'cached': 0, 'failed': 0}
+      self._thread = threading.Thread(
+        target=self._run, kwargs={**self.options, **overrides}, name='prerender-job', daemon=True
+      )
+      self._thread.start()
+      return True
+
+  def _run(self, **options):
+    conn = sqlite3.connect(self.database)
+    try:
+      def progress(counts):
+        self.status = {'state': 'running', **{k: counts[k] for k in ('rendered', 'cached', 'failed')}}
+      result = prerender(conn, self.tts, self.cache, progress=progress, **options)
+      self.status = {'state': 'finished', **result}
+    except Exception as e:
+      self.status = {'state': 'failed', 'error': str(e)}
+    finally:
+      conn.close()
+
+  def join(self, timeout=None):
+    thread = self._thread
+    if thread is not None:
+      thread.join(timeout)
@@ -0,0 +1,117 @@
+import ast
+import re
+import sqlite3
+from pathlib import Path
+
+# EXPLAIN QUERY PLAN audit of the SQL the routes run.
+#
+# SQL is pulled straight out of the source with `ast`: every string (or
+# f-string) passed to cursor.execute()/executemany(). f-string holes are filled
+# with the routes' default sort/paging values; anything else dynamic is
+# reported as skipped rather than guessed at.
+
+# Default values for the interpolated pieces of the routes' dynamic SQL
+DYNAMIC_DEFAULTS = {
+  'sort_by': 'kanji',
+  'sort_expr': 'w.kanji',
+  'sort_column': 'created_at',
+  'order': 'asc',
+  'where': '',
+  'keyset': '',
+  'limit_clause': 'LIMIT ?',
+}
+
+SKIP_PREFIXES = ('CREATE', 'DROP', 'ALTER', 'PRAGMA')
+
+class DynamicSql(Exception):
+  pass
+
+def _module_constants(tree):
+  constants = {}
+  for node in tree.body:
+    if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+      constants[node.targets[0].id] = node.value
+  return constants
+
+def _render(node, constants):
+  if isinstance(node, ast.Constant) and isinstance(node.value, str):
+    return node.value
+  if isinstance(node, ast.JoinedStr):
+    parts = []
+    for value in node.values:
+      if isinstance(value, ast.Constant):
+        parts.append(value.value)
+      elif isinstance(value.value, ast.Name) and value.value.id in DYNAMIC_DEFAULTS:
+        parts.append(DYNAMIC_DEFAULTS[value.value.id])
+      elif isinstance(value.value, ast.Name) and isinstance(constants.get(value.value.id), ast.Constant):
+        parts.append(str(constants[value.value.id].value))
+      else:
+        raise DynamicSql(ast.unparse(value.value))
+    return ''.join(parts)
+  if isinstance(node, ast.Name) and node.id in constants:
+    return _render(constants[node.id], constants)
+  raise DynamicSql(ast.unparse(node))
+
+def extract_queries(paths):
+  """Yield (location, sql or None, skip reason) for each execute() call."""
+  for path in paths:
+    tree = ast.parse(Path(path).read_text(encoding='utf-8'))
+    constants = _module_constants(tree)
+    for node in ast.walk(tree):
+      if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+              and node.func.attr in ('execute', 'executemany') and node.args):
+        continue
+      location = f'{path}:{node.lineno}'
+      try:
+        sql = _render(node.args[0], constants)
+      except DynamicSql as e:
+        yield location, None, f'dynamic SQL ({e})'
+        continue
+      if sql.strip().upper().startswith(SKIP_PREFIXES):
+        continue
+      yield location, sql, None
+
+def _cte_names(sql):
+  return {name.lower() for name in re.findall(r'(\w+)\s*(?:\([^)]*\))?\s+AS\s*\(', sql, re.IGNORECASE)}
+
+def _bindings(sql):
+  named = re.findall(r'(?<![:\w]):([A-Za-z_]\w*)', sql)
+  if named:
+    return {name: None for name in named}
+  return [None] * sql.count('?')
+
+def full_scans(plan, sql):
+  """Plan steps that read a whole table (index scans and CTEs excluded)."""
+  ctes = _cte_names(sql)
+  flagged = []
+  for detail in plan:
+    match = re.match(r'SCAN (\w+)', detail)
+    if not match or 'USING' in detail or 'CONSTANT ROW' in detail:
+      continue
+    if match.group(1).lower() in ctes:
+      continue
+    flagged.append(detail)
+  return flagged
+
+def audit(conn, paths):
+  """EXPLAIN every extracted query. Returns a list of result dicts."""
+  results = []
+  for location, sql, skipped in extract_queries(paths):
+    result = {'location': location, 'sql': sql, 'skipped': skipped, 'plan': [], 'full_scans': []}
+    if sql is not None:
+      try:
+        rows = conn.execute('EXPLAIN QUERY PLAN ' + sql, _bindings(sql)).fetchall()
+        result['plan'] = [row[3] for row in rows]
+        result['full_scans'] = full_scans(result['plan'], sql)
+      except sqlite3.Error as e:
+        result['skipped'] = f'not plannable here ({e})'
+    results.append(result)
+  return results
+
+# lib modules that don't hold request-time SQL
+NON_ROUTE_MODULES = {'db.py', 'pool.py', 'query_audit.py'}
+
+def route_sources(root='.'):
+  root = Path(root)
+  lib = [p for p in sorted(root.glob('lib/*.py')) if p.name not in NON_ROUTE_MODULES]
+  return sorted(root.glob('routes/*.py')) + lib
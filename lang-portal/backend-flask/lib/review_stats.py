@@ -0,0 +1,67 @@
+from itertools import groupby
+
+# Weight of the newest answer in the rolling (exponentially weighted) accuracy.
+# 0.2 means roughly the last ten answers dominate the value.
+ROLLING_ALPHA = 0.2
+
+# One upsert per answer keeps word_reviews in step with word_review_items, so
+# readers get per-word counts from an indexed primary-key lookup instead of
+# aggregating the whole review history.
+UPSERT_SQL = f'''
+  INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed, rolling_accuracy)
+  VALUES (:word_id, :correct, 1 - :correct, COALESCE(:reviewed_at, CURRENT_TIMESTAMP), :correct)
+  ON CONFLICT(word_id) DO UPDATE SET
+    correct_count = correct_count + excluded.correct_count,
+    wrong_count = wrong_count + excluded.wrong_count,
+    last_reviewed = MAX(COALESCE(last_reviewed, excluded.last_reviewed), excluded.last_reviewed),
+    rolling_accuracy = COALESCE(rolling_accuracy, excluded.rolling_accuracy)
+      + {ROLLING_ALPHA} * (excluded.rolling_accuracy - COALESCE(rolling_accuracy, excluded.rolling_accuracy))
+'''
+
+def _params(word_id, correct, reviewed_at=None):
+  return {'word_id': word_id, 'correct': 1 if correct else 0, 'reviewed_at': reviewed_at}
+
+def record_review(cursor, word_id, correct, reviewed_at=None):
+  """Fold one answer into the word's stats row. Does not commit, so callers
+  keep it in the same transaction as the word_review_items insert."""
+  cursor.execute(UPSERT_SQL, _params(word_id, correct, reviewed_at))
+
+def record_reviews(cursor, reviews):
+  """Batch form of record_review for (word_id, correct, reviewed_at) tuples."""
+  cursor.executemany(UPSERT_SQL, [_params(*review) for review in reviews])
+
+def clear(cursor):
+  cursor.execute('DELETE FROM word_reviews')
+
+def rebuild(conn):
+  """Recompute word_reviews from the full word_review_items history.
+
+  Used for databases that existed before the stats table, or to repair it.
+  Returns the number of words with stats.
+  """
+  cursor = conn.cursor()
+  cursor.execute('''
+    SELECT word_id, correct, created_at
+    FROM word_review_items
+    ORDER BY word_id, created_at, id
+  ''')
+
+  rows = []
+  for word_id, reviews in groupby(cursor.fetchall(), key=lambda r: r[0]):
+    correct_count = wrong_count = 0
+    last_reviewed = rolling = None
+    for _, correct, created_at in reviews:
+      correct = 1 if correct else 0
+      correct_count += correct
+      wrong_count += 1 - correct
+      last_reviewed = created_at
+      rolling = correct if rolling is None else rolling + ROLLING_ALPHA * (correct - rolling)
+    rows.append((word_id, correct_count, wrong_count, last_reviewed, rolling))
+
+  clear(cursor)
+  cursor.executemany('''
+    INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed, rolling_accuracy)
+    VALUES (?, ?, ?, ?, ?)
+  ''', rows)
+  conn.commit()
+  return len(rows)
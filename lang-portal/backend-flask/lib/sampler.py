@@ -0,0 +1,255 @@
+import bisect
+import random
+import threading
+import time
+from collections import OrderedDict
+
+# Random word sampling for the flashcard / listening activities.
+#
+# `ORDER BY RANDOM() LIMIT k` assigns a random key to every row and sorts the
+# whole table per request. The sampler instead draws k ids and fetches just
+# those rows by primary key:
+#
+# - unbiased, whole table: random ids from the [MIN(id), MAX(id)] rowid range,
+#   rejecting ids that were deleted. No per-table state at all.
+# - group filter / weighting: ids (with group and rolling accuracy) are loaded
+#   once into an in-memory population with cumulative weights; each draw is a
+#   bisect, so a sample costs O(k log n) instead of a sort.
+# - no repeats within a session: each session gets a shuffled deck of the
+#   population and deals from it until it runs out, then reshuffles.
+#
+# Populations are dropped when vocabulary is written through the app and
+# otherwise refreshed after `ttl` seconds, which also bounds how stale the
+# weak-word weights can get.
+
+MODES = ('unbiased', 'weighted')
+
+# Weight multiplier for a word answered wrong every time (rolling accuracy 0).
+# A word with accuracy a gets 1 + WEAK_WORD_BOOST * (1 - a); unseen words get 1.
+WEAK_WORD_BOOST = 3.0
+
+# Rowid-range draws per round, as a multiple of the ids still needed
+ROWID_OVERDRAW = 2
+ROWID_ROUNDS = 4
+
+class Population:
+  """The ids of one group (or all words) with their sampling weights."""
+
+  def __init__(self, rows, group_weights=None, weak_boost=WEAK_WORD_BOOST):
+    group_weights = group_weights or {}
+    self.ids = []
+    self.cumulative = []
+    total = 0.0
+    for word_id, group_id, accuracy in rows:
+      weight = group_weights.get(group_id, 1.0)
+      if accuracy is not None:
+        weight *= 1 + weak_boost * (1 - accuracy)
+      if weight <= 0:
+        continue
+      total += weight
+      self.ids.append(word_id)
+      self.cumulative.append(total)
+    self.total = total
+
+  def __len__(self):
+    return len(self.ids)
+
+  def sample(self, k, rng, weighted):
+    k = min(k, len(self.ids))
+    if not weighted:
+      return rng.sample(self.ids, k)
+    # Weighted draws without replacement: redraw on duplicates. Only when k is
+    # close to the population size does that get wasteful, so fall back to a
+    # full weighted shuffle there.
+    if k * 2 > len(self.ids):
+      return self.shuffled(rng, weighted=True)[:k]
+    picked = {}
+    while len(picked) < k:
+      index = bisect.bisect_right(self.cumulative, rng.random() * self.total)
+      picked.setdefault(self.ids[min(index, len(self.ids) - 1)], None)
+    return list(picked)
+
+  def shuffled(self, rng, weighted):
+    if not weighted:
+      deck = list(self.ids)
+      rng.shuffle(deck)
+      return deck
+    # Efraimidis-Spirakis: sorting by u ** (1 / w) gives a weighted random order
+    previous = 0.0
+    keys = []
+    for word_id, cumulative in zip(self.ids, self.cumulative):
+      keys.append((rng.random() ** (1.0 / (cumulative - previous)), word_id))
+      previous = cumulative
+    keys.sort(reverse=True)
+    return [word_id for _, word_id in keys]
+
+class _Deck:
+  def __init__(self, population, rng, weighted, generation):
+    self.population = population
+    self.rng = rng
+    self.weighted = weighted
+    self.generation = generation
+    self.cards = []  # dealt from the end
+    self.cycles = 0
+
+  def deal(self, k):
+    k = min(k, len(self.population))
+    dealt = []
+    while len(dealt) < k:
+      if not self.cards:
+        self.cards = self.population.shuffled(self.rng, self.weighted)[::-1]
+        self.cycles += 1
+        # Don't repeat a card across the reshuffle boundary in one hand
+        seen = set(dealt)
+        self.cards = [c for c in self.cards if c in seen] + [c for c in self.cards if c not in seen]
+      dealt.append(self.cards.pop())
+    return dealt
+
+def parse_group_weights(value):
+  """Parse `1:2,3:0.5` into {1: 2.0, 3: 0.5}."""
+  weights = {}
+  if not value:
+    return weights
+  for part in value.split(','):
+    group_id, _, weight = part.partition(':')
+    try:
+      weights[int(group_id)] = float(weight)
+    except ValueError:
+      raise ValueError(f'Invalid group weight {part!r}; expected <group_id>:<weight>')
+  return weights
+
+class WordSampler:
+  """Draws random vocabulary rows without sorting the table."""
+
+  def __init__(self, ttl=300, max_decks=1000, rng=None):
+    self.ttl = ttl
+    self.max_decks = max_decks
+    self.rng = rng or random.Random()
+    self._populations = {}
+    self._decks = OrderedDict()
+    self._generation = 0
+    self._lock = threading.Lock()
+
+    self.draws = 0
+    self.rowid_draws = 0
+    self.population_loads = 0
+
+  def _population(self, conn, group_id, group_weights, weak_boost):
+    key = (group_id, tuple(sorted(group_weights.items())), weak_boost)
+    now = time.monotonic()
+    with self._lock:
+      entry = self._populations.get(key)
+      if entry and entry[0] > now:
+        return entry[1]
+      generation = self._generation
+
+    sql = '''
+      SELECT v.id, v.group_id, wr.rolling_accuracy
+      FROM vocabulary v
+      LEFT JOIN word_reviews wr ON wr.word_id = v.id
+    '''
+    params = ()
+    if group_id is not None:
+      sql += ' WHERE v.group_id = ?'
+      params = (group_id,)
+    rows = conn.execute(sql + ' ORDER BY v.id', params).fetchall()
+    population = Population([tuple(row) for row in rows], group_weights, weak_boost)
+
+    with self._lock:
+      self.population_loads += 1
+      if generation == self._generation:
+        self._populations[key] = (now + self.ttl, population)
+    return population
+
+  def _rowid_sample(self, conn, k):
+    """Unbiased ids from the whole table via the rowid range, or None if the
+    id space is too sparse for rejection sampling to finish quickly."""
+    # Two queries on purpose: SQLite only answers a lone MIN()/MAX() from the
+    # end of the index; both in one SELECT scans the table
+    low = conn.execute('SELECT MIN(id) FROM vocabulary').fetchone()[0]
+    high = conn.execute('SELECT MAX(id) FROM vocabulary').fetchone()[0]
+    if low is None:
+      return []
+    picked = {}
+    for _ in range(ROWID_ROUNDS):
+      needed = k - len(picked)
+      # dict keeps the random draw order; a set would iterate in id order
+      candidates = dict.fromkeys(
+        word_id for word_id in (self.rng.randint(low, high) for _ in range(needed * ROWID_OVERDRAW))
+        if word_id not in picked
+      )
+      placeholders = ','.join('?' * len(candidates))
+      found = {row[0] for row in conn.execute(
+        f'SELECT id FROM vocabulary WHERE id IN ({placeholders})', list(candidates))}
+      for word_id in candidates:
+        if word_id in found and len(picked) < k:
+          picked[word_id] = None
+      if len(picked) >= k:
+        return list(picked)
+    return None
+
+  def sample_ids(self, conn, k, group_id=None, mode='unbiased', session_id=None,
+                 group_weights=None, weak_boost=WEAK_WORD_BOOST):
+    if mode not in MODES:
+      raise ValueError(f'Unknown sampling mode {mode!r}; expected one of {", ".join(MODES)}')
+    if k <= 0:
+      return []
+    weighted = mode == 'weighted'
+    group_weights = group_weights or {}
+    with self._lock:
+      self.draws += 1
+
+    if session_id is None and not weighted and group_id is None:
+      ids = self._rowid_sample(conn, k)
+      if ids is not None:
+        with self._lock:
+          self.rowid_draws += 1
+        return ids
+
+    if not weighted:
+      group_weights, weak_boost = {}, 0.0
+    if session_id is None:
+      return self._population(conn, group_id, group_weights, weak_boost).sample(k, self.rng, weighted)
+
+    deck_key = (session_id, group_id, mode)
+    with self._lock:
+      deck = self._decks.get(deck_key)
+      if deck is not None and deck.generation == self._generation:
+        # A session keeps its deck (and weights) until the vocabulary changes
+        self._decks.move_to_end(deck_key)
+        return deck.deal(k)
+      generation = self._generation
+
+    population = self._population(conn, group_id, group_weights, weak_boost)
+    with self._lock:
+      deck = _Deck(population, random.Random(self.rng.random()), weighted, generation)
+      self._decks[deck_key] = deck
+      while len(self._decks) > self.max_decks:
+        self._decks.popitem(last=False)
+      return deck.deal(k)
+
+  def sample(self, conn, k, columns=('id', 'spanish', 'english'), **kwargs):
+    """Rows for `sample_ids()`, in draw order."""
+    ids = self.sample_ids(conn, k, **kwargs)
+    if not ids:
+      return []
+    placeholders = ','.join('?' * len(ids))
+    rows = conn.execute(
+      f'SELECT {", ".join(columns)} FROM vocabulary WHERE id IN ({placeholders})', ids).fetchall()
+    by_id = {row[0]: row for row in rows}
+    return [by_id[word_id] for word_id in ids if word_id in by_id]
+
+  def invalidate(self):
+    with self._lock:
+      self._generation += 1
+      self._populations.clear()
+
+  def stats(self):
+    with self._lock:
+      return {
+        'draws': self.draws,
+        'rowid_draws': self.rowid_draws,
+        'population_loads': self.population_loads,
+        'cached_populations': len(self._populations),
+        'sessions': len(self._decks),
+      }
@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+
+# SM-2 spaced-repetition scheduler.
+#
+# Each reviewed word has one word_schedule row holding its ease, current
+# interval and due time. Answers update that row in the same transaction as
+# the word_review_items insert, and "what should I study next" becomes a range
+# read on the (group_id, due_at) index instead of a pass over review history.
+#
+# The portal only records right/wrong, so answers map to SM-2 quality grades
+# (CORRECT_QUALITY / WRONG_QUALITY) unless the caller passes a 0-5 grade.
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+CORRECT_QUALITY = 4
+WRONG_QUALITY = 1
+PASSING_QUALITY = 3
+FIRST_INTERVAL_DAYS = 1
+SECOND_INTERVAL_DAYS = 6
+# A lapsed word comes back within the same sitting rather than tomorrow
+RELEARN_DELAY = timedelta(minutes=10)
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'  # same text form as CURRENT_TIMESTAMP
+
+def utc_now():
+  return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+def format_timestamp(value):
+  return value.strftime(TIMESTAMP_FORMAT)
+
+def parse_timestamp(value):
+  if value is None:
+    return utc_now()
+  if isinstance(value, datetime):
+    return value
+  return datetime.fromisoformat(value)
+
+def next_state(state, quality, reviewed_at):
+  """Apply one SM-2 review. `state` is (ease, interval_days, repetitions,
+  lapses) or None for a word never reviewed; returns the new state and due time."""
+  ease, interval, repetitions, lapses = state or (DEFAULT_EASE, 0, 0, 0)
+
+  ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+  if quality >= PASSING_QUALITY:
+    if repetitions == 0:
+      interval = FIRST_INTERVAL_DAYS
+    elif repetitions == 1:
+      interval = SECOND_INTERVAL_DAYS
+    else:
+      interval = round(interval * ease)
+    repetitions += 1
+    due_at = reviewed_at + timedelta(days=interval)
+  else:
+    interval = 0
+    repetitions = 0
+    lapses += 1
+    due_at = reviewed_at + RELEARN_DELAY
+  return (ease, interval, repetitions, lapses), due_at
+
+def quality_for(correct, quality=None):
+  if quality is not None:
+    return max(0, min(5, int(quality)))
+  return CORRECT_QUALITY if correct else WRONG_QUALITY
+
+UPSERT_SQL = '''
+  INSERT INTO word_schedule (word_id, group_id, ease, interval_days, repetitions, lapses, due_at, last_reviewed)
+  VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+  ON CONFLICT(word_id) DO UPDATE SET
+    group_id = excluded.group_id,
+    ease = excluded.ease,
+    interval_days = excluded.interval_days,
+    repetitions = excluded.repetitions,
+    lapses = excluded.lapses,
+    due_at = excluded.due_at,
+    last_reviewed = excluded.last_reviewed
+'''
+
+def record_review(cursor, word_id, correct, reviewed_at=None, quality=None):
+  """Reschedule a word after an answer. Does not commit, so callers keep it
+  in the same transaction as the word_review_items insert. Returns the new
+  due time, or None if the word isn't in vocabulary."""
+  cursor.execute('''
+    SELECT v.group_id, s.ease, s.interval_days, s.repetitions, s.lapses
+    FROM vocabulary v
+    LEFT JOIN word_schedule s ON s.word_id = v.id
+    WHERE v.id = ?
+  ''', (word_id,))
+  row = cursor.fetchone()
+  if row is None:
+    return None
+
+  group_id = row[0]
+  state = tuple(row[1:]) if row[1] is not None else None
+  reviewed_at = parse_timestamp(reviewed_at)
+  (ease, interval, repetitions, lapses), due_at = next_state(state, quality_for(correct, quality), reviewed_at)
+  cursor.execute(UPSERT_SQL, (
+    word_id, group_id, ease, interval, repetitions, lapses,
+    format_timestamp(due_at), format_timestamp(reviewed_at)
+  ))
+  return format_timestamp(due_at)
+
+def record_reviews(cursor, reviews):
+  """Batch form of record_review for (word_id, correct, reviewed_at, quality)
+  tuples, applied in order. Returns the due times in the same order."""
+  return [record_review(cursor, *review) for review in reviews]
+
+def due_words(cursor, group_id, limit, now=None, include_new=True):
+  """Up to `limit` words of a group to study next: overdue words first
+  (earliest due first), topped up with never-reviewed words."""
+  now = format_timestamp(parse_timestamp(now))
+  cursor.execute('''
+    SELECT v.id, v.spanish, v.english, s.due_at, s.ease, s.interval_days, s.repetitions
+    FROM word_schedule s
+    JOIN vocabulary v ON v.id = s.word_id
+    WHERE s.group_id = ? AND s.due_at <= ?
+    ORDER BY s.due_at
+    LIMIT ?
+  ''', (group_id, now, limit))
+  words = [dict(row, new=False) for row in _dicts(cursor)]
+
+  if include_new and len(words) < limit:
+    cursor.execute('''
+      SELECT v.id, v.spanish, v.english, NULL as due_at, NULL as ease,
+             NULL as interval_days, 0 as repetitions
+      FROM vocabulary v
+      WHERE v.group_id = ?
+        AND NOT EXISTS (SELECT 1 FROM word_schedule s WHERE s.word_id = v.id)
+      ORDER BY v.id
+      LIMIT ?
+    ''', (group_id, limit - len(words)))
+    words += [dict(row, new=True) for row in _dicts(cursor)]
+  return words
+
+def _dicts(cursor):
+  columns = [c[0] for c in cursor.description]
+  return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def clear(cursor):
+  cursor.execute('DELETE FROM word_schedule')
+
+def rebuild(conn):
+  """Replay word_review_items into word_schedule. Returns the number of
+  scheduled words."""
+  cursor = conn.cursor()
+  cursor.execute('''
+    SELECT wri.word_id, v.group_id, wri.correct, wri.created_at
+    FROM word_review_items wri
+    JOIN vocabulary v ON v.id = wri.word_id
+    ORDER BY wri.word_id, wri.created_at, wri.id
+  ''')
+
+  rows = []
+  for word_id, reviews in groupby(cursor.fetchall(), key=lambda r: r[0]):
+    state = None
+    for _, group_id, correct, created_at in reviews:
+      reviewed_at = parse_timestamp(created_at)
+      state, due_at = next_state(state, quality_for(correct), reviewed_at)
+    rows.append((word_id, group_id, *state, format_timestamp(due_at), format_timestamp(reviewed_at)))
+
+  clear(cursor)
+  cursor.executemany(UPSERT_SQL, rows)
+  conn.commit()
+  return len(rows)
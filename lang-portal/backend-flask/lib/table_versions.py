@@ -0,0 +1,36 @@
+# Write counters used for HTTP ETags (see lib/http_cache.py).
+#
+# Every insert, update or delete on a tracked table bumps its version,
+# including writes made outside the app. The schema built by migrate.py gets
+# them from sql/migrations/011_create_table_versions.sql, and tracking another
+# table there takes a new migration. The legacy setup schema, which is built
+# from scratch each time, generates them from the list below.
+
+# Tables tracked by Db.setup_tables (the legacy words/word_groups schema)
+SETUP_TABLES = ('study_activities', 'groups', 'words', 'word_groups', 'word_reviews')
+
+CREATE_TABLE = '''
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+'''
+
+TRIGGER = '''
+CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event} AFTER {EVENT} ON {table}
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = '{table}';
+END;
+'''
+
+def schema_sql(tables):
+  """Script creating table_versions with a row and insert/update/delete
+  triggers for each of `tables`. Safe to run again."""
+  statements = [CREATE_TABLE]
+  statements.append('INSERT OR IGNORE INTO table_versions (name) VALUES '
+                    + ', '.join(f"('{table}')" for table in tables) + ';\n')
+  for table in tables:
+    for event in ('insert', 'update', 'delete'):
+      statements.append(TRIGGER.format(table=table, event=event, EVENT=event.upper()))
+  return ''.join(statements)
@@ -0,0 +1,26 @@
+# Text-to-speech providers.
+#
+# A provider turns text into MP3 bytes, yielded in chunks so callers can
+# stream them to disk instead of holding a whole file in memory. The cache
+# key includes the provider's model, so switching providers never serves
+# audio rendered by another one.
+
+DEFAULT_MODEL = 'gpt-4o-mini-tts'
+DEFAULT_VOICE = 'shimmer'  # Shimmer tends to have better Spanish pronunciation
+DEFAULT_SPEED = 0.9        # Slightly slower for clearer pronunciation
+CHUNK_SIZE = 64 * 1024
+
+class OpenAITTS:
+  def __init__(self, client, model=DEFAULT_MODEL):
+    self.client = client
+    self.model = model
+
+  def stream(self, text, voice=DEFAULT_VOICE, speed=DEFAULT_SPEED):
+    with self.client.audio.speech.with_streaming_response.create(
+      model=self.model,
+      voice=voice,
+      input=text,
+      speed=speed,
+      response_format='mp3'
+    ) as response:
+      yield from response.iter_bytes(CHUNK_SIZE)
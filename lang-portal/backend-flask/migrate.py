@@ -1,5 +1,6 @@
 import sqlite3
 import os
+import argparse
 
 def create_migrations_table(conn):
     conn.execute("""
@@ -16,9 +17,9 @@ def has_migration_run(conn, migration_name):
     cursor.execute("SELECT 1 FROM migrations WHERE migration_name = ?", (migration_name,))
     return cursor.fetchone() is not None
 
-def run_migrations():
+def run_migrations(database='database.db'):
     try:
-        conn = sqlite3.connect('database.db')
+        conn = sqlite3.connect(database)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
@@ -33,7 +34,15 @@ def run_migrations():
             '001_create_tables.sql',
             '002_create_study_sessions.sql',
             '003_create_word_review_items.sql',
-            '004_add_session_status.sql'
+            '004_add_session_status.sql',
+            '005_create_word_reviews.sql',
+            '006_add_pagination_indexes.sql',
+            '007_add_covering_indexes.sql',
+            '008_add_vocabulary_natural_key.sql',
+            '009_create_word_schedule.sql',
+            '010_add_review_response_time.sql',
+            '011_create_table_versions.sql',
+            '012_add_vocabulary_audio_url.sql'
         ]
 
         for migration in migrations:
@@ -58,5 +67,61 @@ def run_migrations():
         if conn:
             conn.close()
 
+def rebuild_stats(database='database.db'):
+    """Recompute word_reviews and word_schedule from word_review_items"""
+    from lib import review_stats, scheduler
+
+    conn = sqlite3.connect(database)
+    try:
+        count = review_stats.rebuild(conn)
+        print(f"Rebuilt review stats for {count} words")
+        count = scheduler.rebuild(conn)
+        print(f"Rebuilt review schedule for {count} words")
+    finally:
+        conn.close()
+
+def explain_queries(database='database.db', verbose=False):
+    """Run EXPLAIN QUERY PLAN over every route's SQL and flag full table scans"""
+    from lib.query_audit import audit, route_sources
+
+    conn = sqlite3.connect(database)
+    try:
+        results = audit(conn, route_sources())
+    finally:
+        conn.close()
+
+    flagged = [r for r in results if r['full_scans']]
+    skipped = [r for r in results if r['skipped']]
+    for result in results:
+        if result['full_scans']:
+            print(f"FULL SCAN  {result['location']}: {'; '.join(result['full_scans'])}")
+        elif result['skipped']:
+            print(f"SKIPPED    {result['location']}: {result['skipped']}")
+        elif verbose:
+            print(f"OK         {result['location']}")
+        if verbose and result['plan']:
+            for step in result['plan']:
+                print(f"             {step}")
+
+    print(f"Audited {len(results)} queries: {len(flagged)} with full table scans, {len(skipped)} skipped")
+    return flagged
+
 if __name__ == '__main__':
-    run_migrations()
+    parser = argparse.ArgumentParser(description='Manage the language portal database')
+    parser.add_argument('--database', default='database.db')
+    subcommands = parser.add_subparsers(dest='command')
+    subcommands.add_parser('migrate', help='Apply pending migrations (default)')
+    subcommands.add_parser('rebuild-stats', help='Recompute per-word review statistics and schedule')
+    explain = subcommands.add_parser('explain', help='Flag full table scans in route queries')
+    explain.add_argument('-v', '--verbose', action='store_true', help='Print every query plan')
+    explain.add_argument('--strict', action='store_true', help='Exit non-zero if any full scan is found')
+    args = parser.parse_args()
+
+    if args.command == 'rebuild-stats':
+        rebuild_stats(args.database)
+    elif args.command == 'explain':
+        flagged = explain_queries(args.database, args.verbose)
+        if args.strict and flagged:
+            raise SystemExit(1)
+    else:
+        run_migrations(args.database)
@@ -1,23 +1,42 @@
 from flask import Blueprint, jsonify, current_app, redirect, request
 from flask_cors import cross_origin
+from urllib.parse import urlencode
 import requests
 import base64
 
+from lib.sampler import MODES, parse_group_weights
+
 activities = Blueprint('activities', __name__)
 
+def sample_words(default_limit, columns=('id', 'spanish', 'english')):
+    """Random words for the activity, shaped by the request's query parameters:
+
+    limit       number of words (default per activity, max 100)
+    group_id    only draw from one group
+    mode        `unbiased` (default) or `weighted` towards weak words
+    weights     per-group weights for weighted mode, e.g. `1:2,3:0.5`
+    session_id  don't repeat a word until the session has seen them all
+    """
+    limit = min(max(1, request.args.get('limit', default_limit, type=int)), 100)
+    mode = request.args.get('mode', 'unbiased')
+    if mode not in MODES:
+        raise ValueError(f"Invalid mode. Must be one of: {', '.join(MODES)}")
+    return current_app.word_sampler.sample(
+        current_app.db.get(),
+        limit,
+        columns=columns,
+        group_id=request.args.get('group_id', type=int),
+        mode=mode,
+        session_id=request.args.get('session_id', type=int),
+        group_weights=parse_group_weights(request.args.get('weights'))
+    )
+
 @activities.route('/api/flashcards', methods=['GET'])
 @cross_origin()
 def get_flashcards():
     try:
-        cursor = current_app.db.cursor()
-        cursor.execute("""
-            SELECT w.id, w.spanish, w.english 
-            FROM words w 
-            ORDER BY RANDOM() 
-            LIMIT 10
-        """)
-        words = cursor.fetchall()
-        
+        words = sample_words(10)
+
         return jsonify({
             'cards': [
                 {
@@ -27,6 +46,8 @@ def get_flashcards():
                 } for word in words
             ]
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error in flashcards: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -46,15 +67,8 @@ def writing_practice():
 @cross_origin()
 def get_listening_exercises():
     try:
-        cursor = current_app.db.cursor()
         # Get words with audio for listening practice
-        cursor.execute("""
-            SELECT id, spanish, english 
-            FROM words 
-            ORDER BY RANDOM() 
-            LIMIT 5
-        """)
-        exercises = cursor.fetchall()
+        exercises = sample_words(5, columns=('id', 'spanish', 'english', 'audio_url'))
         
         return jsonify({
             'exercises': [
@@ -62,10 +76,13 @@ def get_listening_exercises():
                     'id': ex[0],
                     'spanish': ex[1],
                     'english': ex[2],
-                    'audio_url': f'/audio/{ex[0]}.mp3'
+                    # Pre-rendered when available, otherwise rendered (and cached) on first play
+                    'audio_url': ex[3] or '/api/tts?' + urlencode({'text': ex[1]})
                 } for ex in exercises
             ]
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error in listening practice: {str(e)}")
         return jsonify({'error': str(e)}), 500
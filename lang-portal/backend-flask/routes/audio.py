@@ -1,54 +1,102 @@
+import hmac
+import os
+import re
 from flask import Blueprint, request, jsonify, send_file, current_app
 from flask_cors import cross_origin
-import os
-import io
+
+from lib.audio_cache import audio_key
+from lib.tts import DEFAULT_SPEED, DEFAULT_VOICE
 
 audio = Blueprint('audio', __name__)
 
-@audio.route('/api/tts', methods=['POST'])
+AUDIO_KEY = re.compile(r'^[0-9a-f]{64}$')
+
+def speech_params(data):
+    """(text, voice, speed) from a JSON body or query string."""
+    text = (data.get('text') or '').strip()  # Remove any extra whitespace
+    voice = data.get('voice') or DEFAULT_VOICE
+    speed = float(data.get('speed') or DEFAULT_SPEED)
+    if not 0.25 <= speed <= 4.0:
+        raise ValueError('speed must be between 0.25 and 4.0')
+    return text, voice, speed
+
+def send_audio(f, key, **kwargs):
+    """send_file() for an open cache file. Size and mtime come from the
+    handle, so Range and conditional requests work as they do for a path."""
+    stat = os.fstat(f.fileno())
+    response = send_file(f, mimetype='audio/mpeg', etag=key, last_modified=stat.st_mtime,
+                         conditional=False, **kwargs)
+    response.content_length = stat.st_size
+    return response.make_conditional(request, accept_ranges=True, complete_length=stat.st_size)
+
+@audio.route('/api/tts', methods=['GET', 'POST'])
 @cross_origin()
 def text_to_speech():
+    # GET takes the same parameters in the query string, so an <audio> element
+    # can point at it directly and seek with Range requests
+    data = request.args if request.method == 'GET' else (request.get_json(silent=True) or {})
     try:
-        from flask import current_app
-        client = current_app.openai_client  # Get the OpenAI client from the Flask app context
-        
-        data = request.get_json()
-        if not data or 'text' not in data:
-            return jsonify({
-                'success': False,
-                'error': 'Missing text parameter'
-            }), 400
-
-        text = data['text'].strip()  # Remove any extra whitespace
-        print(f"Generating speech for Spanish text: {text}")  # Debug log
-
-        # Generate speech using OpenAI's TTS API with Spanish-specific settings
-        response = client.audio.speech.create(
-            model="gpt-4o-mini-tts",  # Using requested model
-            voice="shimmer",  # Shimmer tends to have better Spanish pronunciation
-            input=text,
-            speed=0.9,  # Slightly slower for clearer pronunciation
-            response_format="mp3"
-        )
-
-        # Create a BytesIO object from the response
-        audio_data = io.BytesIO(response.content)
-        audio_data.seek(0)
-
-        print(f"Successfully generated speech for: {text}")  # Debug log
+        text, voice, speed = speech_params(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if not text:
+        return jsonify({
+            'success': False,
+            'error': 'Missing text parameter'
+        }), 400
 
-        # Return the audio file
-        return send_file(
-            audio_data,
-            mimetype='audio/mpeg',
-            as_attachment=True,
-            download_name='speech.mp3'
+    try:
+        tts = current_app.tts
+        key = audio_key(text, voice, speed, tts.model)
+        # Rendered once per (text, voice, speed, model); later requests are a file send
+        f, hit = current_app.audio_cache.open_or_render(
+            key, lambda: tts.stream(text, voice=voice, speed=speed)
         )
+        if not hit:
+            print(f"Generated speech for: {text}")  # Debug log
+
+        response = send_audio(f, key, as_attachment=True, download_name='speech.mp3')
+        response.headers['X-Audio-Cache'] = 'hit' if hit else 'miss'
+        return response
 
     except Exception as e:
-        error_msg = f"Error generating speech for '{data.get('text', '')}': {str(e)}"
+        error_msg = f"Error generating speech for '{text}': {str(e)}"
         print(error_msg)  # More detailed error logging
         return jsonify({
             'success': False,
             'error': error_msg
-        }), 500 
\ No newline at end of file
+        }), 500
+
+@audio.route('/audio/<key>.mp3', methods=['GET'])
+@cross_origin()
+def get_audio(key):
+    # Pre-rendered pronunciations; the name is the content hash, so the file
+    # behind a URL never changes and clients may keep it indefinitely
+    if not AUDIO_KEY.match(key):
+        return jsonify({'error': 'Audio not found'}), 404
+    # Older runs rendered into the TTS cache, so look there too
+    f = current_app.audio_store.open(key) or current_app.audio_cache.open(key)
+    if f is None:
+        # A prerender run with verify re-queues the word; a GET changes nothing
+        return jsonify({'error': 'Audio not found'}), 404
+    response = send_audio(f, key, max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+@audio.route('/api/audio/prerender', methods=['POST'])
+@cross_origin()
+def start_prerender():
+    # Admin-only, as it pays for TTS across the whole vocabulary; without an
+    # ADMIN_TOKEN configured the endpoint is closed
+    token = current_app.config.get('ADMIN_TOKEN')
+    if not token or not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+        return jsonify({'error': 'Forbidden'}), 403
+    # ?verify=true first clears audio_url on rows whose file is missing
+    verify = request.args.get('verify', 'false').lower() in ('1', 'true', 'yes')
+    started = current_app.prerender_job.start(verify=verify)
+    return jsonify({'started': started, 'status': current_app.prerender_job.status}), 202 if started else 409
+
+@audio.route('/api/audio/prerender', methods=['GET'])
+@cross_origin()
+def prerender_status():
+    return jsonify(current_app.prerender_job.status)
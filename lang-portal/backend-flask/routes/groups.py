@@ -2,9 +2,14 @@ from flask import request, jsonify, g
 from flask_cors import cross_origin
 import json
 
+from lib import scheduler
+from lib.pagination import InvalidCursor, keyset_condition, next_cursor, page_args
+from routes.words import WORD_SORT_COLUMNS
+
 def load(app):
   @app.route('/api/groups', methods=['GET'])
   @cross_origin()
+  @app.response_cache.cached(tables=('groups', 'vocabulary'))
   def get_groups():
     try:
       cursor = app.db.cursor()
@@ -17,7 +22,7 @@ def load(app):
         GROUP BY g.id
       """)
       groups = cursor.fetchall()
-      return jsonify(groups)
+      return jsonify([dict(group) for group in groups])
     except Exception as e:
       print(f"Error getting groups: {str(e)}")
       return jsonify({"error": str(e)}), 500
@@ -27,35 +32,24 @@ def load(app):
   def get_group(group_id):
     cursor = app.db.cursor()
     try:
-        # Get group details with statistics
+        # Get group details with statistics from the per-word stats table
         cursor.execute("""
-            WITH word_stats AS (
-                SELECT 
-                    v.id as word_id,
-                    COUNT(wri.id) as total_attempts,
-                    SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END) as correct_count
-                FROM vocabulary v
-                LEFT JOIN word_review_items wri ON v.id = wri.word_id
-                WHERE v.group_id = ?
-                GROUP BY v.id
-            )
             SELECT 
                 g.id, 
                 g.name,
                 COUNT(v.id) as total_words,
                 COALESCE(AVG(CASE 
-                    WHEN ws.total_attempts > 0 
-                    THEN (ws.correct_count * 100.0 / ws.total_attempts) 
+                    WHEN wr.correct_count + wr.wrong_count > 0 
+                    THEN (wr.correct_count * 100.0 / (wr.correct_count + wr.wrong_count)) 
                     ELSE 0 
                 END), 0) as accuracy,
-                MAX(wri.created_at) as last_practice
+                MAX(wr.last_reviewed) as last_practice
             FROM groups g
             LEFT JOIN vocabulary v ON v.group_id = g.id
-            LEFT JOIN word_stats ws ON v.id = ws.word_id
-            LEFT JOIN word_review_items wri ON v.id = wri.word_id
+            LEFT JOIN word_reviews wr ON wr.word_id = v.id
             WHERE g.id = ?
             GROUP BY g.id
-        """, (group_id, group_id))
+        """, (group_id,))
         group = cursor.fetchone()
 
         if not group:
@@ -67,13 +61,12 @@ def load(app):
                 v.id, 
                 v.spanish, 
                 v.english,
-                COUNT(wri.id) as total_attempts,
-                SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END) as correct,
-                SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END) as wrong
+                COALESCE(wr.correct_count + wr.wrong_count, 0) as total_attempts,
+                COALESCE(wr.correct_count, 0) as correct,
+                COALESCE(wr.wrong_count, 0) as wrong
             FROM vocabulary v
-            LEFT JOIN word_review_items wri ON v.id = wri.word_id
+            LEFT JOIN word_reviews wr ON wr.word_id = v.id
             WHERE v.group_id = ?
-            GROUP BY v.id
         """, (group_id,))
         words = cursor.fetchall()
 
@@ -85,27 +78,49 @@ def load(app):
         print(f"Error getting group {group_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+  @app.route('/api/groups/<int:group_id>/due', methods=['GET'])
+  @cross_origin()
+  def get_group_due_words(group_id):
+    try:
+      limit = min(max(1, request.args.get('limit', 20, type=int)), 100)
+      include_new = request.args.get('include_new', 'true').lower() not in ('0', 'false', 'no')
+
+      cursor = app.db.cursor()
+      cursor.execute('SELECT 1 FROM groups WHERE id = ?', (group_id,))
+      if not cursor.fetchone():
+        return jsonify({"error": "Group not found"}), 404
+
+      # Overdue words come straight off the (group_id, due_at) index
+      words = scheduler.due_words(cursor, group_id, limit, include_new=include_new)
+      return jsonify({
+        "group_id": group_id,
+        "words": words
+      })
+    except Exception as e:
+      print(f"Error getting due words for group {group_id}: {str(e)}")
+      return jsonify({"error": str(e)}), 500
+
   @app.route('/groups/<int:id>/words', methods=['GET'])
   @cross_origin()
   def get_group_words(id):
     try:
       cursor = app.db.cursor()
       
-      # Get pagination parameters
-      page = int(request.args.get('page', 1))
-      words_per_page = 10
-      offset = (page - 1) * words_per_page
+      # Get paging parameters: ?page= (offset) or ?cursor= (keyset)
+      paging = page_args(request, default_per_page=10)
+      page = paging['page']
+      words_per_page = paging['per_page']
 
       # Get sorting parameters
       sort_by = request.args.get('sort_by', 'kanji')
       order = request.args.get('order', 'asc')
 
       # Validate sort parameters
-      valid_columns = ['kanji', 'romaji', 'english', 'correct_count', 'wrong_count']
-      if sort_by not in valid_columns:
+      if sort_by not in WORD_SORT_COLUMNS:
         sort_by = 'kanji'
       if order not in ['asc', 'desc']:
         order = 'asc'
+      sort_expr = WORD_SORT_COLUMNS[sort_by]
 
       # First, check if the group exists
       cursor.execute('SELECT name FROM groups WHERE id = ?', (id,))
@@ -113,29 +128,46 @@ def load(app):
       if not group:
         return jsonify({"error": "Group not found"}), 404
 
+      # Keyset mode seeks past the cursor instead of skipping OFFSET rows
+      keyset, params = '', [id]
+      if paging['keyset']:
+        if paging['cursor']:
+          keyset = 'AND ' + keyset_condition(sort_expr, 'w.id', order)
+          params += list(paging['cursor'])
+        limit_clause = 'LIMIT ?'
+        params += [words_per_page + 1]
+      else:
+        limit_clause = 'LIMIT ? OFFSET ?'
+        params += [words_per_page + 1, (page - 1) * words_per_page]
+
       # Query to fetch words with pagination and sorting
       cursor.execute(f'''
         SELECT w.*, 
-               COALESCE(wr.correct_count, 0) as correct_count,
-               COALESCE(wr.wrong_count, 0) as wrong_count
+               COALESCE(r.correct_count, 0) as correct_count,
+               COALESCE(r.wrong_count, 0) as wrong_count
         FROM words w
         JOIN word_groups wg ON w.id = wg.word_id
-        LEFT JOIN word_reviews wr ON w.id = wr.word_id
-        WHERE wg.group_id = ?
-        ORDER BY {sort_by} {order}
-        LIMIT ? OFFSET ?
-      ''', (id, words_per_page, offset))
+        LEFT JOIN word_reviews r ON w.id = r.word_id
+        WHERE wg.group_id = ? {keyset}
+        ORDER BY {sort_expr} {order}, w.id {order}
+        {limit_clause}
+      ''', params)
       
-      words = cursor.fetchall()
+      rows = cursor.fetchall()
+      words = rows[:words_per_page]
 
-      # Get total words count for pagination
-      cursor.execute('''
-        SELECT COUNT(*) 
-        FROM word_groups 
-        WHERE group_id = ?
-      ''', (id,))
-      total_words = cursor.fetchone()[0]
-      total_pages = (total_words + words_per_page - 1) // words_per_page
+      # Get total words count for pagination (optional, cached)
+      total_words = total_pages = None
+      if paging['include_total']:
+        def count_group_words():
+          cursor.execute('''
+            SELECT COUNT(*) 
+            FROM word_groups 
+            WHERE group_id = ?
+          ''', (id,))
+          return cursor.fetchone()[0]
+        total_words = app.count_cache.get(('group_words', id), ('word_groups', 'vocabulary'), count_group_words)
+        total_pages = (total_words + words_per_page - 1) // words_per_page
 
       # Format the response
       words_data = []
@@ -152,8 +184,11 @@ def load(app):
       return jsonify({
         'words': words_data,
         'total_pages': total_pages,
-        'current_page': page
+        'current_page': page,
+        'next_cursor': next_cursor(rows, words_per_page, sort_by)
       })
+    except InvalidCursor as e:
+      return jsonify({"error": str(e)}), 400
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
@@ -1,16 +1,38 @@
-@app.route('/api/import/words', methods=['POST'])
-@cross_origin()
-def import_words():
-    data = request.get_json()
-    cursor = app.db.cursor()
-    try:
-        for word in data['words']:
-            cursor.execute("""
-                INSERT INTO words (spanish, english, group_id) 
-                VALUES (?, ?, ?)
-            """, (word['spanish'], word['english'], word['group_id']))
-        app.db.commit()
-        return jsonify({'success': True})
-    except Exception as e:
-        app.db.rollback()
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+import hmac
+from flask import request, jsonify
+from flask_cors import cross_origin
+
+from lib import importer
+
+def load(app):
+    @app.route('/api/import/words', methods=['POST'])
+    @cross_origin()
+    def import_words():
+        # Admin-only; without an ADMIN_TOKEN configured the endpoint is closed
+        token = app.config.get('ADMIN_TOKEN')
+        if not token or not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+            return jsonify({'error': 'Forbidden'}), 403
+
+        group_name = request.args.get('group')
+        group_id = request.args.get('group_id', type=int)
+        batch_size = request.args.get('batch_size', importer.DEFAULT_BATCH_SIZE, type=int)
+
+        try:
+            # The body is read straight off the request stream, never parsed whole
+            result = importer.import_words(
+                app.db.get(),
+                request.stream,
+                group_name=group_name,
+                group_id=group_id,
+                batch_size=max(1, batch_size)
+            )
+        except importer.InvalidWordFile as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+        # New words change the word counts, the dashboard and the sampler's pool
+        app.count_cache.invalidate('vocabulary', 'words', 'word_groups')
+        app.dashboard_stats.invalidate()
+        app.word_sampler.invalidate()
+        return jsonify({'success': True, **result})
@@ -1,79 +1,140 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, url_for
 from flask_cors import cross_origin
+import asyncio
+import math
 import sys
-import os
-import time
 from pathlib import Path
-from openai import OpenAI
+
+from lib.jobs import FAILED, SUCCEEDED, QueueFull
 
 # Add song-vocab to Python path
 song_vocab_path = Path(__file__).parent.parent.parent.parent / 'song-vocab'
 sys.path.append(str(song_vocab_path))
 
 from agent import SongLyricsAgent
+from song_cache import SongCache, song_key
+from tools.http_cache import http_client
+
+lyrics_path = song_vocab_path / 'outputs' / 'lyrics'
+vocabulary_path = song_vocab_path / 'outputs' / 'vocabulary'
+
+# Longest a request may block waiting for a job (?wait=seconds)
+MAX_WAIT = 30
 
-song_vocabulary = Blueprint('song_vocabulary', __name__)
+def make_agent():
+    # Create directories if they don't exist
+    lyrics_path.mkdir(parents=True, exist_ok=True)
+    vocabulary_path.mkdir(parents=True, exist_ok=True)
 
-def wait_for_files(lyrics_path: Path, vocabulary_path: Path, song_id: str, max_wait: int = 30) -> bool:
-    """Wait for both lyrics and vocabulary files to be created."""
-    lyrics_file = lyrics_path / f"{song_id}.txt"
-    vocabulary_file = vocabulary_path / f"{song_id}.json"
-    
-    start_time = time.time()
-    while time.time() - start_time < max_wait:
-        if lyrics_file.exists() and vocabulary_file.exists():
-            return True
-        time.sleep(1)
-    return False
+    # The agent's own client already goes through the shared LLM cache
+    return SongLyricsAgent(lyrics_path, vocabulary_path)
+
+def make_song_cache():
+    return SongCache(lyrics_path, vocabulary_path)
+
+def run_search(job, message, song_cache):
+    """Job body: run the agent on a worker thread and check what it saved."""
+    job.report(stage='searching')
+    agent = make_agent()
+
+    async def run():
+        try:
+            return await agent.process_request(message, progress=job.report)
+        finally:
+            # Page fetches share a pooled session per event loop; this one ends here
+            await http_client.aclose()
+
+    # Each worker thread gets its own event loop for the agent
+    result = asyncio.run(run())
+
+    song_id = result.get('song_id')
+    if not song_id:
+        raise ValueError('Failed to process song')
+    # save_results writes both files before the agent reports FINISHED
+    if not (lyrics_path / f"{song_id}.txt").exists() or not (vocabulary_path / f"{song_id}.json").exists():
+        raise FileNotFoundError(f'Agent finished without saving lyrics and vocabulary for {song_id}')
+    song_cache.remember(message, song_id)
+    job.report(stage='done')
+    return {'song_id': song_id}
+
+def wait_seconds(args):
+    try:
+        seconds = float(args.get('wait', 0))
+    except ValueError:
+        return 0
+    # float() also accepts 'nan' and 'inf'
+    if not math.isfinite(seconds):
+        return 0
+    return min(max(seconds, 0), MAX_WAIT)
 
 def load(app):
+    # Built per app so create_app() can be called more than once (e.g. in tests)
+    song_vocabulary = Blueprint('song_vocabulary', __name__)
+    app.song_cache = make_song_cache()
+
+    def job_response(job):
+        status = job.to_dict()
+        status['status_url'] = url_for('song_vocabulary.get_job', job_id=job.id)
+        if job.state == SUCCEEDED:
+            status['song_id'] = job.result['song_id']
+            return jsonify(status), 200
+        if job.state == FAILED:
+            return jsonify(status), 500
+        response = jsonify(status)
+        response.status_code = 202
+        response.headers['Location'] = status['status_url']
+        return response
+
     @song_vocabulary.route('/api/song-vocabulary/search', methods=['POST'])
     @cross_origin()
     def search():
+        data = request.get_json(silent=True) or {}
+        message = data.get('message_request')
+        if not message:
+            return jsonify({'error': 'No message provided'}), 400
+
+        # Songs processed before are answered from their saved files
+        song_id = app.song_cache.lookup(message)
+        if song_id:
+            return jsonify({'state': SUCCEEDED, 'song_id': song_id, 'cached': True})
+
+        # The agent runs on the job pool; this request only enqueues it.
+        # A search for a song that is already being processed joins that job.
         try:
-            data = request.get_json()
-            message = data.get('message_request')
-            if not message:
-                return jsonify({'error': 'No message provided'}), 400
-
-            # Initialize the agent with paths in the song-vocab directory
-            lyrics_path = song_vocab_path / 'outputs' / 'lyrics'
-            vocabulary_path = song_vocab_path / 'outputs' / 'vocabulary'
-            
-            # Create directories if they don't exist
-            lyrics_path.mkdir(parents=True, exist_ok=True)
-            vocabulary_path.mkdir(parents=True, exist_ok=True)
-            
-            # Initialize agent with app's OpenAI client
-            agent = SongLyricsAgent(lyrics_path, vocabulary_path)
-            agent.client = OpenAI(
-                api_key=os.getenv('OPENAI_API_KEY'),
-                base_url="https://api.openai.com/v1"
-            )
-            
-            # Process the request
-            import asyncio
-            result = asyncio.run(agent.process_request(message))
-            
-            if not result.get('song_id'):
-                return jsonify({'error': 'Failed to process song'}), 500
-                
-            # Wait for files to be created
-            song_id = result['song_id']
-            if not wait_for_files(lyrics_path, vocabulary_path, song_id):
-                return jsonify({'error': 'Timeout waiting for files to be created'}), 500
-                
-            return jsonify({'song_id': song_id})
+            job = app.song_jobs.submit(run_search, message, app.song_cache,
+                                       kind='song-search', key=song_key(message))
+        except QueueFull as e:
+            response = jsonify({'error': f'Too many song searches in progress: {e}'})
+            response.status_code = 503
+            response.headers['Retry-After'] = '30'
+            return response
 
-        except Exception as e:
-            print(f"Error in song vocabulary search: {str(e)}")
-            return jsonify({'error': str(e)}), 500
+        # ?wait=n blocks for up to n seconds, for callers that prefer one request
+        job.wait(wait_seconds(request.args))
+        return job_response(job)
+
+    @song_vocabulary.route('/api/song-vocabulary/jobs/<job_id>', methods=['GET'])
+    @cross_origin()
+    def get_job(job_id):
+        job = app.song_jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        # Long-poll: returns as soon as the job finishes, or after ?wait seconds
+        job.wait(wait_seconds(request.args))
+        return job_response(job)
+
+    def lyrics_file_for(song_id):
+        return lyrics_path / f"{song_id}.txt"
+
+    def vocabulary_file_for(song_id):
+        return vocabulary_path / f"{song_id}.json"
 
     @song_vocabulary.route('/api/song-vocabulary/lyrics/<song_id>', methods=['GET'])
     @cross_origin()
+    @app.response_cache.cached(files=lambda song_id: [lyrics_file_for(song_id)])
     def get_lyrics(song_id):
         try:
-            lyrics_file = song_vocab_path / 'outputs' / 'lyrics' / f"{song_id}.txt"
+            lyrics_file = lyrics_file_for(song_id)
             if not lyrics_file.exists():
                 return jsonify({'error': 'Lyrics not found'}), 404
                 
@@ -84,9 +145,10 @@ def load(app):
 
     @song_vocabulary.route('/api/song-vocabulary/vocabulary/<song_id>', methods=['GET'])
     @cross_origin()
+    @app.response_cache.cached(files=lambda song_id: [vocabulary_file_for(song_id)])
     def get_vocabulary(song_id):
         try:
-            vocabulary_file = song_vocab_path / 'outputs' / 'vocabulary' / f"{song_id}.json"
+            vocabulary_file = vocabulary_file_for(song_id)
             if not vocabulary_file.exists():
                 return jsonify({'error': 'Vocabulary not found'}), 404
                 
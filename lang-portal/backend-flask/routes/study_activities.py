@@ -2,9 +2,12 @@ from flask import jsonify, request
 from flask_cors import cross_origin
 import math
 
+from lib.pagination import InvalidCursor, keyset_condition, next_cursor, page_args
+
 def load(app):
     @app.route('/api/study-activities', methods=['GET'])
     @cross_origin()
+    @app.response_cache.cached(tables=('study_activities',))
     def get_study_activities():
         try:
             cursor = app.db.cursor()
@@ -42,22 +45,43 @@ def load(app):
         if not cursor.fetchone():
             return jsonify({'error': 'Activity not found'}), 404
 
-        # Get pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        offset = (page - 1) * per_page
+        # Get pagination parameters (offset by default, keyset with ?cursor=)
+        try:
+            paging = page_args(request, default_per_page=10)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        page = paging['page']
+        per_page = paging['per_page']
 
-        # Get total count
-        cursor.execute('''
-            SELECT COUNT(*) as count 
-            FROM study_sessions ss
-            JOIN groups g ON g.id = ss.group_id
-            WHERE ss.study_activity_id = ?
-        ''', (id,))
-        total_count = cursor.fetchone()['count']
+        # Get total count (optional, cached until study_sessions changes)
+        total_count = None
+        if paging['include_total']:
+            def count_sessions():
+                cursor.execute('''
+                    SELECT COUNT(*) as count 
+                    FROM study_sessions ss
+                    JOIN groups g ON g.id = ss.group_id
+                    WHERE ss.study_activity_id = ?
+                ''', (id,))
+                return cursor.fetchone()['count']
+            total_count = app.count_cache.get(
+                ('activity_sessions', id), ('study_sessions', 'groups'), count_sessions)
+
+        # Newest first; id breaks ties so every row has a stable position
+        params = [id]
+        keyset = ''
+        if paging['keyset']:
+            if paging['cursor']:
+                keyset = 'AND ' + keyset_condition('ss.created_at', 'ss.id', 'desc')
+                params += list(paging['cursor'])
+            limit_clause = 'LIMIT ?'
+            params += [per_page + 1]
+        else:
+            limit_clause = 'LIMIT ? OFFSET ?'
+            params += [per_page + 1, (page - 1) * per_page]
 
         # Get paginated sessions
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT 
                 ss.id,
                 ss.group_id,
@@ -70,11 +94,11 @@ def load(app):
             JOIN groups g ON g.id = ss.group_id
             JOIN study_activities sa ON sa.id = ss.study_activity_id
             LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
-            WHERE ss.study_activity_id = ?
+            WHERE ss.study_activity_id = ? {keyset}
             GROUP BY ss.id, ss.group_id, g.name, sa.name, ss.created_at, ss.study_activity_id
-            ORDER BY ss.created_at DESC
-            LIMIT ? OFFSET ?
-        ''', (id, per_page, offset))
+            ORDER BY ss.created_at DESC, ss.id DESC
+            {limit_clause}
+        ''', params)
         sessions = cursor.fetchall()
 
         return jsonify({
@@ -87,15 +111,17 @@ def load(app):
                 'start_time': session['created_at'],
                 'end_time': session['created_at'],  # For now, just use the same time since we don't track end time
                 'review_items_count': session['review_items_count']
-            } for session in sessions],
+            } for session in sessions[:per_page]],
             'total': total_count,
             'page': page,
             'per_page': per_page,
-            'total_pages': math.ceil(total_count / per_page)
+            'total_pages': math.ceil(total_count / per_page) if total_count is not None else None,
+            'next_cursor': next_cursor(sessions, per_page, 'created_at')
         })
 
     @app.route('/api/study-activities/<int:id>/launch', methods=['GET'])
     @cross_origin()
+    @app.response_cache.cached(tables=('study_activities', 'groups'))
     def get_study_activity_launch_data(id):
         cursor = app.db.cursor()
         
@@ -1,8 +1,61 @@
 from flask import request, jsonify, g
 from flask_cors import cross_origin
-from datetime import datetime
+from datetime import datetime, timezone
 import math
 
+from lib import review_stats, scheduler
+from lib.pagination import InvalidCursor, keyset_condition, next_cursor, page_args
+
+# Most answers one batch submission may carry
+MAX_BATCH_REVIEWS = 500
+
+def quality_error(quality):
+  """Why an answer's optional SM-2 quality is invalid, or None if it's fine."""
+  if quality is not None and (not isinstance(quality, int) or isinstance(quality, bool) or not 0 <= quality <= 5):
+    return 'quality must be an integer from 0 to 5'
+  return None
+
+def parse_review(item, known_words):
+  """Validate one batch item. Returns (review, None) or (None, error)."""
+  if not isinstance(item, dict):
+    return None, 'Expected an object'
+  word_id = item.get('word_id')
+  if not isinstance(word_id, int) or isinstance(word_id, bool):
+    return None, 'word_id must be an integer'
+  if word_id not in known_words:
+    return None, 'Unknown word_id'
+  if not isinstance(item.get('correct'), (bool, int)):
+    return None, 'correct must be a boolean'
+
+  answered_at = item.get('answered_at')
+  if answered_at is not None:
+    try:
+      answered_at = datetime.fromisoformat(str(answered_at))
+    except ValueError:
+      return None, 'answered_at must be an ISO 8601 timestamp'
+    if answered_at.tzinfo is not None:
+      answered_at = answered_at.astimezone(timezone.utc).replace(tzinfo=None)
+    # Stored the way CURRENT_TIMESTAMP writes it, so date comparisons keep working
+    answered_at = scheduler.format_timestamp(answered_at)
+
+  response_time_ms = item.get('response_time_ms')
+  if response_time_ms is not None and (
+      not isinstance(response_time_ms, int) or isinstance(response_time_ms, bool) or response_time_ms < 0):
+    return None, 'response_time_ms must be a non-negative integer'
+
+  quality = item.get('quality')
+  error = quality_error(quality)
+  if error:
+    return None, error
+
+  return {
+    'word_id': word_id,
+    'correct': 1 if item['correct'] else 0,
+    'answered_at': answered_at,
+    'response_time_ms': response_time_ms,
+    'quality': quality,
+  }, None
+
 def load(app):
   # todo /study_sessions POST
 
@@ -12,22 +65,38 @@ def load(app):
     try:
       cursor = app.db.cursor()
       
-      # Get pagination parameters
-      page = request.args.get('page', 1, type=int)
-      per_page = request.args.get('per_page', 10, type=int)
-      offset = (page - 1) * per_page
+      # Get pagination parameters (offset by default, keyset with ?cursor=)
+      paging = page_args(request, default_per_page=10)
+      page = paging['page']
+      per_page = paging['per_page']
 
-      # Get total count
-      cursor.execute('''
-        SELECT COUNT(*) as count 
-        FROM study_sessions ss
-        JOIN groups g ON g.id = ss.group_id
-        JOIN study_activities sa ON sa.id = ss.study_activity_id
-      ''')
-      total_count = cursor.fetchone()['count']
+      # Get total count (optional, cached until study_sessions changes)
+      total_count = None
+      if paging['include_total']:
+        def count_sessions():
+          cursor.execute('''
+            SELECT COUNT(*) as count 
+            FROM study_sessions ss
+            JOIN groups g ON g.id = ss.group_id
+            JOIN study_activities sa ON sa.id = ss.study_activity_id
+          ''')
+          return cursor.fetchone()['count']
+        total_count = app.count_cache.get(
+          'study_sessions', ('study_sessions', 'groups', 'study_activities'), count_sessions)
+
+      # Newest first; id breaks ties so every row has a stable position
+      if paging['keyset']:
+        where, params = '', []
+        if paging['cursor']:
+          where = 'WHERE ' + keyset_condition('ss.created_at', 'ss.id', 'desc')
+          params = list(paging['cursor'])
+        limit_clause, params = 'LIMIT ?', params + [per_page + 1]
+      else:
+        where = ''
+        limit_clause, params = 'LIMIT ? OFFSET ?', [per_page + 1, (page - 1) * per_page]
 
       # Get paginated sessions
-      cursor.execute('''
+      cursor.execute(f'''
         SELECT 
           ss.id,
           ss.group_id,
@@ -40,10 +109,11 @@ def load(app):
         JOIN groups g ON g.id = ss.group_id
         JOIN study_activities sa ON sa.id = ss.study_activity_id
         LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
+        {where}
         GROUP BY ss.id
-        ORDER BY ss.created_at DESC
-        LIMIT ? OFFSET ?
-      ''', (per_page, offset))
+        ORDER BY ss.created_at DESC, ss.id DESC
+        {limit_clause}
+      ''', params)
       sessions = cursor.fetchall()
 
       return jsonify({
@@ -56,12 +126,15 @@ def load(app):
           'start_time': session['created_at'],
           'end_time': session['created_at'],  # For now, just use the same time since we don't track end time
           'review_items_count': session['review_items_count']
-        } for session in sessions],
+        } for session in sessions[:per_page]],
         'total': total_count,
         'page': page,
         'per_page': per_page,
-        'total_pages': math.ceil(total_count / per_page)
+        'total_pages': math.ceil(total_count / per_page) if total_count is not None else None,
+        'next_cursor': next_cursor(sessions, per_page, 'created_at')
       })
+    except InvalidCursor as e:
+      return jsonify({"error": str(e)}), 400
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
@@ -168,6 +241,8 @@ def load(app):
           VALUES (?, 1, CURRENT_TIMESTAMP)
       """, (data['group_id'],))
       app.db.commit()
+      app.count_cache.invalidate('study_sessions')
+      app.dashboard_stats.invalidate()
       session_id = cursor.lastrowid
       return jsonify({
         'success': True,
@@ -192,16 +267,26 @@ def load(app):
           'success': False,
           'error': 'Missing required fields: session_id, word_id, or correct'
         }), 400
+      error = quality_error(data.get('quality'))
+      if error:
+        return jsonify({
+          'success': False,
+          'error': error
+        }), 400
 
       cursor = app.db.cursor()
       cursor.execute("""
           INSERT INTO word_review_items (word_id, study_session_id, correct, created_at)
           VALUES (?, ?, ?, CURRENT_TIMESTAMP)
       """, (data['word_id'], data['session_id'], 1 if data['correct'] else 0))
+      review_stats.record_review(cursor, data['word_id'], data['correct'])
+      due_at = scheduler.record_review(cursor, data['word_id'], data['correct'], quality=data.get('quality'))
       app.db.commit()
+      app.dashboard_stats.invalidate()
       return jsonify({
         'success': True,
-        'message': 'Answer recorded successfully'
+        'message': 'Answer recorded successfully',
+        'due_at': due_at
       }), 201
     except Exception as e:
       print(f"Error recording word review: {str(e)}")
@@ -210,7 +295,83 @@ def load(app):
         'error': str(e)
       }), 500
 
-  # todo POST /study_sessions/:id/review
+  @app.route('/api/study-sessions/<int:id>/reviews', methods=['POST'])
+  @cross_origin()
+  def record_word_reviews(id):
+    try:
+      data = request.get_json(silent=True)
+      items = data.get('reviews') if isinstance(data, dict) else data
+      if not isinstance(items, list) or not items:
+        return jsonify({
+          'success': False,
+          'error': 'Expected a non-empty array of reviews'
+        }), 400
+      if len(items) > MAX_BATCH_REVIEWS:
+        return jsonify({
+          'success': False,
+          'error': f'At most {MAX_BATCH_REVIEWS} reviews per request'
+        }), 413
+
+      cursor = app.db.cursor()
+      cursor.execute('SELECT 1 FROM study_sessions WHERE id = ?', (id,))
+      if not cursor.fetchone():
+        return jsonify({'success': False, 'error': 'Study session not found'}), 404
+
+      # One lookup for every word in the batch
+      word_ids = {item['word_id'] for item in items
+                  if isinstance(item, dict) and isinstance(item.get('word_id'), int)}
+      known_words = set()
+      if word_ids:
+        placeholders = ','.join('?' * len(word_ids))
+        cursor.execute(f'SELECT id FROM vocabulary WHERE id IN ({placeholders})', list(word_ids))
+        known_words = {row[0] for row in cursor.fetchall()}
+
+      results = []
+      reviews = []
+      for index, item in enumerate(items):
+        review, error = parse_review(item, known_words)
+        if error:
+          results.append({'index': index, 'status': 'rejected', 'error': error})
+        else:
+          results.append({'index': index, 'word_id': review['word_id'], 'status': 'recorded'})
+          reviews.append((index, review))
+
+      if reviews:
+        # Answers fold into the rolling stats and schedule in the order given;
+        # answered_at only orders them when every item has one
+        if all(review['answered_at'] for _, review in reviews):
+          reviews.sort(key=lambda pair: pair[1]['answered_at'])
+
+        cursor.executemany('''
+          INSERT INTO word_review_items (word_id, study_session_id, correct, created_at, response_time_ms)
+          VALUES (:word_id, :session_id, :correct, COALESCE(:answered_at, CURRENT_TIMESTAMP), :response_time_ms)
+        ''', [dict(review, session_id=id) for _, review in reviews])
+        review_stats.record_reviews(cursor, [
+          (review['word_id'], review['correct'], review['answered_at']) for _, review in reviews
+        ])
+        due_times = scheduler.record_reviews(cursor, [
+          (review['word_id'], review['correct'], review['answered_at'], review['quality']) for _, review in reviews
+        ])
+        for (index, _), due_at in zip(reviews, due_times):
+          results[index]['due_at'] = due_at
+
+        # One commit for the whole batch
+        app.db.commit()
+        app.dashboard_stats.invalidate()
+
+      return jsonify({
+        'success': bool(reviews),
+        'session_id': id,
+        'recorded': len(reviews),
+        'rejected': len(items) - len(reviews),
+        'items': results
+      }), 201 if reviews else 400
+    except Exception as e:
+      print(f"Error recording word reviews: {str(e)}")
+      return jsonify({
+        'success': False,
+        'error': str(e)
+      }), 500
 
   @app.route('/api/study-sessions/reset', methods=['POST'])
   @cross_origin()
@@ -220,11 +381,15 @@ def load(app):
       
       # First delete all word review items since they have foreign key constraints
       cursor.execute('DELETE FROM word_review_items')
+      review_stats.clear(cursor)
+      scheduler.clear(cursor)
       
       # Then delete all study sessions
       cursor.execute('DELETE FROM study_sessions')
       
       app.db.commit()
+      app.count_cache.invalidate('study_sessions')
+      app.dashboard_stats.invalidate()
       
       return jsonify({"message": "Study history cleared successfully"}), 200
     except Exception as e:
@@ -2,6 +2,22 @@ from flask import request, jsonify, g
 from flask_cors import cross_origin
 import json
 
+from lib import review_stats
+from lib.pagination import InvalidCursor, keyset_condition, next_cursor, page_args
+
+# Sortable columns for word listings, mapped to the expression to order and
+# seek on (review counts come from the LEFT JOINed word_reviews row). The
+# review-count sorts are not keyset-optimized: the COALESCE over the outer
+# join can't use an index, so every page still sorts the whole join; they
+# only save the OFFSET scan
+WORD_SORT_COLUMNS = {
+  'kanji': 'w.kanji',
+  'romaji': 'w.romaji',
+  'english': 'w.english',
+  'correct_count': 'COALESCE(r.correct_count, 0)',
+  'wrong_count': 'COALESCE(r.wrong_count, 0)'
+}
+
 def load(app):
   # Endpoint: GET /words with pagination (50 words per page)
   @app.route('/words', methods=['GET'])
@@ -10,23 +26,33 @@ def load(app):
     try:
       cursor = app.db.cursor()
 
-      # Get the current page number from query parameters (default is 1)
-      page = int(request.args.get('page', 1))
-      # Ensure page number is positive
-      page = max(1, page)
-      words_per_page = 50
-      offset = (page - 1) * words_per_page
+      # Get paging parameters: ?page= (offset) or ?cursor= (keyset)
+      paging = page_args(request, default_per_page=50)
+      page = paging['page']
+      words_per_page = paging['per_page']
 
       # Get sorting parameters from the query string
       sort_by = request.args.get('sort_by', 'kanji')  # Default to sorting by 'kanji'
       order = request.args.get('order', 'asc')  # Default to ascending order
 
       # Validate sort_by and order
-      valid_columns = ['kanji', 'romaji', 'english', 'correct_count', 'wrong_count']
-      if sort_by not in valid_columns:
+      if sort_by not in WORD_SORT_COLUMNS:
         sort_by = 'kanji'
       if order not in ['asc', 'desc']:
         order = 'asc'
+      sort_expr = WORD_SORT_COLUMNS[sort_by]
+
+      # Keyset mode seeks past the cursor instead of skipping OFFSET rows
+      where, params = '', []
+      if paging['keyset']:
+        if paging['cursor']:
+          where = 'WHERE ' + keyset_condition(sort_expr, 'w.id', order)
+          params = list(paging['cursor'])
+        limit_clause = 'LIMIT ?'
+        params += [words_per_page + 1]
+      else:
+        limit_clause = 'LIMIT ? OFFSET ?'
+        params = [words_per_page + 1, (page - 1) * words_per_page]
 
       # Query to fetch words with sorting
       cursor.execute(f'''
@@ -35,16 +61,23 @@ def load(app):
             COALESCE(r.wrong_count, 0) AS wrong_count
         FROM words w
         LEFT JOIN word_reviews r ON w.id = r.word_id
-        ORDER BY {sort_by} {order}
-        LIMIT ? OFFSET ?
-      ''', (words_per_page, offset))
+        {where}
+        ORDER BY {sort_expr} {order}, w.id {order}
+        {limit_clause}
+      ''', params)
 
-      words = cursor.fetchall()
+      rows = cursor.fetchall()
+      words = rows[:words_per_page]
 
-      # Query the total number of words
-      cursor.execute('SELECT COUNT(*) FROM words')
-      total_words = cursor.fetchone()[0]
-      total_pages = (total_words + words_per_page - 1) // words_per_page
+      # Query the total number of words (optional, cached until words changes)
+      total_words = total_pages = None
+      if paging['include_total']:
+        def count_words():
+          cursor.execute('SELECT COUNT(*) FROM words')
+          return cursor.fetchone()[0]
+        # Also tagged 'vocabulary': bulk imports write there and drop it
+        total_words = app.count_cache.get('words', ('words', 'vocabulary'), count_words)
+        total_pages = (total_words + words_per_page - 1) // words_per_page
 
       # Format the response
       words_data = []
@@ -62,17 +95,20 @@ def load(app):
         "words": words_data,
         "total_pages": total_pages,
         "current_page": page,
-        "total_words": total_words
+        "total_words": total_words,
+        "next_cursor": next_cursor(rows, words_per_page, sort_by)
       })
-
+    except InvalidCursor as e:
+      return jsonify({"error": str(e)}), 400
     except Exception as e:
       return jsonify({"error": str(e)}), 500
-    finally:
-      app.db.close()
 
   # Endpoint: GET /words/:id to get a single word with its details
   @app.route('/words/<int:word_id>', methods=['GET'])
   @cross_origin()
+  # Keyed on vocabulary, where the migrated schema keeps words; the legacy
+  # tables stay listed for databases built by Db.setup_tables
+  @app.response_cache.cached(tables=('vocabulary', 'words', 'word_reviews', 'word_groups', 'groups'))
   def get_word(word_id):
     try:
       cursor = app.db.cursor()
@@ -131,6 +167,8 @@ def load(app):
         VALUES (?, ?, ?)
     """, (data['spanish'], data['english'], data['group_id']))
     app.db.commit()
+    app.count_cache.invalidate('words')
+    app.word_sampler.invalidate()
     return jsonify({'success': True})
 
   @app.route('/api/words/review', methods=['POST'])
@@ -142,5 +180,7 @@ def load(app):
         INSERT INTO word_review_items (word_id, correct, created_at)
         VALUES (?, ?, CURRENT_TIMESTAMP)
     """, (data['word_id'], data['correct']))
+    review_stats.record_review(cursor, data['word_id'], data['correct'])
     app.db.commit()
+    app.dashboard_stats.invalidate()
     return jsonify({'success': True})
\ No newline at end of file
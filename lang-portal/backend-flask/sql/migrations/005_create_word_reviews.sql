@@ -0,0 +1,22 @@
+-- Per-word review statistics, maintained incrementally on every answer
+-- (see lib/review_stats.py) so read endpoints don't re-aggregate word_review_items.
+CREATE TABLE IF NOT EXISTS word_reviews (
+    word_id INTEGER PRIMARY KEY,
+    correct_count INTEGER NOT NULL DEFAULT 0,
+    wrong_count INTEGER NOT NULL DEFAULT 0,
+    last_reviewed DATETIME,
+    rolling_accuracy REAL,  -- exponentially weighted, recent answers count most
+    FOREIGN KEY (word_id) REFERENCES vocabulary(id)
+);
+
+-- Backfill existing history. rolling_accuracy starts at the lifetime accuracy;
+-- run `python migrate.py rebuild-stats` to replay the history exactly.
+INSERT OR IGNORE INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed, rolling_accuracy)
+SELECT 
+    word_id,
+    SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END),
+    SUM(CASE WHEN correct = 0 THEN 1 ELSE 0 END),
+    MAX(created_at),
+    AVG(CASE WHEN correct = 1 THEN 1.0 ELSE 0 END)
+FROM word_review_items
+GROUP BY word_id;
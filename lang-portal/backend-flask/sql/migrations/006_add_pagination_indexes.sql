@@ -0,0 +1,3 @@
+-- Composite (sort column, id) indexes backing keyset pagination of session listings
+CREATE INDEX IF NOT EXISTS idx_study_sessions_created_at_id ON study_sessions(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_activity_created_at_id ON study_sessions(study_activity_id, created_at, id);
@@ -0,0 +1,8 @@
+-- Indexes for the foreign keys every dashboard, group and session query joins on.
+-- Trailing columns make them covering for the per-word / per-session aggregates,
+-- so those read only the index and never touch the table rows.
+CREATE INDEX IF NOT EXISTS idx_word_review_items_word_id ON word_review_items(word_id, correct);
+CREATE INDEX IF NOT EXISTS idx_word_review_items_session_created_at ON word_review_items(study_session_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_word_review_items_created_at ON word_review_items(created_at, correct);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group_created_at ON study_sessions(group_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_vocabulary_group_id ON vocabulary(group_id);
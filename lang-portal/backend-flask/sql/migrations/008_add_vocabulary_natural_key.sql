@@ -0,0 +1,43 @@
+-- A word is identified by its spelling within a group, so bulk imports can
+-- upsert on it. The unique index also serves lookups by group_id alone,
+-- which makes the plain group_id index from 007 redundant.
+
+-- Older databases can hold the same word twice in a group, which would make
+-- the index fail. Each extra copy is merged into the first one (lowest id):
+-- its reviews move over and the kept word's statistics are recomputed from
+-- the merged history, as in 005.
+CREATE TEMP TABLE vocabulary_duplicates AS
+SELECT v.id AS id, firsts.id AS keep_id
+FROM vocabulary v
+JOIN (
+    SELECT group_id, spanish, MIN(id) AS id
+    FROM vocabulary
+    GROUP BY group_id, spanish
+    HAVING COUNT(*) > 1
+) firsts ON firsts.group_id = v.group_id AND firsts.spanish = v.spanish
+WHERE v.id <> firsts.id;
+
+UPDATE word_review_items
+SET word_id = (SELECT keep_id FROM vocabulary_duplicates WHERE id = word_review_items.word_id)
+WHERE word_id IN (SELECT id FROM vocabulary_duplicates);
+
+DELETE FROM word_reviews
+WHERE word_id IN (SELECT id FROM vocabulary_duplicates)
+   OR word_id IN (SELECT keep_id FROM vocabulary_duplicates);
+
+INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed, rolling_accuracy)
+SELECT
+    word_id,
+    SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END),
+    SUM(CASE WHEN correct = 0 THEN 1 ELSE 0 END),
+    MAX(created_at),
+    AVG(CASE WHEN correct = 1 THEN 1.0 ELSE 0 END)
+FROM word_review_items
+WHERE word_id IN (SELECT keep_id FROM vocabulary_duplicates)
+GROUP BY word_id;
+
+DELETE FROM vocabulary WHERE id IN (SELECT id FROM vocabulary_duplicates);
+DROP TABLE vocabulary_duplicates;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_vocabulary_group_spanish ON vocabulary(group_id, spanish);
+DROP INDEX IF EXISTS idx_vocabulary_group_id;
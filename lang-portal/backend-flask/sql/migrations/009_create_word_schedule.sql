@@ -0,0 +1,19 @@
+-- Spaced-repetition state per reviewed word (see lib/scheduler.py).
+-- group_id is copied from vocabulary so the due queue of a group is a single
+-- range read on idx_word_schedule_group_due.
+CREATE TABLE IF NOT EXISTS word_schedule (
+    word_id INTEGER PRIMARY KEY,
+    group_id INTEGER NOT NULL,
+    ease REAL NOT NULL DEFAULT 2.5,
+    interval_days INTEGER NOT NULL DEFAULT 0,
+    repetitions INTEGER NOT NULL DEFAULT 0,
+    lapses INTEGER NOT NULL DEFAULT 0,
+    due_at DATETIME NOT NULL,
+    last_reviewed DATETIME,
+    FOREIGN KEY (word_id) REFERENCES vocabulary(id),
+    FOREIGN KEY (group_id) REFERENCES groups(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_word_schedule_group_due ON word_schedule(group_id, due_at);
+
+-- Existing review history is replayed by `python migrate.py rebuild-stats`
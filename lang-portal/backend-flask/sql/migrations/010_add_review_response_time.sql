@@ -0,0 +1,2 @@
+-- How long the learner took to answer, as sent by batch review submissions
+ALTER TABLE word_review_items ADD COLUMN response_time_ms INTEGER;
@@ -0,0 +1,74 @@
+-- Write counters used for HTTP ETags (see lib/http_cache.py). Every insert,
+-- update or delete on a tracked table bumps its version, including writes
+-- made outside the app.
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT OR IGNORE INTO table_versions (name) VALUES
+    ('study_activities'),
+    ('groups'),
+    ('vocabulary'),
+    ('word_reviews');
+
+CREATE TRIGGER IF NOT EXISTS trg_study_activities_version_insert AFTER INSERT ON study_activities
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_activities_version_update AFTER UPDATE ON study_activities
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_activities_version_delete AFTER DELETE ON study_activities
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_groups_version_insert AFTER INSERT ON groups
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_groups_version_update AFTER UPDATE ON groups
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_groups_version_delete AFTER DELETE ON groups
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_vocabulary_version_insert AFTER INSERT ON vocabulary
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'vocabulary';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_vocabulary_version_update AFTER UPDATE ON vocabulary
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'vocabulary';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_vocabulary_version_delete AFTER DELETE ON vocabulary
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'vocabulary';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_reviews_version_insert AFTER INSERT ON word_reviews
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'word_reviews';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_reviews_version_update AFTER UPDATE ON word_reviews
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'word_reviews';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_word_reviews_version_delete AFTER DELETE ON word_reviews
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = 'word_reviews';
+END;
@@ -0,0 +1,2 @@
+-- Pre-rendered pronunciation, served from the audio cache (see lib/prerender.py)
+ALTER TABLE vocabulary ADD COLUMN audio_url TEXT;
@@ -0,0 +1,14 @@
+-- Composite (sort column, id) indexes backing keyset pagination of word and session listings
+CREATE INDEX IF NOT EXISTS idx_words_kanji_id ON words(kanji, id);
+CREATE INDEX IF NOT EXISTS idx_words_romaji_id ON words(romaji, id);
+CREATE INDEX IF NOT EXISTS idx_words_english_id ON words(english, id);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_created_at_id ON study_sessions(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_activity_created_at_id ON study_sessions(study_activity_id, created_at, id);
+
+-- Foreign keys joined on by the dashboard, group and session queries
+CREATE INDEX IF NOT EXISTS idx_word_groups_group_word ON word_groups(group_id, word_id);
+CREATE INDEX IF NOT EXISTS idx_word_groups_word_id ON word_groups(word_id);
+CREATE INDEX IF NOT EXISTS idx_word_review_items_word_id ON word_review_items(word_id, correct);
+CREATE INDEX IF NOT EXISTS idx_word_review_items_session_created_at ON word_review_items(study_session_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_word_review_items_created_at ON word_review_items(created_at, correct);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group_created_at ON study_sessions(group_id, created_at);
@@ -4,6 +4,7 @@ CREATE TABLE IF NOT EXISTS word_review_items (
   study_session_id INTEGER NOT NULL,  -- Link to study session
   correct BOOLEAN NOT NULL,  -- Whether the answer was correct (true) or wrong (false)
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP,  -- Timestamp of the review
+  response_time_ms INTEGER,  -- How long the answer took, when the client reports it
   FOREIGN KEY (word_id) REFERENCES vocabulary(id),
   FOREIGN KEY (study_session_id) REFERENCES study_sessions(id)
 );
\ No newline at end of file
@@ -1,8 +1,8 @@
 CREATE TABLE IF NOT EXISTS word_reviews (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  word_id INTEGER NOT NULL,
-  correct_count INTEGER DEFAULT 0,
-  wrong_count INTEGER DEFAULT 0,
-  last_reviewed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  word_id INTEGER PRIMARY KEY,
+  correct_count INTEGER NOT NULL DEFAULT 0,
+  wrong_count INTEGER NOT NULL DEFAULT 0,
+  last_reviewed TIMESTAMP,
+  rolling_accuracy REAL,  -- exponentially weighted, recent answers count most
   FOREIGN KEY (word_id) REFERENCES words(id)
 );
\ No newline at end of file
@@ -6,4 +6,66 @@ def init_db(c):
   from flask import Flask
   app = Flask(__name__)
   db.init(app)
-  print("Database initialized successfully.")
\ No newline at end of file
+  print("Database initialized successfully.")
+
+@task(help={
+  'path': 'JSON file: a list of words or {"group_id": ..., "words": [...]}',
+  'group': 'Group name for words without a group_id (created if missing)',
+  'group_id': 'Group id for words without one',
+  'database': 'SQLite database to import into',
+  'batch_size': 'Rows per executemany() batch',
+})
+def import_words(c, path, group=None, group_id=None, database='database.db', batch_size=1000):
+  import sqlite3
+  from lib import importer
+
+  conn = sqlite3.connect(database)
+  try:
+    result = importer.import_file(
+      conn, path,
+      group_name=group,
+      group_id=int(group_id) if group_id is not None else None,
+      batch_size=int(batch_size)
+    )
+  finally:
+    conn.close()
+  print(
+    f"Imported {result['rows']} words ({result['inserted']} new, {result['updated']} updated) "
+    f"in {result['seconds']}s - {result['rows_per_sec']} rows/sec"
+  )
+
+
+@task(help={
+  'database': 'SQLite database whose words get audio',
+  'store_dir': 'Pre-rendered audio directory (the app\'s AUDIO_STORE_DIR)',
+  'workers': 'Concurrent TTS requests',
+  'retries': 'Retries per word before giving up on it',
+  'limit': 'Render at most this many words per table',
+  'verify': 'First re-queue words whose audio file is missing',
+})
+def prerender_audio(c, database='database.db', store_dir='audio_store', workers=4, retries=3, limit=None, verify=False):
+  import os
+  import sqlite3
+  from openai import OpenAI
+  from lib.audio_cache import AudioCache
+  from lib.prerender import prerender
+  from lib.tts import OpenAITTS
+
+  tts = OpenAITTS(OpenAI(api_key=os.getenv('OPENAI_API_KEY')))
+  conn = sqlite3.connect(database)
+  try:
+    result = prerender(
+      conn, tts, AudioCache(store_dir, max_bytes=None),
+      workers=int(workers),
+      retries=int(retries),
+      limit=int(limit) if limit else None,
+      verify=verify
+    )
+  finally:
+    conn.close()
+  print(
+    f"Rendered {result['rendered']} pronunciations, {result['cached']} already cached, "
+    f"{result['failed']} failed in {result['seconds']}s"
+  )
+  for error in result['errors']:
+    print(f"  {error}")
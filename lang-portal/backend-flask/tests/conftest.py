@@ -2,6 +2,9 @@ import pytest
 from app import create_app
 import os
 
+# create_app() builds an OpenAI client eagerly; tests never call the API
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_db():
     """Setup test database before any tests run"""
@@ -15,4 +18,28 @@ def setup_test_db():
     
     # Create Flask app
     app = create_app()
-    return app 
\ No newline at end of file
+    return app 
+
+@pytest.fixture
+def portal_app(tmp_path):
+    """App bound to a freshly migrated, throwaway database.
+
+    Not named `app` on purpose: pytest-flask would then hold a request context
+    open for the whole test and per-request teardown would never run.
+    """
+    from migrate import run_migrations
+    database = str(tmp_path / 'test.db')
+    run_migrations(database)
+
+    app = create_app({
+        'DATABASE': database,
+        'TESTING': True,
+        'AUDIO_CACHE_DIR': str(tmp_path / 'audio_cache'),
+        'AUDIO_STORE_DIR': str(tmp_path / 'audio_store')
+    })
+    yield app
+    app.db.pool.close()
+
+@pytest.fixture
+def client(portal_app):
+    return portal_app.test_client()
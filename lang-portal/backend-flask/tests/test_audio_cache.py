@@ -0,0 +1,111 @@
+import os
+import time
+import threading
+import pytest
+from lib.audio_cache import AudioCache, audio_key
+
+class FakeTTS:
+    model = 'fake-tts'
+
+    def __init__(self):
+        self.calls = []
+
+    def stream(self, text, voice, speed):
+        self.calls.append((text, voice, speed))
+        data = f'{text}|{voice}|{speed}'.encode('utf-8') * 100
+        for i in range(0, len(data), 256):
+            yield data[i:i + 256]
+
+def test_key_covers_every_rendering_parameter():
+    base = audio_key('hola', 'shimmer', 0.9, 'm')
+    assert base == audio_key('hola', 'shimmer', 0.9000001, 'm')
+    assert len({base, audio_key('adiós', 'shimmer', 0.9, 'm'), audio_key('hola', 'nova', 0.9, 'm'),
+                audio_key('hola', 'shimmer', 1.0, 'm'), audio_key('hola', 'shimmer', 0.9, 'n')}) == 5
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = AudioCache(tmp_path, max_bytes=250)
+    for key in ('aa01', 'bb02', 'cc03'):
+        cache.put(key, [b'x' * 100])
+    # 300 bytes > 250: the least recently used file went
+    assert cache.get('aa01') is None
+    assert not cache.path('aa01').exists()
+
+    assert cache.get('bb02') is not None  # bb02 is now the most recent
+    cache.put('dd04', [b'x' * 100])
+    assert cache.get('cc03') is None and cache.get('bb02') is not None
+    assert cache.stats()['evictions'] == 2
+
+    # Use order is rebuilt from mtimes after a restart
+    old = time.time() - 60
+    os.utime(cache.path('dd04'), (old, old))
+    restarted = AudioCache(tmp_path, max_bytes=250)
+    restarted.put('ee05', [b'x' * 100])
+    assert restarted.get('dd04') is None and restarted.get('bb02') is not None
+
+def test_failed_render_leaves_nothing_behind(tmp_path):
+    cache = AudioCache(tmp_path)
+
+    def broken():
+        yield b'partial'
+        raise RuntimeError('TTS unavailable')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_render('ab12', broken)
+    assert list(tmp_path.rglob('*')) == [tmp_path / 'ab']
+    assert cache.stats()['render_errors'] == 1
+
+def test_concurrent_misses_render_once(tmp_path):
+    cache = AudioCache(tmp_path)
+    renders = []
+    started = threading.Event()
+
+    def slow():
+        renders.append(1)
+        started.wait(1)
+        yield b'audio'
+
+    threads = [threading.Thread(target=cache.get_or_render, args=('cd34', slow)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    started.set()
+    for thread in threads:
+        thread.join()
+    assert len(renders) == 1
+
+def test_open_file_survives_eviction(tmp_path):
+    cache = AudioCache(tmp_path, max_bytes=150)
+    cache.put('aa01', [b'a' * 100])
+    f = cache.open('aa01')
+    cache.put('bb02', [b'b' * 100])  # evicts aa01 while it is open
+    assert not cache.path('aa01').exists()
+    with f:
+        assert f.read() == b'a' * 100
+
+def test_vanished_file_is_rendered_again(tmp_path):
+    cache = AudioCache(tmp_path)
+    cache.put('cc03', [b'old'])
+    cache.path('cc03').unlink()
+    f, hit = cache.open_or_render('cc03', lambda: [b'new'])
+    with f:
+        assert (f.read(), hit) == (b'new', False)
+
+def test_tts_endpoint_serves_hits_from_disk(portal_app, client):
+    portal_app.tts = FakeTTS()
+    first = client.post('/api/tts', json={'text': ' hola '})
+    assert first.status_code == 200
+    assert first.headers['X-Audio-Cache'] == 'miss'
+    assert first.data.startswith(b'hola|shimmer|0.9')
+
+    second = client.post('/api/tts', json={'text': 'hola'})
+    assert second.headers['X-Audio-Cache'] == 'hit'
+    assert second.data == first.data
+    assert len(portal_app.tts.calls) == 1
+
+    # GET with Range / If-None-Match for <audio> elements
+    partial = client.get('/api/tts?text=hola', headers={'Range': 'bytes=0-3'})
+    assert partial.status_code == 206 and partial.data == b'hola'
+    etag = partial.headers['ETag']
+    assert client.get('/api/tts?text=hola', headers={'If-None-Match': etag}).status_code == 304
+
+    assert client.post('/api/tts', json={'text': 'hola', 'speed': 9}).status_code == 400
+    assert client.post('/api/tts', json={}).status_code == 400
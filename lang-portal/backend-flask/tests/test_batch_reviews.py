@@ -0,0 +1,65 @@
+import sqlite3
+import pytest
+
+@pytest.fixture
+def words(portal_app):
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    conn.executemany("INSERT INTO vocabulary (spanish, english, type, group_id) VALUES (?, ?, 'verb', 1)",
+                     [('ser', 'to be'), ('tener', 'to have')])
+    conn.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)")
+    conn.commit()
+    ids = [row[0] for row in conn.execute("SELECT id FROM vocabulary ORDER BY id")]
+    conn.close()
+    return ids
+
+def test_batch_is_written_in_one_go(portal_app, client, words):
+    ser, tener = words
+    response = client.post('/api/study-sessions/1/reviews', json=[
+        {'word_id': ser, 'correct': True, 'answered_at': '2024-05-01T10:00:02Z', 'response_time_ms': 1200},
+        {'word_id': tener, 'correct': False, 'answered_at': '2024-05-01T10:00:05+00:00', 'response_time_ms': 3400},
+        {'word_id': ser, 'correct': False, 'answered_at': '2024-05-01T10:00:01Z'},
+        {'word_id': 99999, 'correct': True},
+        {'word_id': ser, 'correct': True, 'response_time_ms': -5},
+    ])
+    assert response.status_code == 201
+    body = response.get_json()
+    assert (body['recorded'], body['rejected']) == (3, 2)
+    assert [item['status'] for item in body['items']] == ['recorded'] * 3 + ['rejected'] * 2
+    assert body['items'][3]['error'] == 'Unknown word_id'
+    assert body['items'][0]['due_at'] == '2024-05-02 10:00:02'
+
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    rows = conn.execute(
+        'SELECT word_id, correct, created_at, response_time_ms FROM word_review_items ORDER BY created_at').fetchall()
+    assert rows == [
+        (ser, 0, '2024-05-01 10:00:01', None),
+        (ser, 1, '2024-05-01 10:00:02', 1200),
+        (tener, 0, '2024-05-01 10:00:05', 3400),
+    ]
+    stats = dict(conn.execute('SELECT word_id, correct_count FROM word_reviews').fetchall())
+    assert stats == {ser: 1, tener: 0}
+    # The wrong answer came first, so ser's schedule ends on the correct one
+    assert conn.execute('SELECT repetitions, lapses FROM word_schedule WHERE word_id = ?', (ser,)).fetchone() == (1, 1)
+    conn.close()
+
+def test_batch_rejections(client, words):
+    assert client.post('/api/study-sessions/1/reviews', json=[]).status_code == 400
+    assert client.post('/api/study-sessions/999/reviews', json=[{'word_id': words[0], 'correct': True}]).status_code == 404
+    assert client.post('/api/study-sessions/1/reviews', json=[{'word_id': words[0], 'correct': True}] * 501).status_code == 413
+
+    response = client.post('/api/study-sessions/1/reviews', json={'reviews': [{'word_id': words[0], 'correct': 'yes'}]})
+    assert response.status_code == 400
+    assert response.get_json()['items'][0]['error'] == 'correct must be a boolean'
+
+def test_bad_fields_reject_only_their_item(client, words):
+    response = client.post('/api/study-sessions/1/reviews', json=[
+        {'word_id': words[0], 'correct': True, 'quality': 'abc'},
+        {'word_id': words[0], 'correct': True, 'quality': 7},
+        {'word_id': words[0], 'correct': True, 'response_time_ms': True},
+        {'word_id': words[1], 'correct': True, 'quality': 4},
+    ])
+    assert response.status_code == 201
+    body = response.get_json()
+    assert [item['status'] for item in body['items']] == ['rejected'] * 3 + ['recorded']
+    assert body['items'][0]['error'] == 'quality must be an integer from 0 to 5'
+    assert body['items'][2]['error'] == 'response_time_ms must be a non-negative integer'
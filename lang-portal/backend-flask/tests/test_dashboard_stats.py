@@ -0,0 +1,53 @@
+import sqlite3
+import pytest
+
+@pytest.fixture
+def seeded(portal_app, client):
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    conn.execute("INSERT INTO groups (id, name) VALUES (2, 'Frases')")
+    words = []
+    for i in range(6):
+        cursor = conn.execute('''
+            INSERT INTO vocabulary (spanish, english, type, group_id) VALUES (?, ?, 'noun', ?)
+        ''', (f'palabra{i}', f'word{i}', 1 + i % 2))
+        words.append(cursor.lastrowid)
+    conn.execute("INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (1, 1, datetime('now', '-1 day'))")
+    conn.execute("INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (2, 1, datetime('now'))")
+    conn.commit()
+    conn.close()
+
+    # word 0 mastered, word 1 struggling, word 2 half right
+    answers = [(words[0], True)] * 5 + [(words[1], False)] * 3 + [(words[1], True)] + \
+              [(words[2], True), (words[2], False), (words[2], True), (words[2], False)]
+    for word_id, correct in answers:
+        client.post('/api/session-words', json={'session_id': 1, 'word_id': word_id, 'correct': correct})
+    return words
+
+def test_dashboard_endpoints_share_one_snapshot(client, seeded):
+    stats = client.get('/api/dashboard/stats')
+    assert stats.headers['Server-Timing'].startswith('stats;dur=')
+    assert stats.get_json() == {
+        'study_sessions': 2,
+        'words_learned': 3,
+        'active_groups': 2,
+        'success_rate': 62.0  # 8 of 13 answers correct
+    }
+
+    study = client.get('/dashboard/stats').get_json()
+    assert study['total_vocabulary'] == 6
+    assert study['mastered_words'] == 1
+    assert study['success_rate'] == pytest.approx(8 / 13)
+    assert study['current_streak'] == 2
+
+    progress = client.get('/api/progress').get_json()
+    assert progress['mastery_levels'] == {'mastered': 1, 'proficient': 0, 'learning': 1, 'needs_practice': 1}
+    assert [g['name'] for g in progress['groups']] == ['Frases', 'Verbos Básicos']
+    assert len(progress['trend']) == 7
+
+    metrics = client.get('/api/metrics').get_json()['dashboard_stats']
+    assert metrics['misses'] == 1 and metrics['hits'] == 2
+
+def test_new_answer_invalidates_snapshot(client, seeded):
+    assert client.get('/api/dashboard/stats').get_json()['words_learned'] == 3
+    client.post('/api/session-words', json={'session_id': 1, 'word_id': seeded[3], 'correct': True})
+    assert client.get('/api/dashboard/stats').get_json()['words_learned'] == 4
@@ -0,0 +1,53 @@
+import threading
+import pytest
+from lib.pool import ConnectionPool, PoolTimeout
+
+def test_connections_are_reused_and_configured(tmp_path):
+    """Checked-in connections are lent out again with WAL enabled"""
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), size=2)
+    conn = pool.checkout()
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+    pool.checkin(conn)
+
+    assert pool.checkout() is conn
+    stats = pool.stats()
+    assert stats['checkouts'] == 2
+    assert stats['open'] == 1
+    pool.close()
+
+def test_checkin_rolls_back_open_transaction(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), size=1)
+    conn = pool.checkout()
+    conn.execute('CREATE TABLE t (x INTEGER)')
+    conn.commit()
+    conn.execute('INSERT INTO t VALUES (1)')
+    pool.checkin(conn)
+
+    conn = pool.checkout()
+    assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+    pool.close()
+
+def test_exhausted_pool_waits_then_times_out(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), size=1, timeout=0.2)
+    conn = pool.checkout()
+
+    # A waiter gets the connection once it is returned
+    threading.Timer(0.05, pool.checkin, args=(conn,)).start()
+    assert pool.checkout() is conn
+    assert pool.stats()['waits'] == 1
+
+    with pytest.raises(PoolTimeout):
+        pool.checkout()
+    assert pool.stats()['timeouts'] == 1
+    pool.close()
+
+def test_requests_share_pooled_connections(client):
+    """Teardown returns the request's connection instead of closing it"""
+    for _ in range(3):
+        assert client.get('/api/study-activities').status_code == 200
+
+    stats = client.get('/api/metrics').get_json()['db_pool']
+    assert stats['checkouts'] == 3
+    assert stats['open'] == 1
+    assert stats['in_use'] == 0
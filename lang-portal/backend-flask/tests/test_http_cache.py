@@ -0,0 +1,77 @@
+import sqlite3
+from lib.http_cache import ResponseCache
+
+def test_lru_limits():
+    cache = ResponseCache(max_entries=2, max_bytes=80, ttl=60)
+    cache.put('a', b'x' * 10, 'text/plain')
+    cache.put('b', b'x' * 10, 'text/plain')
+    assert cache.get('a') is not None  # a is now most recent
+    cache.put('c', b'x' * 10, 'text/plain')
+    assert cache.get('b') is None and cache.get('c') is not None
+
+    # Payloads over an eighth of the byte budget are never kept
+    cache.put('big', b'x' * 11, 'text/plain')
+    assert cache.get('big') is None
+    assert cache.stats()['evictions'] == 1
+
+    expired = ResponseCache(ttl=0)
+    expired.put('a', b'x', 'text/plain')
+    assert expired.get('a') is None
+
+def test_etag_revalidation(portal_app, client):
+    first = client.get('/api/study-activities')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+    assert first.headers['Last-Modified']
+
+    # Same ETag -> 304 without a body
+    again = client.get('/api/study-activities', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+
+    # No validator -> served from the LRU
+    cached = client.get('/api/study-activities')
+    assert cached.data == first.data
+    stats = portal_app.response_cache.stats()
+    assert (stats['hits'], stats['not_modified']) == (1, 1)
+
+    # Any write to the table, even outside the app, changes the ETag
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    conn.execute("INSERT INTO study_activities (name, url) VALUES ('Quiz', 'http://localhost:8081')")
+    conn.commit()
+    conn.close()
+    changed = client.get('/api/study-activities', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert any(activity['name'] == 'Quiz' for activity in changed.get_json())
+
+def test_if_modified_since_alone_is_not_trusted(portal_app, client):
+    first = client.get('/api/groups')
+    assert first.status_code == 200 and first.headers['Last-Modified']
+
+    # A write within the same second leaves Last-Modified unchanged
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    conn.execute("INSERT INTO groups (name) VALUES ('Same second')")
+    conn.commit()
+    conn.close()
+    response = client.get('/api/groups', headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert response.status_code == 200
+    assert any(group['name'] == 'Same second' for group in response.get_json())
+
+def test_errors_are_not_cached(portal_app, client):
+    assert client.get('/api/study-activities/999/launch').status_code == 404
+    assert client.get('/api/study-activities/999/launch').status_code == 404
+    assert portal_app.response_cache.stats()['entries'] == 0
+
+def test_file_backed_payload(portal_app, client, tmp_path, monkeypatch):
+    import routes.song_vocabulary as song_vocabulary
+    lyrics = tmp_path / 'outputs' / 'lyrics'
+    lyrics.mkdir(parents=True)
+    (lyrics / 'song-1.txt').write_text('la la la', encoding='utf-8')
+    monkeypatch.setattr(song_vocabulary, 'lyrics_path', lyrics)
+
+    first = client.get('/api/song-vocabulary/lyrics/song-1')
+    assert first.data == b'la la la'
+    assert client.get('/api/song-vocabulary/lyrics/song-1',
+                      headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert client.get('/api/song-vocabulary/lyrics/missing').status_code == 404
@@ -0,0 +1,96 @@
+import io
+import json
+import sqlite3
+import pytest
+from lib import importer
+
+WORDS = [
+    {'spanish': 'año', 'english': 'year', 'type': 'noun', 'gender': 'masculine'},
+    {'spanish': 'mañana', 'english': 'tomorrow', 'type': 'adverb'},
+    {'spanish': 'pequeño', 'english': 'small', 'type': 'adjective', 'notes': None},
+]
+
+def test_stream_parser_handles_values_split_across_reads(monkeypatch):
+    # Tiny reads split strings, numbers and multi-byte characters mid-value
+    monkeypatch.setattr(importer, 'READ_SIZE', 3)
+    document = json.dumps({'group_id': 12345, 'words': WORDS}, ensure_ascii=False).encode('utf-8')
+    words = list(importer.iter_words(io.BytesIO(document)))
+    assert [w['spanish'] for w in words] == ['año', 'mañana', 'pequeño']
+    assert all(w['group_id'] == 12345 for w in words)
+
+    words = list(importer.iter_words(io.StringIO(json.dumps(WORDS))))
+    assert words == WORDS
+    assert list(importer.iter_words(io.StringIO('[]'))) == []
+
+@pytest.mark.parametrize('document', ['[{"spanish": "a"', '{"words": [1]}', '"words"'])
+def test_stream_parser_rejects_bad_input(document):
+    with pytest.raises(importer.InvalidWordFile):
+        list(importer.iter_words(io.StringIO(document)))
+
+def test_reimport_is_idempotent(portal_app):
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    before = conn.execute('SELECT COUNT(*) FROM vocabulary').fetchone()[0]
+
+    result = importer.import_words(conn, io.StringIO(json.dumps(WORDS)), group_name='Import', batch_size=2)
+    assert (result['rows'], result['inserted'], result['updated']) == (3, 3, 0)
+    assert result['rows_per_sec'] > 0
+
+    changed = [dict(WORDS[0], english='a year')] + WORDS[1:]
+    result = importer.import_words(conn, io.StringIO(json.dumps(changed)), group_name='Import')
+    assert (result['rows'], result['inserted'], result['updated']) == (3, 0, 3)
+
+    assert conn.execute('SELECT COUNT(*) FROM vocabulary').fetchone()[0] == before + 3
+    row = conn.execute(
+        "SELECT v.english, v.gender, g.words_count FROM vocabulary v JOIN groups g ON g.id = v.group_id "
+        "WHERE g.name = 'Import' AND v.spanish = 'año'").fetchone()
+    assert row == ('a year', 'masculine', 3)
+    conn.close()
+
+def test_failed_import_rolls_back(portal_app):
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    before = conn.execute('SELECT COUNT(*) FROM vocabulary').fetchone()[0]
+    bad = WORDS + [{'spanish': 'sin traducción'}]
+    with pytest.raises(importer.InvalidWordFile):
+        importer.import_words(conn, io.StringIO(json.dumps(bad)), group_id=1, batch_size=1)
+    with pytest.raises(importer.InvalidWordFile):
+        importer.import_words(conn, io.StringIO(json.dumps(WORDS)), group_id=999)
+    assert conn.execute('SELECT COUNT(*) FROM vocabulary').fetchone()[0] == before
+    conn.close()
+
+ADMIN = {'X-Admin-Token': 'secret'}
+
+@pytest.fixture
+def admin_app(portal_app):
+    portal_app.config['ADMIN_TOKEN'] = 'secret'
+    return portal_app
+
+def test_import_endpoint(admin_app, client):
+    body = json.dumps({'words': WORDS}, ensure_ascii=False).encode('utf-8')
+    response = client.post('/api/import/words?group=Import', data=body, content_type='application/json',
+                           headers=ADMIN)
+    assert response.status_code == 200
+    assert response.get_json()['inserted'] == 3
+
+    response = client.post('/api/import/words', data=body, content_type='application/json', headers=ADMIN)
+    assert response.status_code == 400
+
+    response = client.post('/api/import/words?group=Import', data=body, content_type='application/json')
+    assert response.status_code == 403
+    response = client.post('/api/import/words?group=Import', data=body, content_type='application/json',
+                           headers={'X-Admin-Token': 'wrong'})
+    assert response.status_code == 403
+    response = client.post('/api/import/words?group=Import', data=body, content_type='application/json',
+                           headers=ADMIN)
+    assert response.get_json()['updated'] == 3
+
+def test_import_endpoint_closed_without_token(portal_app, client):
+    body = json.dumps({'words': WORDS}, ensure_ascii=False).encode('utf-8')
+    response = client.post('/api/import/words?group=Import', data=body, content_type='application/json',
+                           headers={'X-Admin-Token': ''})
+    assert response.status_code == 403
+
+def test_import_refreshes_group_word_count(admin_app, client):
+    body = json.dumps({'words': WORDS}, ensure_ascii=False).encode('utf-8')
+    admin_app.count_cache.get(('group_words', 1), ('word_groups', 'vocabulary'), lambda: 0)
+    client.post('/api/import/words?group_id=1', data=body, content_type='application/json', headers=ADMIN)
+    assert admin_app.count_cache.get(('group_words', 1), ('word_groups', 'vocabulary'), lambda: 3) == 3
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from openai.types.chat import ChatCompletion
+
+from shared.llm_cache import CachingClient, LLMCache
+
+def completion(content, tokens=42):
+    return ChatCompletion.model_validate({
+        'id': 'fake', 'object': 'chat.completion', 'created': 0, 'model': 'fake',
+        'choices': [{'index': 0, 'finish_reason': 'stop',
+                     'message': {'role': 'assistant', 'content': content}}],
+        'usage': {'prompt_tokens': tokens - 2, 'completion_tokens': 2, 'total_tokens': tokens},
+    })
+
+class FakeClient:
+    """Answers with a numbered reply, so a cached answer is told apart from a new one."""
+
+    def __init__(self):
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **params):
+        self.calls.append(params)
+        return completion(f'answer {len(self.calls)}')
+
+class FakeAsyncClient(FakeClient):
+    async def create(self, **params):
+        return super().create(**params)
+
+def ask(client, text='hola', **params):
+    params = {'temperature': 0, **params}
+    response = client.chat.completions.create(model='gpt-test', messages=[{'role': 'user', 'content': text}],
+                                              **params)
+    return response.choices[0].message.content
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMCache(tmp_path / 'llm.db')
+
+def test_repeated_request_is_served_from_disk(cache, tmp_path):
+    fake = FakeClient()
+    client = CachingClient(fake, cache, 'feedback')
+    assert ask(client) == ask(client) == 'answer 1'
+    assert len(fake.calls) == 1
+    # Another process reading the same file
+    other = CachingClient(FakeClient(), LLMCache(tmp_path / 'llm.db'), 'feedback')
+    assert ask(other) == 'answer 1'
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['saved_tokens'], stats['hit_rate']) == (1, 1, 42, 0.5)
+    assert stats['sites']['feedback']['hits'] == 1
+
+def test_key_covers_model_messages_and_params(cache):
+    fake = FakeClient()
+    client = CachingClient(fake, cache, 'feedback')
+    ask(client)
+    ask(client, 'adiós')
+    ask(client, max_tokens=10)
+    client.chat.completions.create(model='gpt-other', messages=[{'role': 'user', 'content': 'hola'}], temperature=0)
+    assert len(fake.calls) == 4
+    # Parameters that don't shape the answer share the entry
+    ask(client, timeout=5)
+    assert len(fake.calls) == 4
+
+def test_sampled_requests_are_opt_in(cache):
+    fake = FakeClient()
+    client = CachingClient(fake, cache, 'questions')
+    assert ask(client, temperature=0.7) != ask(client, temperature=0.7)
+    # No temperature means OpenAI's default of 1
+    client.chat.completions.create(model='gpt-test', messages=[])
+    client.chat.completions.create(model='gpt-test', messages=[])
+    assert len(fake.calls) == 4 and cache.stats()['bypassed'] == 4
+
+    sampled = CachingClient(fake, cache, 'agent', sampled=True)
+    assert ask(sampled, temperature=0.2) == ask(sampled, temperature=0.2)
+    assert len(fake.calls) == 5
+
+def test_entries_expire_after_the_site_ttl(cache, monkeypatch):
+    fake = FakeClient()
+    client = CachingClient(fake, cache, 'agent', ttl=60)
+    forever = CachingClient(fake, cache, 'grades')
+    ask(client)
+    ask(forever, 'otra')
+
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    assert ask(client) == 'answer 3'
+    assert ask(forever, 'otra') == 'answer 2'
+    monkeypatch.setattr(time, 'time', lambda: now + 200)
+    assert cache.purge() == 1
+
+def test_forget_last_drops_a_rejected_answer(cache):
+    fake = FakeClient()
+    client = CachingClient(fake, cache, 'extract')
+    ask(client)
+    client.forget_last()
+    assert ask(client) == 'answer 2'
+    assert ask(client) == 'answer 2'
+
+def test_async_client(cache):
+    fake = FakeAsyncClient()
+    client = CachingClient(fake, cache, 'agent')
+
+    async def run():
+        first = await client.chat.completions.create(model='gpt-test', messages=[], temperature=0)
+        second = await client.chat.completions.create(model='gpt-test', messages=[], temperature=0)
+        return first.choices[0].message.content, second.choices[0].message.content
+
+    assert asyncio.run(run()) == ('answer 1', 'answer 1')
+    assert len(fake.calls) == 1
+
+def test_forget_last_with_an_async_client(cache):
+    fake = FakeAsyncClient()
+    client = CachingClient(fake, cache, 'agent')
+
+    async def ask_async():
+        response = await client.chat.completions.create(model='gpt-test', messages=[], temperature=0)
+        return response.choices[0].message.content
+
+    async def run():
+        first = await ask_async()
+        client.forget_last()
+        return first, await ask_async(), await ask_async()
+
+    assert asyncio.run(run()) == ('answer 1', 'answer 2', 'answer 2')
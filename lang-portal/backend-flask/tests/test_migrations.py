@@ -0,0 +1,37 @@
+import sqlite3
+from migrate import create_migrations_table, run_migrations
+
+def migrate_before_natural_key(database):
+    """A database as it was before migration 008."""
+    conn = sqlite3.connect(database)
+    create_migrations_table(conn)
+    for name in ('001_create_tables.sql', '002_create_study_sessions.sql', '003_create_word_review_items.sql',
+                 '004_add_session_status.sql', '005_create_word_reviews.sql', '006_add_pagination_indexes.sql',
+                 '007_add_covering_indexes.sql'):
+        with open(f'sql/migrations/{name}') as f:
+            conn.executescript(f.read())
+        conn.execute('INSERT INTO migrations (migration_name) VALUES (?)', (name,))
+    conn.commit()
+    return conn
+
+def test_natural_key_migration_merges_duplicate_words(tmp_path):
+    database = str(tmp_path / 'old.db')
+    conn = migrate_before_natural_key(database)
+    conn.executemany('INSERT INTO vocabulary (id, spanish, english, type, group_id) VALUES (?, ?, ?, ?, 1)',
+                     [(1, 'hablar', 'to speak', 'verb'), (2, 'hablar', 'to talk', 'verb'),
+                      (3, 'comer', 'to eat', 'verb')])
+    conn.execute('INSERT INTO study_sessions (id, group_id, study_activity_id) VALUES (1, 1, 1)')
+    conn.executemany('INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (?, 1, ?)',
+                     [(1, 1), (2, 0), (2, 1), (3, 1)])
+    conn.execute('INSERT INTO word_reviews (word_id, correct_count, wrong_count) VALUES (1, 1, 0), (2, 1, 1), (3, 1, 0)')
+    conn.commit()
+    conn.close()
+
+    run_migrations(database)
+
+    conn = sqlite3.connect(database)
+    assert conn.execute('SELECT id, spanish FROM vocabulary ORDER BY id').fetchall() == [(1, 'hablar'), (3, 'comer')]
+    assert conn.execute('SELECT word_id, COUNT(*) FROM word_review_items GROUP BY word_id').fetchall() == [(1, 3), (3, 1)]
+    assert conn.execute('SELECT word_id, correct_count, wrong_count FROM word_reviews ORDER BY word_id').fetchall() \
+        == [(1, 2, 1), (3, 1, 0)]
+    conn.close()
@@ -0,0 +1,63 @@
+import sqlite3
+import pytest
+from lib.pagination import CountCache, decode_cursor, encode_cursor
+
+@pytest.fixture
+def sessions(portal_app):
+    """25 sessions, several sharing a created_at so the id tie-break matters"""
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    conn.executemany('''
+        INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (1, 1, ?)
+    ''', [(f'2025-01-{1 + i // 3:02d} 10:00:00',) for i in range(25)])
+    conn.commit()
+    conn.close()
+
+def test_cursor_round_trip():
+    token = encode_cursor('2025-01-01 10:00:00', 7)
+    assert decode_cursor(token) == ('2025-01-01 10:00:00', 7)
+
+def test_keyset_pages_match_offset_pages(client, sessions):
+    offset_ids = []
+    for page in range(1, 4):
+        data = client.get(f'/api/study-sessions?page={page}&per_page=10').get_json()
+        offset_ids += [item['id'] for item in data['items']]
+    assert data['total'] == 25
+
+    keyset_ids = []
+    url = '/api/study-sessions?per_page=10&include_total=false&cursor='
+    while True:
+        data = client.get(url).get_json()
+        assert data['total'] is None
+        keyset_ids += [item['id'] for item in data['items']]
+        if not data['next_cursor']:
+            break
+        url = f"/api/study-sessions?per_page=10&include_total=false&cursor={data['next_cursor']}"
+
+    assert keyset_ids == offset_ids
+    assert len(set(keyset_ids)) == 25
+
+def test_activity_sessions_keyset(client, sessions):
+    first = client.get('/api/study-activities/1/sessions?per_page=20&cursor=').get_json()
+    rest = client.get(f"/api/study-activities/1/sessions?per_page=20&cursor={first['next_cursor']}").get_json()
+    assert len(first['items']) == 20 and len(rest['items']) == 5
+    assert rest['next_cursor'] is None
+
+def test_bad_cursor_is_rejected(client):
+    assert client.get('/api/study-sessions?cursor=not-a-cursor').status_code == 400
+
+def test_cached_total_refreshes_after_new_session(client, sessions):
+    assert client.get('/api/study-sessions').get_json()['total'] == 25
+    client.post('/api/study-sessions', json={'group_id': 1})
+    assert client.get('/api/study-sessions').get_json()['total'] == 26
+
+def test_count_cache_invalidates_any_tagged_table():
+    cache = CountCache(ttl=60)
+    counts = iter(range(10))
+    assert cache.get('words', ('words', 'vocabulary'), lambda: next(counts)) == 0
+    assert cache.get(('group_words', 1), ('word_groups', 'vocabulary'), lambda: next(counts)) == 1
+    assert cache.get('sessions', ('study_sessions',), lambda: next(counts)) == 2
+
+    cache.invalidate('vocabulary')
+    assert cache.get('words', ('words', 'vocabulary'), lambda: next(counts)) == 3
+    assert cache.get(('group_words', 1), ('word_groups', 'vocabulary'), lambda: next(counts)) == 4
+    assert cache.get('sessions', ('study_sessions',), lambda: next(counts)) == 2
@@ -0,0 +1,97 @@
+import sqlite3
+import threading
+import pytest
+from lib import prerender as pipeline
+from lib.audio_cache import AudioCache
+
+class FakeTTS:
+    """Local stand-in for the TTS API: fails each text `failures` times first."""
+    model = 'fake-tts'
+
+    def __init__(self, failures=0, always_fail=()):
+        self.failures = failures
+        self.always_fail = set(always_fail)
+        self.attempts = {}
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def stream(self, text, voice, speed):
+        with self.lock:
+            self.attempts[text] = self.attempts.get(text, 0) + 1
+            attempt = self.attempts[text]
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if text in self.always_fail or attempt <= self.failures:
+                raise ConnectionError('TTS unavailable')
+            yield f'mp3:{text}'.encode('utf-8')
+        finally:
+            with self.lock:
+                self.active -= 1
+
+@pytest.fixture
+def db(portal_app):
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    conn.executemany("INSERT INTO vocabulary (spanish, english, type, group_id) VALUES (?, ?, 'noun', 1)",
+                     [(f'palabra {i}', f'word {i}') for i in range(30)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+def test_renders_missing_audio_with_retries(db, tmp_path):
+    tts = FakeTTS(failures=1, always_fail={'palabra 7'})
+    cache = AudioCache(tmp_path)
+    sleeps = []
+    result = pipeline.prerender(db, tts, cache, workers=3, retries=2, backoff=0.1, sleep=sleeps.append)
+
+    assert (result['rendered'], result['failed']) == (29, 1)
+    assert 'palabra 7' in result['errors'][0]
+    assert tts.attempts['palabra 7'] == 3 and tts.attempts['palabra 0'] == 2
+    assert tts.max_active <= 3
+    # Exponential backoff with jitter between attempts
+    assert all(0.1 <= s <= 0.15 or 0.2 <= s <= 0.3 for s in sleeps)
+
+    rows = dict(db.execute('SELECT spanish, audio_url FROM vocabulary'))
+    assert rows['palabra 7'] is None
+    key = rows['palabra 0'].rsplit('/', 1)[1][:-4]
+    assert cache.path(key).read_bytes() == b'mp3:palabra 0'
+
+    # A second run only retries what is still missing
+    again = pipeline.prerender(db, FakeTTS(), cache, sleep=sleeps.append)
+    assert (again['rendered'], again['cached'], again['failed']) == (1, 0, 0)
+
+def test_verify_requeues_evicted_audio(db, tmp_path):
+    cache = AudioCache(tmp_path)
+    pipeline.prerender(db, FakeTTS(), cache, limit=2)
+    url = db.execute("SELECT audio_url FROM vocabulary WHERE spanish = 'palabra 0'").fetchone()[0]
+    cache.path(url.rsplit('/', 1)[1][:-4]).unlink()
+
+    result = pipeline.prerender(db, FakeTTS(), cache, limit=1, verify=True)
+    assert result['reset'] == 1 and result['rendered'] == 1
+
+def test_background_job_and_audio_route(portal_app, client, db):
+    portal_app.prerender_job.tts = FakeTTS()
+    assert client.post('/api/audio/prerender').status_code == 403  # no ADMIN_TOKEN configured
+    portal_app.config['ADMIN_TOKEN'] = 'secret'
+    assert client.post('/api/audio/prerender').status_code == 403
+    response = client.post('/api/audio/prerender', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 202
+    portal_app.prerender_job.join(10)
+    status = client.get('/api/audio/prerender').get_json()
+    assert (status['state'], status['rendered']) == ('finished', 30)
+
+    url = db.execute("SELECT audio_url FROM vocabulary WHERE spanish = 'palabra 3'").fetchone()[0]
+    audio = client.get(url)
+    assert audio.status_code == 200 and audio.data == b'mp3:palabra 3'
+    assert 'immutable' in audio.headers['Cache-Control']
+    assert client.get('/audio/' + 'f' * 64 + '.mp3').status_code == 404
+    assert client.get('/audio/../app.py.mp3').status_code == 404
+
+    exercises = client.get('/api/listening-practice').get_json()['exercises']
+    assert all(ex['audio_url'].startswith('/audio/') for ex in exercises)
+
+    # A file that went missing is a 404; the row is left for a verify run
+    portal_app.audio_store.path(url.rsplit('/', 1)[1][:-4]).unlink()
+    assert client.get(url).status_code == 404
+    assert db.execute("SELECT audio_url FROM vocabulary WHERE spanish = 'palabra 3'").fetchone()[0] == url
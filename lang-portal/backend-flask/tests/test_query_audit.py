@@ -0,0 +1,49 @@
+import sqlite3
+from lib.query_audit import audit, full_scans
+
+def test_join_columns_use_indexes(portal_app):
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    plans = {
+        sql: [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+        for sql, params in [
+            ('SELECT correct FROM word_review_items WHERE word_id = ?', (1,)),
+            ('SELECT created_at FROM word_review_items WHERE study_session_id = ?', (1,)),
+            ('SELECT created_at FROM study_sessions WHERE group_id = ? ORDER BY created_at', (1,)),
+            ('SELECT id FROM vocabulary WHERE group_id = ?', (1,)),
+        ]
+    }
+    conn.close()
+    for sql, plan in plans.items():
+        assert not full_scans(plan, sql), (sql, plan)
+        assert any('INDEX' in step for step in plan), (sql, plan)
+
+def test_audit_flags_full_scans(tmp_path):
+    database = str(tmp_path / 'audit.db')
+    source = tmp_path / 'route.py'
+    source.write_text(
+        "ORDER = 'name'\n"
+        "cursor.execute('SELECT * FROM t WHERE name = ?', (1,))\n"
+        "cursor.execute(f'SELECT * FROM t ORDER BY {ORDER}')\n"
+        "cursor.execute(query)\n"
+    )
+    conn = sqlite3.connect(database)
+    conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)')
+    conn.execute('CREATE INDEX idx_t_name ON t(name)')
+    conn.commit()
+
+    results = {r['location'].rsplit(':', 1)[1]: r for r in audit(conn, [source])}
+    assert results['2']['full_scans'] == []
+    assert results['3']['sql'] == 'SELECT * FROM t ORDER BY name'
+    assert results['4']['skipped'] == 'dynamic SQL (query)'
+
+    conn.execute('DROP INDEX idx_t_name')
+    conn.commit()
+    conn.close()
+    # A fresh connection, so no cached statement still carries the old plan
+    conn = sqlite3.connect(database)
+    results = {r['location'].rsplit(':', 1)[1]: r for r in audit(conn, [source])}
+    assert results['2']['full_scans'] == ['SCAN t']
+
+def test_cte_scans_are_not_flagged():
+    sql = 'WITH x AS (SELECT 1) SELECT * FROM x'
+    assert full_scans(['SCAN x'], sql) == []
@@ -0,0 +1,62 @@
+import sqlite3
+import pytest
+from lib import review_stats
+
+@pytest.fixture
+def word_ids(portal_app):
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    cursor = conn.cursor()
+    ids = []
+    for spanish, english in [('ser', 'to be'), ('tener', 'to have')]:
+        cursor.execute('''
+            INSERT INTO vocabulary (spanish, english, type, group_id) VALUES (?, ?, 'verb', 1)
+        ''', (spanish, english))
+        ids.append(cursor.lastrowid)
+    cursor.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)")
+    conn.commit()
+    conn.close()
+    return ids
+
+def answer(client, word_id, correct):
+    response = client.post('/api/session-words', json={
+        'session_id': 1, 'word_id': word_id, 'correct': correct
+    })
+    assert response.status_code == 201
+
+def test_answers_update_stats_table(portal_app, client, word_ids):
+    ser, tener = word_ids
+    for correct in [True, True, False]:
+        answer(client, ser, correct)
+    answer(client, tener, False)
+
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    rows = {r[0]: r[1:] for r in conn.execute(
+        'SELECT word_id, correct_count, wrong_count, rolling_accuracy FROM word_reviews')}
+    assert rows[ser][:2] == (2, 1)
+    assert rows[ser][2] == pytest.approx(1.0 + review_stats.ROLLING_ALPHA * (0 - 1.0))
+    assert rows[tener] == (0, 1, 0.0)
+
+    # Rebuilding from the raw history gives the same table
+    review_stats.rebuild(conn)
+    rebuilt = {r[0]: r[1:] for r in conn.execute(
+        'SELECT word_id, correct_count, wrong_count, rolling_accuracy FROM word_reviews')}
+    assert rebuilt.keys() == rows.keys()
+    for word_id in rows:
+        assert rebuilt[word_id][:2] == rows[word_id][:2]
+        assert rebuilt[word_id][2] == pytest.approx(rows[word_id][2])
+    conn.close()
+
+def test_group_endpoint_reads_stats(client, word_ids):
+    ser, tener = word_ids
+    answer(client, ser, True)
+    answer(client, ser, False)
+
+    data = client.get('/api/groups/1').get_json()
+    words = {w['id']: w for w in data['words']}
+    assert (words[ser]['correct'], words[ser]['wrong'], words[ser]['total_attempts']) == (1, 1, 2)
+    assert words[tener]['total_attempts'] == 0
+    assert data['group']['total_words'] == 2
+    assert data['group']['accuracy'] == pytest.approx(25.0)
+
+    progress = client.get('/api/progress').get_json()
+    assert progress['overview']['words_attempted'] == 1
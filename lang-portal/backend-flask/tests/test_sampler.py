@@ -0,0 +1,108 @@
+import random
+import sqlite3
+from collections import Counter
+import pytest
+from lib.sampler import WordSampler, parse_group_weights
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.executescript('''
+        CREATE TABLE vocabulary (id INTEGER PRIMARY KEY, spanish TEXT, english TEXT, group_id INTEGER);
+        CREATE TABLE word_reviews (word_id INTEGER PRIMARY KEY, rolling_accuracy REAL);
+    ''')
+    conn.executemany('INSERT INTO vocabulary VALUES (?, ?, ?, ?)',
+                     [(i, f'palabra {i}', f'word {i}', 1 if i <= 50 else 2) for i in range(1, 101)])
+    # Holes in the id range
+    conn.execute('DELETE FROM vocabulary WHERE id % 10 = 0')
+    return conn
+
+def test_samples_are_distinct_existing_rows(conn):
+    sampler = WordSampler(rng=random.Random(1))
+    rows = sampler.sample(conn, 10)
+    ids = [row[0] for row in rows]
+    assert len(set(ids)) == 10
+    assert all(i % 10 for i in ids)
+    assert rows[0][1] == f'palabra {ids[0]}'
+    assert sampler.stats()['rowid_draws'] == 1
+
+    # More than the table holds: everything, once
+    assert sorted(sampler.sample_ids(conn, 500)) == [i for i in range(1, 101) if i % 10]
+
+def test_unbiased_mode_is_uniform(conn):
+    sampler = WordSampler(rng=random.Random(2))
+    counts = Counter()
+    for _ in range(2000):
+        counts.update(sampler.sample_ids(conn, 5))
+    # 10,000 draws over 90 words: ~111 each
+    assert len(counts) == 90
+    assert min(counts.values()) > 60 and max(counts.values()) < 170
+
+def test_group_filter_and_weights(conn):
+    sampler = WordSampler(rng=random.Random(3))
+    assert all(i <= 50 for i in sampler.sample_ids(conn, 20, group_id=1))
+
+    counts = Counter()
+    for _ in range(500):
+        counts.update(sampler.sample_ids(conn, 1, mode='weighted', group_weights={1: 4.0}))
+    group_1 = sum(n for i, n in counts.items() if i <= 50)
+    assert group_1 > 3 * (500 - group_1)
+
+def test_weak_words_are_drawn_more_often(conn):
+    conn.execute('INSERT INTO word_reviews VALUES (1, 0.0), (2, 1.0)')
+    sampler = WordSampler(rng=random.Random(4))
+    counts = Counter()
+    for _ in range(3000):
+        counts.update(sampler.sample_ids(conn, 1, mode='weighted'))
+    assert counts[1] > 2.5 * counts[2]
+
+def test_session_deck_does_not_repeat(conn):
+    sampler = WordSampler(rng=random.Random(5))
+    dealt = []
+    for _ in range(9):
+        dealt += sampler.sample_ids(conn, 10, session_id=7)
+    assert sorted(dealt) == [i for i in range(1, 101) if i % 10]
+
+    # The next hand starts a new cycle; other sessions have their own deck
+    assert len(set(sampler.sample_ids(conn, 10, session_id=7))) == 10
+    assert len(sampler.sample_ids(conn, 10, session_id=8)) == 10
+
+def test_invalidate_picks_up_new_words(conn):
+    sampler = WordSampler(rng=random.Random(6))
+    assert 200 not in sampler.sample_ids(conn, 100, group_id=2)
+    conn.execute("INSERT INTO vocabulary VALUES (200, 'nuevo', 'new', 2)")
+    sampler.invalidate()
+    assert 200 in sampler.sample_ids(conn, 100, group_id=2)
+
+def test_parse_group_weights():
+    assert parse_group_weights('1:2,3:0.5') == {1: 2.0, 3: 0.5}
+    assert parse_group_weights(None) == {}
+    with pytest.raises(ValueError):
+        parse_group_weights('1=2')
+
+def test_flashcards_endpoint(portal_app, client):
+    db = sqlite3.connect(portal_app.config['DATABASE'])
+    db.executemany("INSERT INTO vocabulary (spanish, english, type, group_id) VALUES (?, ?, 'noun', 1)",
+                   [(f'palabra {i}', f'word {i}') for i in range(5)])
+    db.commit()
+    db.close()
+
+    response = client.get('/api/flashcards?limit=3&mode=weighted&session_id=1')
+    assert response.status_code == 200
+    cards = response.get_json()['cards']
+    assert len(cards) == 3 and len({card['id'] for card in cards}) == 3
+
+    response = client.get('/api/listening-practice?mode=sideways')
+    assert response.status_code == 400
+
+def test_new_word_invalidates_the_sampler(portal_app, client, monkeypatch):
+    # The columns the route writes
+    db = sqlite3.connect(portal_app.config['DATABASE'])
+    db.execute('CREATE TABLE words (id INTEGER PRIMARY KEY, spanish TEXT, english TEXT, group_id INTEGER)')
+    db.close()
+    invalidated = []
+    monkeypatch.setattr(portal_app.word_sampler, 'invalidate', lambda: invalidated.append(True))
+
+    response = client.post('/api/words', json={'spanish': 'nuevo', 'english': 'new', 'group_id': 1})
+    assert response.get_json() == {'success': True}
+    assert invalidated
@@ -0,0 +1,78 @@
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+from lib import scheduler
+
+def test_sm2_intervals():
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    state, due = scheduler.next_state(None, scheduler.CORRECT_QUALITY, start)
+    assert (state[1], state[2], due) == (1, 1, start + timedelta(days=1))
+    state, due = scheduler.next_state(state, scheduler.CORRECT_QUALITY, due)
+    assert state[1] == 6
+    state, due = scheduler.next_state(state, 5, due)
+    assert state[1] == round(6 * state[0]) and state[0] > scheduler.DEFAULT_EASE
+
+    lapsed, due = scheduler.next_state(state, scheduler.WRONG_QUALITY, start)
+    assert lapsed[1:] == (0, 0, 1)
+    assert due == start + scheduler.RELEARN_DELAY
+    assert lapsed[0] < state[0]
+
+    ease = scheduler.DEFAULT_EASE
+    for _ in range(20):
+        (ease, *_), _ = scheduler.next_state((ease, 0, 0, 0), 0, start)
+    assert ease == scheduler.MIN_EASE
+
+@pytest.fixture
+def words(portal_app):
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    conn.executemany("INSERT INTO vocabulary (spanish, english, type, group_id) VALUES (?, ?, 'verb', 1)",
+                     [('ser', 'to be'), ('tener', 'to have'), ('ir', 'to go')])
+    conn.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)")
+    conn.commit()
+    ids = [row[0] for row in conn.execute("SELECT id FROM vocabulary WHERE group_id = 1 ORDER BY id")]
+    conn.close()
+    return ids
+
+def answer(client, word_id, correct):
+    response = client.post('/api/session-words', json={'session_id': 1, 'word_id': word_id, 'correct': correct})
+    assert response.status_code == 201
+    return response.get_json()['due_at']
+
+def test_due_queue(portal_app, client, words):
+    ser, tener, ir = words
+    assert answer(client, ser, True) > answer(client, tener, False)
+
+    due = client.get('/api/groups/1/due?limit=5').get_json()['words']
+    # Nothing is due yet, so only never-reviewed words come back
+    assert [(w['id'], w['new']) for w in due] == [(ir, True)]
+    assert client.get('/api/groups/1/due?include_new=false').get_json()['words'] == []
+
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    conn.execute("UPDATE word_schedule SET due_at = datetime('now', '-1 hour') WHERE word_id = ?", (tener,))
+    conn.execute("UPDATE word_schedule SET due_at = datetime('now', '-2 hours') WHERE word_id = ?", (ser,))
+    conn.commit()
+
+    due = client.get('/api/groups/1/due?limit=2').get_json()['words']
+    assert [(w['id'], w['new']) for w in due] == [(ser, False), (tener, False)]
+
+    plan = ' '.join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT word_id FROM word_schedule WHERE group_id = 1 AND due_at <= ? ORDER BY due_at",
+        ('2030-01-01',)))
+    assert 'idx_word_schedule_group_due' in plan and 'TEMP B-TREE' not in plan
+
+    # Replaying the history reproduces the live schedule
+    live = conn.execute('SELECT word_id, ease, interval_days, repetitions, lapses FROM word_schedule ORDER BY word_id').fetchall()
+    assert scheduler.rebuild(conn) == 2
+    assert conn.execute('SELECT word_id, ease, interval_days, repetitions, lapses FROM word_schedule ORDER BY word_id').fetchall() == live
+    conn.close()
+
+    assert client.get('/api/groups/999/due').status_code == 404
+
+@pytest.mark.parametrize('quality', ['abc', 9, -1, 2.5, True])
+def test_single_answer_rejects_bad_quality(portal_app, client, words, quality):
+    response = client.post('/api/session-words', json={'session_id': 1, 'word_id': words[0], 'correct': True,
+                                                       'quality': quality})
+    assert response.status_code == 400
+    conn = sqlite3.connect(portal_app.config['DATABASE'])
+    assert conn.execute('SELECT COUNT(*) FROM word_review_items').fetchone()[0] == 0
+    conn.close()
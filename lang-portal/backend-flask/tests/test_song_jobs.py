@@ -0,0 +1,218 @@
+import asyncio
+import threading
+import pytest
+import routes.song_vocabulary as song_vocabulary
+from lib.jobs import JobQueue, QueueFull
+from shared.llm_cache import CachingClient
+from song_cache import SingleFlight, SongCache, song_key
+
+class FakeAgent:
+    """Stands in for SongLyricsAgent: saves the files, reports turns, no API calls."""
+
+    def __init__(self, release=None, fail=False):
+        self.release = release
+        self.fail = fail
+        self.runs = 0
+
+    async def process_request(self, message, progress=None):
+        self.runs += 1
+        progress(turn=1, max_turns=15, tool='search_web_serp')
+        if self.release is not None:
+            self.release.wait(5)
+        if self.fail:
+            raise Exception('Reached maximum number of turns without completing the task')
+        song_vocabulary.lyrics_path.mkdir(parents=True, exist_ok=True)
+        song_vocabulary.vocabulary_path.mkdir(parents=True, exist_ok=True)
+        (song_vocabulary.lyrics_path / 'shakira-hips.txt').write_text('La letra', encoding='utf-8')
+        (song_vocabulary.vocabulary_path / 'shakira-hips.json').write_text('[]', encoding='utf-8')
+        return {'song_id': 'shakira-hips'}
+
+@pytest.fixture
+def outputs(monkeypatch, tmp_path):
+    # Requested before `client`, so the app's song cache looks here too
+    monkeypatch.setattr(song_vocabulary, 'lyrics_path', tmp_path / 'lyrics')
+    monkeypatch.setattr(song_vocabulary, 'vocabulary_path', tmp_path / 'vocabulary')
+
+def use_agent(monkeypatch, agent):
+    monkeypatch.setattr(song_vocabulary, 'make_agent', lambda: agent)
+
+def test_job_queue_runs_jobs_and_signals_completion():
+    queue = JobQueue(workers=2, max_finished=2)
+    job = queue.submit(lambda job, x: x * 2, 21)
+    assert job.wait(5)
+    assert (job.state, job.result) == ('succeeded', 42)
+
+    failing = queue.submit(lambda job: 1 / 0)
+    assert failing.wait(5)
+    assert failing.state == 'failed' and 'division' in failing.error
+
+    # Only the most recent finished jobs are kept
+    for _ in range(3):
+        queue.submit(lambda job: None).wait(5)
+    assert queue.get(job.id) is None
+    stats = queue.stats()
+    assert (stats['submitted'], stats['succeeded'], stats['failed']) == (5, 4, 1)
+    queue.shutdown()
+
+def test_job_queue_coalesces_jobs_with_the_same_key():
+    release = threading.Event()
+    queue = JobQueue(workers=2)
+    first = queue.submit(lambda job: release.wait(5) and 'done', key='song')
+    assert queue.submit(lambda job: 'other', key='song') is first
+    release.set()
+    assert first.wait(5) and first.result == 'done'
+    # Once finished, the key starts a new job
+    assert queue.submit(lambda job: 'again', key='song') is not first
+    assert queue.stats()['coalesced'] == 1
+    queue.shutdown()
+
+def test_job_queue_does_not_coalesce_empty_keys():
+    queue = JobQueue(workers=2)
+    release = threading.Event()
+    first = queue.submit(lambda job: release.wait(5), key='')
+    second = queue.submit(lambda job: release.wait(5), key='')
+    assert first is not second and queue.coalesced == 0
+    release.set()
+    assert first.wait(5) and second.wait(5)
+
+def test_job_queue_rejects_when_backlog_is_full():
+    release = threading.Event()
+    queue = JobQueue(workers=1, max_pending=1)
+    queue.submit(lambda job: release.wait(5))
+    # The first job may not have left the queue yet
+    try:
+        queue.submit(lambda job: release.wait(5))
+        queue.submit(lambda job: release.wait(5))
+    except QueueFull:
+        pass
+    else:
+        pytest.fail('QueueFull not raised')
+    assert queue.stats()['rejected'] == 1
+    release.set()
+    queue.shutdown()
+
+def test_search_enqueues_and_reports_progress(outputs, client, monkeypatch):
+    release = threading.Event()
+    use_agent(monkeypatch, FakeAgent(release))
+
+    response = client.post('/api/song-vocabulary/search', json={'message_request': 'Hips by Shakira'})
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['state'] in ('queued', 'running')
+    assert response.headers['Location'] == job['status_url']
+
+    release.set()
+    response = client.get(f"{job['status_url']}?wait=5")
+    assert response.status_code == 200
+    status = response.get_json()
+    assert status['state'] == 'succeeded' and status['song_id'] == 'shakira-hips'
+    assert status['progress']['tool'] == 'search_web_serp'
+
+    assert client.get('/api/song-vocabulary/lyrics/shakira-hips').get_data(as_text=True) == 'La letra'
+    assert client.get('/api/metrics').get_json()['song_jobs']['succeeded'] == 1
+
+def test_search_can_wait_for_the_result(outputs, client, monkeypatch):
+    use_agent(monkeypatch, FakeAgent())
+    response = client.post('/api/song-vocabulary/search?wait=5', json={'message_request': 'Hips by Shakira'})
+    assert response.status_code == 200
+    assert response.get_json()['song_id'] == 'shakira-hips'
+
+def test_failed_search_reports_error(outputs, client, monkeypatch):
+    use_agent(monkeypatch, FakeAgent(fail=True))
+    response = client.post('/api/song-vocabulary/search?wait=5', json={'message_request': 'Unknown song'})
+    assert response.status_code == 500
+    assert 'maximum number of turns' in response.get_json()['error']
+
+def test_wait_seconds_is_bounded():
+    assert song_vocabulary.wait_seconds({'wait': '5'}) == 5
+    assert song_vocabulary.wait_seconds({'wait': '999'}) == song_vocabulary.MAX_WAIT
+    for bad in ('-1', 'abc', 'nan', 'inf', '-inf'):
+        assert song_vocabulary.wait_seconds({'wait': bad}) == 0
+
+def test_unknown_job_and_missing_message(client):
+    assert client.get('/api/song-vocabulary/jobs/nope').status_code == 404
+    assert client.post('/api/song-vocabulary/search', json={}).status_code == 400
+
+def test_song_key_normalizes_requests():
+    assert song_key('Find Spanish lyrics and vocabulary for the song "Despacito by Luis Fonsi"') == 'luis-fonsi-despacito'
+    assert song_key('Luis Fonsi - Despacito') == 'luis-fonsi-despacito'
+    assert song_key('Macarena by Los del Río') == 'los-del-rio-macarena'
+    assert song_key('Find lyrics for Bailando') == 'bailando'
+    assert song_key('???') == ''
+
+def test_single_flight_runs_unparsed_requests_separately():
+    inflight = SingleFlight()
+    runs = []
+
+    async def run():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return len(runs)
+
+    async def both(key):
+        return await asyncio.gather(inflight.run(key, run), inflight.run(key, run))
+
+    assert asyncio.run(both('shakira-hips')) == [1, 1]
+    assert asyncio.run(both('')) == [3, 3]
+    assert inflight.coalesced == 1
+
+def test_song_cache_finds_saved_songs(tmp_path):
+    lyrics, vocabulary = tmp_path / 'lyrics', tmp_path / 'vocabulary'
+    lyrics.mkdir()
+    vocabulary.mkdir()
+    cache = SongCache(lyrics, vocabulary)
+    (lyrics / 'los-del-río-macarena.txt').write_text('Dale a tu cuerpo alegría', encoding='utf-8')
+    # Lyrics without vocabulary are not a complete result
+    assert cache.lookup('Macarena by Los del Rio') is None
+
+    (vocabulary / 'los-del-río-macarena.json').write_text('[]', encoding='utf-8')
+    assert cache.lookup('Macarena by Los del Rio') == 'los-del-río-macarena'
+    assert cache.lookup('Despacito') is None
+
+    # Only a full title after the song's stored artist
+    (lyrics / 'marc-anthony-vivir-mi-vida.txt').write_text('Voy a reír', encoding='utf-8')
+    (vocabulary / 'marc-anthony-vivir-mi-vida.json').write_text('[]', encoding='utf-8')
+    assert cache.lookup('Vivir mi vida') is None  # no artist stored for it yet
+    # Lookups don't teach the cache artists, so hits don't depend on earlier requests
+    assert cache.lookup('Vivir mi vida by Marc Anthony') == 'marc-anthony-vivir-mi-vida'
+    assert cache.lookup('Vivir mi vida') is None
+    cache.remember('Vivir mi vida by Marc Anthony', 'marc-anthony-vivir-mi-vida')
+    cache.remember('Macarena by Los del Rio', 'los-del-río-macarena')
+    assert cache.lookup('Vivir mi vida') == 'marc-anthony-vivir-mi-vida'
+    assert cache.lookup('Find lyrics for Vida') is None
+    # Stored, so a restarted process matches the same way
+    assert SongCache(lyrics, vocabulary).lookup('macarena') == 'los-del-río-macarena'
+
+    # A request the agent resolved to a differently named song is remembered
+    cache.remember('la canción del verano', 'los-del-río-macarena')
+    assert SongCache(lyrics, vocabulary).lookup('La canción del verano') == 'los-del-río-macarena'
+    assert cache.load('los-del-río-macarena')['lyrics'] == 'Dale a tu cuerpo alegría'
+    assert cache.stats()['hits'] == 3
+
+def test_repeat_search_is_served_from_cache(outputs, client, monkeypatch):
+    agent = FakeAgent()
+    use_agent(monkeypatch, agent)
+    response = client.post('/api/song-vocabulary/search?wait=5', json={'message_request': 'Hips by Shakira'})
+    assert response.get_json()['state'] == 'succeeded'
+
+    response = client.post('/api/song-vocabulary/search', json={'message_request': 'shakira - hips'})
+    assert response.status_code == 200
+    assert response.get_json() == {'state': 'succeeded', 'song_id': 'shakira-hips', 'cached': True}
+    assert agent.runs == 1
+
+def test_concurrent_searches_share_one_job(outputs, client, monkeypatch):
+    release = threading.Event()
+    agent = FakeAgent(release)
+    use_agent(monkeypatch, agent)
+    first = client.post('/api/song-vocabulary/search', json={'message_request': 'Hips by Shakira'}).get_json()
+    second = client.post('/api/song-vocabulary/search', json={'message_request': 'Shakira - Hips'}).get_json()
+    assert first['id'] == second['id']
+    release.set()
+    assert client.get(f"{first['status_url']}?wait=5").get_json()['song_id'] == 'shakira-hips'
+    assert agent.runs == 1
+
+def test_portal_agent_turns_are_cached(outputs, monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    agent = song_vocabulary.make_agent()
+    assert isinstance(agent.client, CachingClient)
+    assert (agent.client.site, agent.client.sampled) == ('song-vocab.agent', True)
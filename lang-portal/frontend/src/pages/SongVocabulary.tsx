@@ -48,11 +48,19 @@ export default function SongVocabulary() {
 
       if (!response.ok) {
         const errorData = await response.json();
-        throw new Error(errorData.detail || 'Failed to fetch song data');
+        throw new Error(errorData.error || errorData.detail || 'Failed to fetch song data');
+      }
+
+      // The search runs as a background job; long-poll its status until it finishes
+      let data = await response.json();
+      while (data.state === 'queued' || data.state === 'running') {
+        const jobResponse = await fetch(`http://localhost:5174${data.status_url}?wait=25`);
+        data = await jobResponse.json();
+        if (!jobResponse.ok) {
+          throw new Error(data.error || 'Failed to fetch song data');
+        }
       }
 
-      const data = await response.json();
-      
       if (data.song_id) {
         const [lyricsResponse, vocabularyResponse] = await Promise.all([
           fetch(`http://localhost:5174/api/song-vocabulary/lyrics/${data.song_id}`),
@@ -0,0 +1,226 @@
+import asyncio
+import contextvars
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletion
+
+logger = logging.getLogger(__name__)
+
+# Chat completions cached on disk, shared by every app in the repo.
+#
+# A response is stored under the hash of everything that shapes it: the model,
+# the messages and the other request parameters. Wrap a client in
+# CachingClient and call `client.chat.completions.create(...)` as before; a
+# repeated request is answered from SQLite without reaching OpenAI. Each call
+# site gets its own wrapper, with its own lifetime for entries. Requests that
+# sample (temperature above 0, or unset, which OpenAI treats as 1) ask for a
+# new answer each time, so they are only cached where the call site opts in.
+
+DEFAULT_PATH = Path(__file__).parent / 'llm_cache.db'
+
+# Request parameters that never change the answer
+UNKEYED_PARAMS = {'timeout', 'extra_headers', 'user'}
+
+def request_key(params):
+    """Hash of a chat completion request."""
+    keyed = {name: value for name, value in params.items() if name not in UNKEYED_PARAMS}
+    raw = json.dumps(keyed, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()
+
+def is_sampled(params):
+    return params.get('temperature', 1) != 0 or params.get('n', 1) > 1
+
+class LLMCache:
+    """SQLite table of serialized responses, safe to share between threads and processes."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = Path(path)
+        self._local = threading.local()  # one connection per thread
+        self._lock = threading.Lock()
+        self._sites = {}  # call site -> counters
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                site TEXT NOT NULL,
+                response TEXT NOT NULL,
+                tokens INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL
+            )''')
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """(response JSON, tokens) of a live entry, or None."""
+        row = self._connect().execute(
+            'SELECT response, tokens, expires_at FROM responses WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        response, tokens, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.discard(key)
+            return None
+        return response, tokens
+
+    def put(self, key, site, response, tokens, ttl=None):
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO responses (key, site, response, tokens, created_at, expires_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (key, site, response, tokens, now, now + ttl if ttl else None)
+        )
+        conn.commit()
+
+    def discard(self, key):
+        conn = self._connect()
+        conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+        conn.commit()
+
+    def purge(self):
+        """Delete expired entries; returns how many went."""
+        conn = self._connect()
+        deleted = conn.execute(
+            'DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?', (time.time(),)
+        ).rowcount
+        conn.commit()
+        return deleted
+
+    def record(self, site, outcome, tokens=0):
+        """Count a hit, miss or bypass (a request not eligible for caching) for `site`."""
+        with self._lock:
+            counters = self._sites.setdefault(
+                site, {'hits': 0, 'misses': 0, 'bypassed': 0, 'saved_tokens': 0}
+            )
+            counters[outcome] += 1
+            if outcome == 'hits':
+                counters['saved_tokens'] += tokens
+
+    def stats(self):
+        with self._lock:
+            sites = {site: dict(counters) for site, counters in self._sites.items()}
+        totals = {name: sum(counters[name] for counters in sites.values())
+                  for name in ('hits', 'misses', 'bypassed', 'saved_tokens')}
+        lookups = totals['hits'] + totals['misses']
+        totals['hit_rate'] = round(totals['hits'] / lookups, 3) if lookups else None
+        totals['sites'] = sites
+        return totals
+
+class CachingClient:
+    """
+    OpenAI (or AsyncOpenAI) client whose chat completions go through `cache`.
+
+    `site` names the call site in the metrics; `ttl` is the lifetime of its
+    entries in seconds (None: no expiry). With `sampled`, requests with a
+    temperature above 0 are cached too.
+    """
+
+    def __init__(self, client, cache, site, ttl=None, sampled=False):
+        self.client = client
+        self.cache = cache
+        self.site = site
+        self.ttl = ttl
+        self.sampled = sampled
+        # The key of the response last returned, per thread and per asyncio
+        # task: a threading.local would be shared by every task on the loop
+        self._last = contextvars.ContextVar(f'llm_cache_last_{site}', default=None)
+
+    @property
+    def chat(self):
+        # AsyncOpenAI's create is async under a plain decorator
+        is_async = inspect.iscoroutinefunction(inspect.unwrap(self.client.chat.completions.create))
+        return SimpleNamespace(completions=SimpleNamespace(create=self._acreate if is_async else self._create))
+
+    def __getattr__(self, name):
+        # Everything but chat completions goes straight to the client
+        return getattr(self.client, name)
+
+    def _key(self, params):
+        """Cache key of a request, or None if it isn't cached."""
+        if params.get('stream') or (is_sampled(params) and not self.sampled):
+            return None
+        return request_key(params)
+
+    def _bypass(self):
+        self._last.set(None)
+        self.cache.record(self.site, 'bypassed')
+
+    def _lookup(self, key):
+        entry = self.cache.get(key)
+        if entry is None:
+            self.cache.record(self.site, 'misses')
+            return None
+        response, tokens = entry
+        self.cache.record(self.site, 'hits', tokens)
+        return ChatCompletion.model_validate_json(response)
+
+    def _store(self, key, response):
+        usage = getattr(response, 'usage', None)
+        tokens = usage.total_tokens if usage else 0
+        self.cache.put(key, self.site, response.model_dump_json(), tokens, self.ttl)
+
+    def forget_last(self):
+        """
+        Drop the response last returned on this thread, e.g. when it failed
+        validation, so the same request is sent to the model again next time.
+        """
+        key = self._last.get()
+        if key is not None:
+            self.cache.discard(key)
+            self._last.set(None)
+
+    def _create(self, **params):
+        key = self._key(params)
+        if key is None:
+            self._bypass()
+            return self.client.chat.completions.create(**params)
+        self._last.set(key)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = self.client.chat.completions.create(**params)
+        self._store(key, response)
+        return response
+
+    async def _acreate(self, **params):
+        key = self._key(params)
+        if key is None:
+            self._bypass()
+            return await self.client.chat.completions.create(**params)
+        # Recorded here, not in _lookup, which runs on a worker thread
+        self._last.set(key)
+        # SQLite calls are short, but still kept off the event loop
+        cached = await asyncio.to_thread(self._lookup, key)
+        if cached is not None:
+            return cached
+        response = await self.client.chat.completions.create(**params)
+        await asyncio.to_thread(self._store, key, response)
+        return response
+
+# Shared by every client in the process
+llm_cache = LLMCache(Path(os.getenv('LLM_CACHE_PATH', DEFAULT_PATH)))
+
+def cached_client(client, site, ttl=None, sampled=False):
+    """`client` with its chat completions served from `llm_cache` (see CachingClient)."""
+    return CachingClient(client, llm_cache, site, ttl, sampled)
+
+def llm_cache_stats():
+    """Hits, misses and saved tokens of `llm_cache`."""
+    return llm_cache.stats()
@@ -1,12 +1,17 @@
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
-from typing import Optional
+from typing import List, Optional, Sequence, Tuple
 from pathlib import Path
 import json
 from dotenv import load_dotenv
 
+# Most speech requests in flight at once, across all callers of a generator
+MAX_CONCURRENT_RENDERS = 4
+
 class AudioGenerator:
-    def __init__(self):
+    def __init__(self, max_workers: int = MAX_CONCURRENT_RENDERS):
         """Initialize OpenAI client for TTS"""
         # Get the root .env file path and load it
         root_env_path = Path(__file__).resolve().parent.parent.parent / '.env'
@@ -27,6 +32,10 @@ class AudioGenerator:
         self.audio_dir = frontend_dir / 'static' / 'audio'
         self.audio_dir.mkdir(parents=True, exist_ok=True)
 
+        # Renders run on these threads; the bound keeps a burst of questions
+        # from opening more speech requests than the API allows
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tts')
+
     def generate_audio(self, text: str, filename: str) -> Optional[str]:
         """Generate audio for text using OpenAI TTS"""
         try:
@@ -34,16 +43,15 @@ class AudioGenerator:
             audio_file = self.audio_dir / filename
             print(f"Generating audio for text: {text[:100]}...")  # Debug log
             
-            # Generate audio using OpenAI TTS
-            response = self.client.audio.speech.create(
+            # Generate audio using OpenAI TTS, writing the bytes to disk as
+            # they arrive instead of after the whole file is downloaded
+            with self.client.audio.speech.with_streaming_response.create(
                 model="gpt-4o-mini-tts",  # Using the latest GPT TTS model
                 voice="nova",  # Using Nova voice for Spanish
                 input=text,
                 speed=0.9  # Slightly slower for better comprehension
-            )
-            
-            # Save the audio file
-            response.stream_to_file(str(audio_file))
+            ) as response:
+                self._save_stream(response.iter_bytes(), audio_file)
             print(f"Audio saved to: {audio_file}")
             return str(audio_file)
                 
@@ -51,3 +59,29 @@ class AudioGenerator:
             print(f"Error generating audio: {str(e)}")
             print(f"Error type: {type(e)}")
             return None
+
+    def generate_audio_many(self, segments: Sequence[Tuple[str, str]]) -> List[Optional[str]]:
+        """Generate audio for several (text, filename) segments concurrently.
+
+        Takes as long as the slowest segment rather than the sum of all of
+        them. Returns the path of each segment's file in order, None where
+        rendering failed.
+        """
+        futures = [self._executor.submit(self.generate_audio, text, filename) for text, filename in segments]
+        return [future.result() for future in futures]
+
+    def _save_stream(self, chunks, audio_file: Path):
+        # Written under a temporary name and moved into place, so a failed
+        # download never leaves a truncated file behind
+        fd, tmp = tempfile.mkstemp(dir=self.audio_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp, audio_file)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
@@ -3,12 +3,18 @@ from openai import OpenAI
 from typing import Dict, List, Optional
 from backend.vector_store import QuestionVectorStore
 import time
+import uuid
 from datetime import datetime, timedelta
 import json
 from pathlib import Path
 from backend.audio_generator import AudioGenerator
 from dotenv import load_dotenv
 
+from shared.llm_cache import cached_client
+
+# Lifetime of cached feedback, in seconds
+FEEDBACK_CACHE_TTL = 30 * 24 * 3600
+
 class QuestionGenerator:
     def __init__(self):
         """Initialize OpenAI client"""
@@ -25,6 +31,10 @@ class QuestionGenerator:
             api_key=api_key,
             base_url="https://api.openai.com/v1"  # Explicitly set base URL
         )
+        # Feedback (temperature 0) is cached; new questions are sampled and
+        # always come from the model
+        self.client = cached_client(self.client, "listening-comp.question_generator",
+                                    ttl=FEEDBACK_CACHE_TTL)
         self.model_name = "gpt-4o-2024-08-06"  # Using the specified GPT-4 model
         self.vector_store = QuestionVectorStore()
         
@@ -68,13 +78,13 @@ class QuestionGenerator:
             self.tokens_this_minute = 0
             self.reset_time = datetime.now() + timedelta(minutes=1)
 
-    def _invoke_openai(self, prompt: str) -> Optional[str]:
+    def _invoke_openai(self, prompt: str, temperature: float = 0.7) -> Optional[str]:
         """Invoke OpenAI with the given prompt"""
         try:
             print("\n=== Starting model invocation ===")
             print(f"Model name: {self.model_name}")
             print("Request details:")
-            print(f"- Temperature: 0.7")
+            print(f"- Temperature: {temperature}")
             print(f"- Max tokens: 800")
 
             system_message = """You are a Spanish language education expert specializing in creating listening comprehension exercises. 
@@ -103,7 +113,7 @@ Opciones:
                     {"role": "system", "content": system_message},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.7,
+                temperature=temperature,
                 max_tokens=800
             )
             
@@ -211,19 +221,16 @@ Requirements:
                 print("Parsing response...")
                 parsed = self._parse_question_response(response)
                 
-                # Generate audio for each component
+                # Generate audio for each component, all at once
                 if parsed:
-                    audio_files = {}
-                    for key in ['Introducción', 'Conversación', 'Pregunta']:
-                        if key in parsed:
-                            filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{key.lower()}.mp3"
-                            audio_path = self.audio_generator.generate_audio(
-                                parsed[key],
-                                filename
-                            )
-                            if audio_path:
-                                audio_files[key] = audio_path
-                    
+                    keys = [key for key in ['Introducción', 'Conversación', 'Pregunta'] if key in parsed]
+                    # Unique even when questions are generated side by side
+                    prefix = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+                    audio_paths = self.audio_generator.generate_audio_many(
+                        [(parsed[key], f"{prefix}_{key.lower()}.mp3") for key in keys]
+                    )
+                    audio_files = {key: path for key, path in zip(keys, audio_paths) if path}
+
                     # Add audio paths to the parsed question
                     parsed['audio_files'] = audio_files
                 
@@ -275,7 +282,8 @@ Provide feedback in JSON format with these fields:
 - correct_answer: {correct_answer}
 """
 
-        response = self._invoke_openai(prompt)
+        # The same answer to the same question always gets the same feedback
+        response = self._invoke_openai(prompt, temperature=0)
         if not response:
             # Fallback feedback if OpenAI call fails
             return {
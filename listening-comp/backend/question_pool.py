@@ -0,0 +1,98 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+class QuestionPool:
+    """Ready-to-serve questions per topic, generated ahead of time.
+
+    `generate(topic)` builds one complete question (parsed text and rendered
+    audio) or returns None. Background workers keep `size` questions ready
+    for every topic; taking one starts generating its replacement, so a
+    learner only waits when they outpace the workers.
+    """
+
+    def __init__(self, topics: Iterable[str], generate: Callable[[str], Optional[Dict]],
+                 size: int = 2, workers: int = 2):
+        self.topics = list(topics)
+        self.size = size
+        self._generate = generate
+        self._ready = {topic: deque() for topic in self.topics}
+        self._pending = {topic: 0 for topic in self.topics}
+        self._changed = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='question-pool')
+        self._closed = False
+
+        self.served = 0
+        self.waited = 0  # pops that found the topic empty
+        self.generated = 0
+        self.failures = 0
+
+    def start(self) -> 'QuestionPool':
+        """Begin filling every topic."""
+        for topic in self.topics:
+            self.refill(topic)
+        return self
+
+    def refill(self, topic: str):
+        """Queue enough generations to bring `topic` back up to `size`."""
+        with self._changed:
+            if self._closed:
+                return
+            missing = self.size - len(self._ready[topic]) - self._pending[topic]
+            self._pending[topic] += max(missing, 0)
+        for _ in range(missing):
+            self._executor.submit(self._produce, topic)
+
+    def _produce(self, topic: str):
+        try:
+            question = self._generate(topic)
+        except Exception as e:
+            print(f"Error pre-generating question for {topic}: {str(e)}")
+            question = None
+        with self._changed:
+            self._pending[topic] -= 1
+            if question:
+                self._ready[topic].append(question)
+                self.generated += 1
+            else:
+                # Not retried here, or a failing API would be called in a
+                # loop; the next pop of this topic tries again
+                self.failures += 1
+            self._changed.notify_all()
+
+    def pop(self, topic: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        Take a ready question for `topic`. When none is ready, wait up to
+        `timeout` seconds for the one being generated; None if it doesn't
+        arrive (or failed).
+        """
+        self.refill(topic)
+        with self._changed:
+            if not self._ready[topic]:
+                self.waited += 1
+                self._changed.wait_for(
+                    lambda: self._ready[topic] or not self._pending[topic], timeout=timeout
+                )
+            question = self._ready[topic].popleft() if self._ready[topic] else None
+            if question is not None:
+                self.served += 1
+        self.refill(topic)
+        return question
+
+    def stats(self) -> Dict:
+        with self._changed:
+            return {
+                'ready': {topic: len(questions) for topic, questions in self._ready.items()},
+                'pending': dict(self._pending),
+                'served': self.served,
+                'waited': self.waited,
+                'generated': self.generated,
+                'failures': self.failures,
+            }
+
+    def close(self):
+        """Stop refilling; questions being generated are finished and dropped."""
+        with self._changed:
+            self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -17,6 +17,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Import backend components
 from backend.get_transcript import TranscriptFetcher
 from backend.question_generator import QuestionGenerator
+from backend.question_pool import QuestionPool
 from backend.audio_generator import AudioGenerator
 from backend.vector_store import QuestionVectorStore
 from backend.translation_service import TranslationService
@@ -209,8 +210,18 @@ if 'feedback' not in st.session_state:
     st.session_state.feedback = None
 
 # Practice Section
+TOPICS = ["Shopping", "Travel", "Food", "Culture"]
+# Longest a click waits for a question when its topic has none ready yet
+QUESTION_WAIT = 60
+
+@st.cache_resource
+def get_question_pool():
+    """Questions generated in the background, shared by every session of the app"""
+    generator = QuestionGenerator()
+    return QuestionPool(TOPICS, lambda topic: generator.generate_similar_question(2, topic)).start()
+
 st.markdown("## Generate Practice Questions")
-topic = st.selectbox("Select Topic:", ["Shopping", "Travel", "Food", "Culture"])
+topic = st.selectbox("Select Topic:", TOPICS)
 
 def generate_new_question():
     st.session_state.show_feedback = False
@@ -220,8 +231,8 @@ def generate_new_question():
 if st.button("Generate Question", on_click=generate_new_question):
     try:
         with st.spinner("Generating question..."):
-            generator = QuestionGenerator()
-            question = generator.generate_similar_question(2, topic)
+            # Usually ready already; only a cold start waits for generation
+            question = get_question_pool().pop(topic, timeout=QUESTION_WAIT)
             
             if question:
                 # Store the question in session state
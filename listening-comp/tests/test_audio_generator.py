@@ -0,0 +1,72 @@
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from backend.audio_generator import AudioGenerator
+
+class FakeSpeech:
+    """Streams `text` back in small chunks, taking `delays[text]` seconds."""
+
+    def __init__(self, delays, fail_on=None):
+        self.delays = delays
+        self.fail_on = fail_on
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.with_streaming_response = SimpleNamespace(create=self.create)
+
+    @contextmanager
+    def create(self, model, voice, input, speed):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            yield SimpleNamespace(iter_bytes=lambda: self.chunks(input))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def chunks(self, text):
+        data = text.encode('utf-8') * 50
+        for i in range(0, len(data), 64):
+            time.sleep(self.delays.get(text, 0) / (len(data) / 64))
+            if self.fail_on == text and i > 0:
+                raise ConnectionError('connection reset')
+            yield data[i:i + 64]
+
+@pytest.fixture
+def generator(monkeypatch, tmp_path):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+
+    def make(delays, fail_on=None, max_workers=4):
+        generator = AudioGenerator(max_workers=max_workers)
+        generator.audio_dir = tmp_path
+        generator.client = SimpleNamespace(audio=SimpleNamespace(speech=FakeSpeech(delays, fail_on)))
+        return generator
+    return make
+
+def test_segments_render_concurrently(generator, tmp_path):
+    audio = generator({'intro': 0.2, 'dialogue': 0.4, 'question': 0.2})
+    started = time.monotonic()
+    paths = audio.generate_audio_many([('intro', 'a.mp3'), ('dialogue', 'b.mp3'), ('question', 'c.mp3')])
+    elapsed = time.monotonic() - started
+
+    # As long as the slowest segment, not the 0.8s of all three in a row
+    assert elapsed < 0.7
+    assert audio.client.audio.speech.max_in_flight == 3
+    assert paths == [str(tmp_path / name) for name in ('a.mp3', 'b.mp3', 'c.mp3')]
+    assert (tmp_path / 'b.mp3').read_bytes() == b'dialogue' * 50
+
+def test_renders_are_bounded(generator):
+    audio = generator({str(n): 0.05 for n in range(6)}, max_workers=2)
+    paths = audio.generate_audio_many([(str(n), f'{n}.mp3') for n in range(6)])
+    assert all(paths) and audio.client.audio.speech.max_in_flight == 2
+
+def test_failed_segment_leaves_no_partial_file(generator, tmp_path):
+    audio = generator({}, fail_on='dialogue')
+    paths = audio.generate_audio_many([('intro', 'a.mp3'), ('dialogue', 'b.mp3')])
+    assert paths == [str(tmp_path / 'a.mp3'), None]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['a.mp3']
@@ -0,0 +1,72 @@
+import threading
+import time
+
+from backend.question_pool import QuestionPool
+
+class FakeGenerator:
+    """Numbered questions per topic; `gate` holds generation back until set."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.gate = threading.Event()
+        self.gate.set()
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, topic):
+        self.gate.wait()
+        with self._lock:
+            self.calls.append(topic)
+            number = self.calls.count(topic)
+        if self.fail:
+            raise RuntimeError('rate limited')
+        return {'topic': topic, 'number': number, 'audio_files': {}}
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+def test_every_topic_is_filled_up_front():
+    generate = FakeGenerator()
+    pool = QuestionPool(['Food', 'Travel'], generate, size=2).start()
+    wait_until(lambda: pool.stats()['ready'] == {'Food': 2, 'Travel': 2})
+    assert sorted(generate.calls) == ['Food', 'Food', 'Travel', 'Travel']
+    pool.close()
+
+def test_pop_serves_a_ready_question_and_refills():
+    generate = FakeGenerator()
+    pool = QuestionPool(['Food'], generate, size=2).start()
+    wait_until(lambda: pool.stats()['ready']['Food'] == 2)
+
+    generate.gate.clear()  # the refill can't finish, so this pop must be served from the pool
+    started = time.monotonic()
+    question = pool.pop('Food', timeout=5)
+    assert question['topic'] == 'Food' and time.monotonic() - started < 0.5
+    assert pool.stats()['pending']['Food'] == 1
+
+    generate.gate.set()
+    wait_until(lambda: pool.stats()['ready']['Food'] == 2)
+    stats = pool.stats()
+    assert (stats['served'], stats['waited'], stats['generated']) == (1, 0, 3)
+    pool.close()
+
+def test_empty_topic_waits_for_the_question_in_flight():
+    generate = FakeGenerator()
+    generate.gate.clear()
+    pool = QuestionPool(['Food'], generate, size=1).start()
+    threading.Timer(0.1, generate.gate.set).start()
+    assert pool.pop('Food', timeout=5)['number'] == 1
+    assert pool.stats()['waited'] == 1
+    pool.close()
+
+def test_failures_are_not_retried_in_a_loop():
+    generate = FakeGenerator(fail=True)
+    pool = QuestionPool(['Food'], generate, size=2).start()
+    wait_until(lambda: pool.stats()['failures'] == 2)
+    time.sleep(0.1)
+    assert len(generate.calls) == 2
+
+    assert pool.pop('Food', timeout=5) is None
+    pool.close()
@@ -1,20 +1,24 @@
 # import ollama  # Commented out for OpenAI usage
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 import json
 import logging
 import re
 import asyncio
+import inspect
 from pathlib import Path
 from functools import partial
 from tools.search_web_serp import search_web_serp
 from tools.get_page_content import get_page_content
+from tools.fetch_best_lyrics import fetch_best_lyrics
 from tools.extract_vocabulary import extract_vocabulary
 from tools.generate_song_id import generate_song_id
 from tools.save_results import save_results
+from tools.language_id import drop_english_lines
+from shared.llm_cache import cached_client
 import math
 import os  # Add os import for environment variables
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 # Load environment variables from the song-vocab directory
 env_path = Path(__file__).parent / '.env'
@@ -23,6 +27,9 @@ load_dotenv(dotenv_path=env_path)
 # Get the app's root logger
 logger = logging.getLogger('song_vocab')
 
+# Lifetime of cached agent turns, in seconds (one day, like fetched pages)
+TURN_CACHE_TTL = 24 * 3600
+
 class ToolRegistry:
     def __init__(self, lyrics_path: Path, vocabulary_path: Path):
         self.lyrics_path = lyrics_path
@@ -85,16 +92,24 @@ class SongLyricsAgent:
         self.tools = {
             'search_web_serp': search_web_serp,
             'get_page_content': get_page_content,
+            'fetch_best_lyrics': fetch_best_lyrics,
             'extract_vocabulary': extract_vocabulary,
             'generate_song_id': generate_song_id,
             'save_results': partial(save_results, lyrics_path=lyrics_path, vocabulary_path=vocabulary_path)
         }
+        self.search_results = []
+        self.search_query = ""
         
         # Get API key from environment
         api_key = os.getenv("OPENAI_API_KEY")
         
-        # Initialize OpenAI client with the API key
-        self.client = OpenAI(api_key=api_key)
+        # Initialize OpenAI client with the API key; async so a run never
+        # blocks the event loop it shares with other requests. Turns are
+        # cached as long as fetched pages are: a repeated search replays the
+        # same conversation, and at this low temperature a replayed turn is
+        # as good as a new one
+        self.client = cached_client(AsyncOpenAI(api_key=api_key), "song-vocab.agent",
+                                    ttl=TURN_CACHE_TTL, sampled=True)
         
         # Load the agent prompt
         prompt_path = Path(__file__).parent / "prompts" / "Lyrics-Angent.md"
@@ -108,15 +123,12 @@ class SongLyricsAgent:
         
         tool = self.tools[tool_name]
         
-        # Call the tool without await
-        result = tool(**tool_args)
-        
-        # If the result is a coroutine, await it
-        if asyncio.iscoroutine(result):
-            logger.warning(f"Tool {tool_name} returned a coroutine. This is unexpected.")
-            result = await result
+        if inspect.iscoroutinefunction(tool):
+            return await tool(**tool_args)
         
-        return result
+        # Blocking tools (the SERP SDK, vocabulary extraction, file writes)
+        # run on a worker thread so other requests keep being served
+        return await asyncio.to_thread(tool, **tool_args)
     
     def parse_tool_call(self, text: str) -> Optional[tuple]:
         """Parse a tool call from the text."""
@@ -190,9 +202,15 @@ class SongLyricsAgent:
         
         return (tool_name, args)
     
-    async def process_request(self, message: str, max_turns: int = 15) -> Dict[str, Any]:
-        """Process a request to find lyrics and extract vocabulary."""
+    async def process_request(self, message: str, max_turns: int = 15,
+                              progress: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+        """Process a request to find lyrics and extract vocabulary.
+
+        If given, `progress` is called with keyword arguments (turn, max_turns,
+        tool) as the agent works, so callers can report how far it got.
+        """
         logger.info(f"Processing request: {message}")
+        report = progress or (lambda **kwargs: None)
         
         # Initialize conversation with system prompt and user message
         conversation = [
@@ -204,9 +222,10 @@ class SongLyricsAgent:
         while current_turn < max_turns:
             try:
                 logger.info(f"Turn {current_turn + 1}/{max_turns}")
+                report(turn=current_turn + 1, max_turns=max_turns, tool=None)
                 
                 # Get response from OpenAI with explicit model name
-                response = self.client.chat.completions.create(
+                response = await self.client.chat.completions.create(
                     model="gpt-4o-2024-08-06",  # Hardcoded model name
                     messages=conversation,
                     temperature=0.2
@@ -260,23 +279,34 @@ class SongLyricsAgent:
                 
                 # Execute the tool
                 tool_name, tool_args = action
+                if tool_name == "fetch_best_lyrics":
+                    # The results can't be passed through the text tool call,
+                    # so hand over the ones from the last search
+                    if not isinstance(tool_args.get("results"), list):
+                        tool_args["results"] = self.search_results
+                    tool_args.setdefault("query", self.search_query)
+                # Save the stored lyrics rather than a truncated copy; swapped
+                # in before running save_results, which may extract vocabulary
+                # from them, so it only runs once
+                if tool_name == "save_results" and getattr(self, "spanish_lyrics", ""):
+                    if not tool_args.get("lyrics") or len(tool_args.get("lyrics", "")) < len(self.spanish_lyrics):
+                        logger.info(f"Using stored lyrics instead of truncated ones")
+                        tool_args["lyrics"] = self.spanish_lyrics
                 logger.info(f"Executing tool: {tool_name}")
+                report(tool=tool_name)
                 logger.info(f"Arguments: {tool_args}")
                 result = await self.execute_tool(tool_name, tool_args)
                 logger.info(f"Tool execution complete")
                 
-                # If this is get_page_content and we have lyrics, store them for later use
-                if tool_name == "get_page_content" and result.get("success", False):
+                if tool_name == "search_web_serp":
+                    self.search_results = result
+                    self.search_query = tool_args.get("query", "")
+
+                # If this is a page fetch and we have lyrics, store them for later use
+                if tool_name in ("get_page_content", "fetch_best_lyrics") and result.get("success", False):
                     self.spanish_lyrics = result.get("spanish_lyrics", "")
                     logger.info(f"Stored Spanish lyrics: {len(self.spanish_lyrics)} chars")
 
-                # If this is save_results and we have stored lyrics, use them
-                if tool_name == "save_results" and hasattr(self, "spanish_lyrics") and self.spanish_lyrics:
-                    if not tool_args.get("lyrics") or len(tool_args.get("lyrics", "")) < len(self.spanish_lyrics):
-                        logger.info(f"Using stored lyrics instead of truncated ones")
-                        tool_args["lyrics"] = self.spanish_lyrics
-                        result = await self.execute_tool(tool_name, tool_args)
-                
                 # Add the interaction to conversation
                 conversation.append({"role": "assistant", "content": assistant_message})
                 conversation.append({"role": "user", "content": f"Tool {tool_name} result: {json.dumps(result)}"})
@@ -320,6 +350,9 @@ class SongLyricsAgent:
         for pattern in patterns_to_remove:
             lyrics = re.sub(pattern, '', lyrics, flags=re.DOTALL | re.IGNORECASE)
         
+        # Drop translation lines interleaved with the Spanish ones
+        lyrics = drop_english_lines(lyrics)
+        
         # Split into verses and process each
         verses = re.split(r'\n\s*\n', lyrics)
         formatted_verses = []
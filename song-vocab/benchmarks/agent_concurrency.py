@@ -0,0 +1,196 @@
+"""Drive simultaneous /api/agent requests against local stub servers.
+
+The stubs stand in for the OpenAI API, SerpApi and a lyrics site, each
+answering after a fixed latency, so the numbers show how well requests overlap
+rather than how fast the real services are. With a non-blocking agent, N
+concurrent requests take about as long as one; if anything blocks the event
+loop they queue up behind each other.
+
+    python -m benchmarks.agent_concurrency                  # 1, 4 and 16 requests
+    python -m benchmarks.agent_concurrency --requests 8 32 --latency 0.2
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+SONG_VOCAB = Path(__file__).resolve().parent.parent
+
+LYRICS_PAGE = '''<html><head><title>{title} - Letra</title></head><body>
+<h1>{title}</h1>
+<div class="letra">
+Bailando en la noche, contigo en la ciudad
+Tu cuerpo y el mío llenando el vacío
+Subiendo y bajando, con la luna y el mar
+Yo quiero estar contigo, vivir contigo, bailar contigo
+</div></body></html>'''
+
+VOCABULARY = [
+    {'spanish': spanish, 'pronunciation': '', 'english': english, 'type': type, 'lemma': lemma}
+    for spanish, english, type, lemma in [
+        ('bailando', 'dancing', 'verb', 'bailar'),
+        ('noche', 'night', 'noun', 'noche'),
+        ('ciudad', 'city', 'noun', 'ciudad'),
+        ('cuerpo', 'body', 'noun', 'cuerpo'),
+        ('luna', 'moon', 'noun', 'luna'),
+    ]
+]
+
+def slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+class StubServers:
+    """OpenAI, SerpApi and a lyrics site on one local port, in their own thread
+    and event loop, so a blocked client can't slow the stubs down too."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = {'llm': 0, 'serp': 0, 'page': 0}
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.url = None
+
+    async def chat(self, request):
+        self.calls['llm'] += 1
+        await asyncio.sleep(self.latency)
+        body = await request.json()
+        if body.get('tools'):
+            # Vocabulary extraction, answered through the structured-output tool
+            message = {'role': 'assistant', 'content': None, 'tool_calls': [{
+                'id': 'stub', 'type': 'function', 'function': {
+                    'name': body['tools'][0]['function']['name'],
+                    'arguments': json.dumps({'vocabulary': VOCABULARY}),
+                }}]}
+        else:
+            message = {'role': 'assistant', 'content': self.agent_turn(body['messages'])}
+        return web.json_response({
+            'id': 'stub', 'object': 'chat.completion', 'created': 0, 'model': 'stub',
+            'choices': [{'index': 0, 'finish_reason': 'stop', 'message': message}],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        })
+
+    def agent_turn(self, messages):
+        # Scripted run: search, fetch the candidate pages, save, finish
+        song = re.search(r'"([^"]+)"', messages[1]['content']).group(1)
+        song_id = slug(song)
+        turn = sum(1 for m in messages if m['role'] == 'assistant')
+        if turn == 0:
+            return f'Tool: search_web_serp(query="{song}")'
+        if turn == 1:
+            return 'Tool: fetch_best_lyrics()'
+        if turn == 2:
+            return f'Tool: save_results(song_id="{song_id}", lyrics="Bailando en la noche", vocabulary=[])'
+        return f'FINISHED song_id: "{song_id}"'
+
+    async def serp(self, request):
+        self.calls['serp'] += 1
+        await asyncio.sleep(self.latency)
+        query = request.query['q']
+        return web.json_response({'organic_results': [
+            {'title': query, 'link': f'{self.url}/letra/{slug(query)}-{n}', 'snippet': 'Letra'}
+            for n in range(3)
+        ]})
+
+    async def page(self, request):
+        self.calls['page'] += 1
+        await asyncio.sleep(self.latency)
+        title = request.match_info['song'].replace('-', ' ').title()
+        return web.Response(text=LYRICS_PAGE.format(title=title), content_type='text/html')
+
+    def start(self):
+        threading.Thread(target=self._serve, name='stub-servers', daemon=True).start()
+        self.ready.wait()
+        return self
+
+    def _serve(self):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_post('/v1/chat/completions', self.chat)
+        app.router.add_get('/search', self.serp)
+        app.router.add_get('/letra/{song}', self.page)
+        runner = web.AppRunner(app, access_log=None)
+        self.loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        self.loop.run_until_complete(site.start())
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}'
+        self.ready.set()
+        self.loop.run_forever()
+
+def load_app(stubs):
+    """Import main.py with every outside service pointed at the stubs."""
+    os.environ['OPENAI_API_KEY'] = 'benchmark'
+    os.environ['OPENAI_BASE_URL'] = f'{stubs.url}/v1'
+    os.environ['SERP_API_KEY'] = 'benchmark'
+    os.environ['PAGE_CACHE_DIR'] = str(Path.cwd() / 'http_cache')
+    os.environ['VOCABULARY_CACHE_DIR'] = str(Path.cwd() / 'vocabulary_chunks')
+    os.environ['LLM_CACHE_PATH'] = str(Path.cwd() / 'llm_cache.db')
+    from serpapi import GoogleSearch
+    GoogleSearch.BACKEND = stubs.url
+
+    sys.path.insert(0, str(SONG_VOCAB))
+    import main
+    logging.getLogger('song_vocab').setLevel(logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+    return main.app
+
+async def run_round(app, requests, round_id):
+    import httpx
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://agent', timeout=None) as client:
+        async def one(i):
+            # Distinct songs, so the result cache and coalescing don't kick in
+            message = f'Find Spanish lyrics and vocabulary for the song "Cancion {round_id} {i} by Banda Stub"'
+            started = time.perf_counter()
+            response = await client.post('/api/agent', json={'message_request': message})
+            response.raise_for_status()
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(one(i) for i in range(requests)))
+        wall = time.perf_counter() - started
+
+    from tools.http_cache import http_client
+    await http_client.aclose()
+    return wall, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--latency', type=float, default=0.1, help='seconds each stub call takes')
+    args = parser.parse_args()
+
+    stubs = StubServers(args.latency).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        # main.py writes outputs/ relative to the working directory
+        os.chdir(tmp)
+        app = load_app(stubs)
+
+        print(f"stub latency {args.latency * 1000:.0f}ms per call")
+        with contextlib.redirect_stdout(io.StringIO()):  # save_results prints its payloads
+            single, _ = asyncio.run(run_round(app, 1, 'warmup'))
+        print(f"one request alone: {single:.2f}s")
+        print(f"{'requests':>8}  {'wall':>8}  {'p50':>8}  {'max':>8}  {'speedup':>8}")
+        for round_id, requests in enumerate(args.requests):
+            with contextlib.redirect_stdout(io.StringIO()):
+                wall, latencies = asyncio.run(run_round(app, requests, round_id))
+            latencies.sort()
+            # Against running the same requests one after another
+            speedup = single * requests / wall
+            print(f"{requests:>8}  {wall:>7.2f}s  {latencies[len(latencies) // 2]:>7.2f}s  "
+                  f"{latencies[-1]:>7.2f}s  {speedup:>7.1f}x")
+        print('stub calls: ' + json.dumps(stubs.calls))
+
+if __name__ == '__main__':
+    main()
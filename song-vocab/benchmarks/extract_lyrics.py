@@ -0,0 +1,86 @@
+"""Time both lyrics extractors on the saved pages in tests/fixtures.
+
+Every page is run through the BeautifulSoup and the lxml backend of
+tools/get_page_content.py. Their results must be identical, and the table
+shows the time per page of each. A synthetic page the size of a heavy lyrics
+site (ads, comment threads, related songs) is included, since real pages are
+much larger than the fixtures.
+
+    python -m benchmarks.extract_lyrics
+    python -m benchmarks.extract_lyrics --repeat 50
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+SONG_VOCAB = Path(__file__).resolve().parent.parent
+FIXTURES = SONG_VOCAB / 'tests' / 'fixtures'
+
+VERSE = ('Bajo la luna de agosto te espero<br/>y el mar me cuenta que tú no vienes<br/>'
+         'la arena guarda los pasos del tiempo<br/>y en mi ventana la noche se queda<br/>')
+
+def large_page(blocks=400):
+    """A ~150kB page: one lyrics container buried in sidebars and comments."""
+    filler = []
+    for n in range(blocks):
+        filler.append(
+            f'<div class="comment" id="c{n}"><div class="meta"><a href="/u/{n}">usuario{n}</a>'
+            f'<span class="date">hace {n} días</span></div>'
+            f'<p>Me encanta esta canción, la escucho todos los días con mi familia número {n}.</p>'
+            f'<ul class="related"><li><a href="/s/{n}">Otra canción {n}</a></li>'
+            f'<li><a href="/s/{n + 1}">Canción siguiente</a></li></ul>'
+            f'<script>ads.push({{slot: {n}}});</script></div>'
+        )
+    return (
+        '<html><head><title>Luna de Agosto - Letra</title><style>.x{color:red}</style></head><body>'
+        '<header><nav>' + '<a href="/">Inicio</a>' * 50 + '</nav></header>'
+        '<h1>Luna de Agosto</h1><div class="lyrics">' + VERSE * 12 + '</div>'
+        + ''.join(filler) +
+        '<footer>© Letras</footer></body></html>'
+    )
+
+def load_pages():
+    pages = [(path.name, path.read_bytes().decode('utf-8', errors='replace'))
+             for path in sorted((FIXTURES / 'lyrics_pages').glob('*.html'))
+             + sorted((FIXTURES / 'pages').glob('*.html'))]
+    pages.append(('synthetic-large', large_page()))
+    return pages
+
+def best_of(fn, html, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(html, 'https://example.com/')
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20, help='runs per page; the fastest counts')
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(SONG_VOCAB))
+    from tools.get_page_content import extract_lyrics_lxml, extract_lyrics_soup
+    logging.disable(logging.INFO)
+
+    print(f"{'page':<26}  {'size':>8}  {'soup':>9}  {'lxml':>9}  {'speedup':>7}")
+    total_soup = total_lxml = 0.0
+    mismatches = []
+    for name, html in load_pages():
+        if extract_lyrics_lxml(html, name) != extract_lyrics_soup(html, name):
+            mismatches.append(name)
+        soup = best_of(extract_lyrics_soup, html, args.repeat)
+        lxml = best_of(extract_lyrics_lxml, html, args.repeat)
+        total_soup += soup
+        total_lxml += lxml
+        print(f"{name:<26}  {len(html) / 1024:>6.0f}kB  {soup * 1000:>7.2f}ms  {lxml * 1000:>7.2f}ms  "
+              f"{soup / lxml:>6.1f}x")
+    print(f"{'total':<26}  {'':>8}  {total_soup * 1000:>7.2f}ms  {total_lxml * 1000:>7.2f}ms  "
+          f"{total_soup / total_lxml:>6.1f}x")
+    print('identical results on every page' if not mismatches else 'DIFFERENT results: ' + ', '.join(mismatches))
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
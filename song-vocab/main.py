@@ -1,10 +1,15 @@
 from fastapi import FastAPI, HTTPException
+import asyncio
 from pydantic import BaseModel
 from typing import Dict, Any
 import json
 import logging
 from pathlib import Path
 from agent import SongLyricsAgent
+from song_cache import SingleFlight, SongCache, song_key
+from tools.chunk_cache import chunk_cache
+from tools.http_cache import http_client
+from shared.llm_cache import llm_cache_stats
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
@@ -31,6 +36,10 @@ vocabulary_path = Path("outputs/vocabulary")
 lyrics_path.mkdir(parents=True, exist_ok=True)
 vocabulary_path.mkdir(parents=True, exist_ok=True)
 
+# Songs that were already processed, and agent runs currently in progress
+song_cache = SongCache(lyrics_path, vocabulary_path)
+inflight = SingleFlight()
+
 app = FastAPI()
 
 # Add CORS middleware to allow requests from the frontend
@@ -48,9 +57,21 @@ class LyricsRequest(BaseModel):
 @app.post("/api/agent")
 async def get_lyrics(request: LyricsRequest) -> Dict[str, Any]:
     """Process a request to find lyrics and extract vocabulary."""
+    logger.info(f"Received request: {request.message_request}")
+
+    # A song processed before is answered from its saved files, without an agent
+    song_id = song_cache.lookup(request.message_request)
+    if song_id:
+        logger.info(f"Cache hit: {song_id}")
+        return song_cache.load(song_id)
+
+    # Concurrent requests for the same song share a single agent run
+    return await inflight.run(song_key(request.message_request),
+                              lambda: run_agent(request))
+
+async def run_agent(request: LyricsRequest) -> Dict[str, Any]:
+    """Run the agent for a request and return the files it saved."""
     try:
-        logger.info(f"Received request: {request.message_request}")
-        
         # Initialize agent
         agent = SongLyricsAgent(lyrics_path, vocabulary_path)
         
@@ -100,7 +121,7 @@ async def get_lyrics(request: LyricsRequest) -> Dict[str, Any]:
                 
                 # Generate and save vocabulary
                 from tools.extract_vocabulary import extract_vocabulary
-                vocabulary = extract_vocabulary(stored_lyrics)
+                vocabulary = await asyncio.to_thread(extract_vocabulary, stored_lyrics)
                 with open(vocab_file, 'w', encoding='utf-8') as f:
                     json.dump(vocabulary, f, ensure_ascii=False, indent=2)
                 logger.info(f"Saved vocabulary to {vocab_file}")
@@ -110,15 +131,8 @@ async def get_lyrics(request: LyricsRequest) -> Dict[str, Any]:
                     detail=f"Could not find or generate lyrics for song: {song_id}"
                 )
         
-        # Read files
-        lyrics = lyrics_file.read_text(encoding='utf-8')
-        vocabulary = json.loads(vocab_file.read_text(encoding='utf-8'))
-        
-        return {
-            "song_id": song_id,
-            "lyrics": lyrics,
-            "vocabulary": vocabulary
-        }
+        song_cache.remember(request.message_request, song_id)
+        return song_cache.load(song_id)
         
     except HTTPException:
         raise
@@ -130,6 +144,21 @@ async def get_lyrics(request: LyricsRequest) -> Dict[str, Any]:
             detail=f"Error processing request: {str(e)}"
         )
 
+@app.on_event("shutdown")
+async def close_http_client():
+    await http_client.aclose()
+
+@app.get("/api/cache-stats")
+async def cache_stats() -> Dict[str, Any]:
+    """Hit rates of the song result cache, the page cache, the
+    vocabulary chunk cache and the shared LLM response cache."""
+    return {
+        "songs": {**song_cache.stats(), "coalesced": inflight.coalesced},
+        "pages": http_client.stats(),
+        "vocabulary_chunks": chunk_cache.stats(),
+        "llm": llm_cache_stats()
+    }
+
 # Add these endpoints to serve lyrics and vocabulary
 @app.get("/api/lyrics/{song_id}")
 async def get_lyrics(song_id: str):
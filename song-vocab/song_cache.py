@@ -0,0 +1,209 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger('song_vocab')
+
+# Requests are free text; these phrasings are stripped before the song is parsed
+REQUEST_PREFIX = re.compile(
+    r'^(?:please\s+)?(?:find|get|search(?:\s+for)?)\s+(?:the\s+)?(?:spanish\s+)?lyrics'
+    r'(?:\s+and\s+vocabulary)?\s+(?:for|of)\s+(?:the\s+song\s+)?',
+    re.IGNORECASE
+)
+QUOTED = re.compile(r'["“”]([^"“”]+)["“”]')
+
+def normalize(text: str) -> str:
+    """Lowercase, accent-free, hyphen-separated form of a name.
+
+    "Los del Río" and "los-del-rio" both become "los-del-rio", so a song is
+    found however the agent or the user spelled it.
+    """
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    text = re.sub(r'[^\w\s-]', '', text)
+    return re.sub(r'[-_\s]+', '-', text).strip('-')
+
+def song_parts(message: str) -> Tuple[str, str]:
+    """Normalized (artist, title) of a request; artist is '' when not given."""
+    quoted = QUOTED.search(message)
+    text = quoted.group(1) if quoted else REQUEST_PREFIX.sub('', message.strip())
+    text = text.strip().strip('"\'.?!')
+
+    by = re.split(r'\s+by\s+', text, maxsplit=1, flags=re.IGNORECASE)
+    if len(by) == 2:
+        title, artist = by
+        return normalize(artist), normalize(title)
+    dash = re.split(r'\s+-\s+', text, maxsplit=1)
+    if len(dash) == 2:
+        artist, title = dash
+        return normalize(artist), normalize(title)
+    return '', normalize(text)
+
+def song_key(message: str) -> str:
+    """Normalized key for a request.
+
+    "Find Spanish lyrics and vocabulary for the song "Despacito by Luis Fonsi""
+    and "luis fonsi - despacito" both give "luis-fonsi-despacito" (the song_id
+    layout, artist first). Requests without an artist give just the title,
+    and requests with nothing to parse give ''.
+    """
+    artist, title = song_parts(message)
+    return f'{artist}-{title}' if artist and title else artist or title
+
+def read_json(path: Path) -> Dict[str, str]:
+    """A JSON object saved by write_json(); empty if missing or unreadable."""
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+def write_json(path: Path, data: Dict[str, str]):
+    """Replace `path` with `data`, never leaving a half-written file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.part')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+class SongCache:
+    """Finds songs the agent has already processed.
+
+    Looks requests up by their song_key() among the saved lyrics/vocabulary
+    files, so a repeat request is answered from disk without building an
+    agent. Requests whose key doesn't match the song_id the agent picked are
+    remembered as aliases once the run finishes.
+
+    A title-only request matches a saved song only as its full title after
+    the song's artist, so "Vida" never matches "marc-anthony-vivir-mi-vida".
+    A song_id doesn't say where the artist ends, so the artist of each song
+    is stored when a request naming it is remembered; lookups read it but
+    never change it.
+    """
+
+    def __init__(self, lyrics_path: Path, vocabulary_path: Path, aliases_file: Optional[Path] = None,
+                 artists_file: Optional[Path] = None):
+        self.lyrics_path = Path(lyrics_path)
+        self.vocabulary_path = Path(vocabulary_path)
+        self.aliases_file = Path(aliases_file) if aliases_file else self.lyrics_path.parent / 'aliases.json'
+        self.artists_file = Path(artists_file) if artists_file else self.lyrics_path.parent / 'artists.json'
+        self._lock = threading.Lock()
+        self._songs = {}  # normalized song_id -> song_id as saved
+        self._scanned = None  # lyrics directory mtime of the last scan
+        self._aliases = None
+        self._artists = None  # song_id -> its normalized artist
+
+        self.hits = 0
+        self.misses = 0
+
+    def _refresh(self):
+        # Called with the lock held; rescans only when a file was added or removed
+        try:
+            mtime = self.lyrics_path.stat().st_mtime_ns
+        except OSError:
+            self._songs = {}
+            return
+        if mtime == self._scanned:
+            return
+        self._songs = {normalize(path.stem): path.stem for path in self.lyrics_path.glob('*.txt')}
+        self._scanned = mtime
+
+    def _load_aliases(self):
+        if self._aliases is None:
+            self._aliases = read_json(self.aliases_file)
+        return self._aliases
+
+    def _load_artists(self):
+        if self._artists is None:
+            self._artists = read_json(self.artists_file)
+        return self._artists
+
+    def _complete(self, song_id: str) -> bool:
+        return ((self.lyrics_path / f'{song_id}.txt').exists()
+                and (self.vocabulary_path / f'{song_id}.json').exists())
+
+    def lookup(self, message: str) -> Optional[str]:
+        """song_id of an already processed song matching the request, or None."""
+        artist, title = song_parts(message)
+        key = song_key(message)
+        with self._lock:
+            self._refresh()
+            song_id = self._load_aliases().get(key) or self._songs.get(key)
+            if song_id is None and title and not artist:
+                # Title-only request: accept it if exactly one saved song has
+                # exactly that title after its artist
+                matches = [saved for saved, known in self._load_artists().items()
+                           if self._songs.get(normalize(saved)) == saved
+                           and normalize(saved) == f'{known}-{title}']
+                if len(matches) == 1:
+                    song_id = matches[0]
+            if song_id is not None and not self._complete(song_id):
+                song_id = None
+            if song_id is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return song_id
+
+    def remember(self, message: str, song_id: str):
+        """Record that `message` was answered with `song_id`."""
+        artist, _ = song_parts(message)
+        key = song_key(message)
+        with self._lock:
+            self._scanned = None
+            artists = self._load_artists()
+            if artist and normalize(song_id).startswith(f'{artist}-') and artists.get(song_id) != artist:
+                artists[song_id] = artist
+                write_json(self.artists_file, artists)
+            aliases = self._load_aliases()
+            if not key or key == normalize(song_id) or aliases.get(key) == song_id:
+                return
+            aliases[key] = song_id
+            write_json(self.aliases_file, aliases)
+
+    def load(self, song_id: str) -> Dict[str, Any]:
+        """The saved lyrics and vocabulary, in the /api/agent response shape."""
+        return {
+            'song_id': song_id,
+            'lyrics': (self.lyrics_path / f'{song_id}.txt').read_text(encoding='utf-8'),
+            'vocabulary': json.loads((self.vocabulary_path / f'{song_id}.json').read_text(encoding='utf-8'))
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'songs': len(self._songs),
+                'aliases': len(self._aliases or {}),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
+
+class SingleFlight:
+    """Shares one in-flight coroutine between concurrent callers with the same key."""
+
+    def __init__(self):
+        self._tasks = {}
+        self.coalesced = 0
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        if not key:
+            # Nothing parsed out of the request: no way to tell it is the same song
+            return await factory()
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.coalesced += 1
+            logger.info(f"Joining in-flight request for {key}")
+        # A caller that disconnects must not cancel the run the others wait for
+        return await asyncio.shield(task)
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+
+# Tests import the app's modules the way main.py does
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+class ReplayServer:
+    """Serves recorded pages (fixtures/pages.json) on localhost, honouring
+    If-None-Match / If-Modified-Since like the original sites did.
+
+    `delays` maps a path to seconds to wait before answering it; `max_active`
+    is the most requests that were being answered at once."""
+
+    def __init__(self):
+        self.recordings = json.loads((FIXTURES / 'pages.json').read_text(encoding='utf-8'))
+        self.requests = []
+        self.delays = {}
+        self.active = 0
+        self.max_active = 0
+        self.url = None
+
+    async def handle(self, request):
+        self.requests.append((request.path, dict(request.headers)))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(request.path, 0))
+            return self.respond(request)
+        finally:
+            self.active -= 1
+
+    def respond(self, request):
+        recording = self.recordings.get(request.path)
+        if recording is None:
+            return web.Response(status=404)
+        headers = recording['headers']
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if (etag and request.headers.get('If-None-Match') == etag) or \
+           (last_modified and request.headers.get('If-Modified-Since') == last_modified):
+            return web.Response(status=304, headers={k: v for k, v in headers.items() if k != 'Content-Type'})
+        body = (FIXTURES / 'pages' / recording['file']).read_bytes()
+        return web.Response(body=body, headers=headers)
+
+    @asynccontextmanager
+    async def running(self):
+        app = web.Application()
+        app.router.add_get('/{path:.*}', self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        try:
+            yield self
+        finally:
+            await runner.cleanup()
+
+@pytest.fixture
+def replay():
+    return ReplayServer()
@@ -0,0 +1,36 @@
+import pytest
+
+from conftest import FIXTURES
+from tools import get_page_content as extractor
+
+# Saved lyric pages of different shapes (container sites, paragraph-only blogs,
+# translations, malformed markup, CRLF line breaks, pages without lyrics),
+# plus the pages the replay server serves
+PAGES = sorted((FIXTURES / 'lyrics_pages').glob('*.html')) + sorted((FIXTURES / 'pages').glob('*.html'))
+
+def read(path):
+    # The ISO-8859-1 page decodes with replacements, the same for both backends
+    return path.read_bytes().decode('utf-8', errors='replace')
+
+@pytest.mark.parametrize('path', PAGES, ids=lambda path: path.name)
+def test_lxml_backend_matches_beautifulsoup(path):
+    html = read(path)
+    url = f'https://example.com/{path.stem}'
+    assert extractor.extract_lyrics_lxml(html, url) == extractor.extract_lyrics_soup(html, url)
+
+def test_corpus_covers_every_strategy():
+    results = {path.stem: extractor.extract_lyrics_from_html(read(path), path.name)
+               for path in PAGES}
+    # Lyrics containers, with an English translation next to the Spanish one
+    assert results['letras-style']['spanish_lyrics'].startswith('Luna de Agosto Bajo la luna')
+    assert results['english-first']['english_lyrics'].startswith('Under the August moon')
+    # Paragraph fallback
+    assert results['blog-paragraphs']['spanish_lyrics'].startswith('Bajo la luna de agosto')
+    # Script text inside a container is dropped
+    assert 'trackLyricsView' not in results['malformed']['spanish_lyrics']
+    assert results['genius-style']['metadata'].splitlines()[1] == 'Luna de Agosto'
+
+def test_unparseable_documents_fall_back_to_beautifulsoup():
+    # lxml refuses empty documents; BeautifulSoup returns nothing found
+    result = extractor.extract_lyrics_from_html('', 'https://example.com/empty', backend='lxml')
+    assert result == {'spanish_lyrics': None, 'english_lyrics': None, 'metadata': ''}
@@ -0,0 +1,215 @@
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+import instructor
+import pytest
+from openai.types.chat import ChatCompletion
+
+from tools import extract_vocabulary as extractor
+from tools.chunk_cache import ChunkCache
+from tools.lexicon import Lexicon
+from shared import llm_cache
+
+# Each verse mentions one word twice (in two forms) and has words of its own
+MARKS = 'abcdefghijkl'
+VERSES = [
+    f'Canto la palabra{mark} y cantas conmigo, la noche es larga y el verso{mark} sigue. '
+    for mark in MARKS
+]
+LYRICS = ''.join(VERSES)
+WORDS = {f'palabra{mark}' for mark in MARKS}
+NO_LEXICON = Lexicon()
+
+def completion(vocabulary):
+    """A chat completion calling the VocabularyResponse tool, as OpenAI sends it."""
+    return ChatCompletion.model_validate({
+        'id': 'fake', 'object': 'chat.completion', 'created': 0, 'model': 'fake',
+        'choices': [{'index': 0, 'finish_reason': 'tool_calls', 'message': {
+            'role': 'assistant', 'content': None,
+            'tool_calls': [{'id': 'call_0', 'type': 'function', 'function': {
+                'name': 'VocabularyResponse',
+                'arguments': json.dumps({'vocabulary': vocabulary}),
+            }}],
+        }}],
+    })
+
+def item(spanish, english, lemma, type='noun'):
+    return {'spanish': spanish, 'pronunciation': '', 'english': english, 'type': type, 'lemma': lemma}
+
+class FakeOpenAI:
+    """Answers each chunk with one item per word it recognises, through
+    instructor's real validation and retry, and records how many requests
+    overlapped."""
+
+    def __init__(self, fail_on=None, invalid_once=None, delay=0.05):
+        self.fail_on = fail_on
+        self.invalid_once = invalid_once
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        create = instructor.patch(create=self.create, mode=instructor.Mode.TOOLS)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+        # The client before instructor, as OpenAI() gives it
+        self.raw = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self.create)))
+
+    def create(self, model, messages, temperature, tools, tool_choice):
+        text = messages[1]['content']
+        with self._lock:
+            self.calls.append(text)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if self.fail_on and self.fail_on in text:
+                raise RuntimeError('rate limited')
+            vocabulary = [item('canto', 'I sing', 'cantar', 'verb'),
+                          item('cantas', 'you sing', 'cantar', 'verb'),
+                          item('la noche', 'the night', 'noche')]
+            vocabulary += [item(word, 'word', word) for word in re.findall(r'(?:palabra|verso)[a-l]\b', text)]
+            if self.invalid_once and self.invalid_once in text and self.calls.count(text) == 1:
+                del vocabulary[0]['english']
+            return completion(vocabulary)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    def install(**kwargs):
+        client = FakeOpenAI(**kwargs)
+        monkeypatch.setattr(extractor, 'make_client', lambda: client)
+        return client
+    return install
+
+def analyzed(call):
+    """The lyric lines of a request, and the words it asks about."""
+    text, words = call.removeprefix('Text to analyze:\n').split('\n\nNew words: ')
+    return text, words.split(', ')
+
+def extract(**kwargs):
+    kwargs.setdefault('chunk_size', 80)
+    kwargs.setdefault('lexicon', NO_LEXICON)
+    return extractor.extract_vocabulary(LYRICS, **kwargs)
+
+def test_long_lyrics_are_extracted_in_full(fake_openai, tmp_path):
+    client = fake_openai()
+    vocabulary = extract(max_workers=3, cache=ChunkCache(tmp_path))
+    words = [item['spanish'] for item in vocabulary]
+
+    # Every verse reached the model, each word once
+    assert len(client.calls) > 1
+    assert WORDS <= set(words)
+    sent = ' '.join(analyzed(call)[0] for call in client.calls)
+    assert all(sent.count(word) == 1 for word in WORDS)
+    # Words shared by every verse are asked about once
+    asked = [word for call in client.calls for word in analyzed(call)[1]]
+    assert asked.count('canto') == 1
+    # One entry per dictionary form across all chunks, first form kept
+    assert words.count('canto') == 1 and 'cantas' not in words
+    assert words.count('la noche') == 1
+    assert 'lemma' not in vocabulary[0]
+    # Chunks ran concurrently, within the cap
+    assert 1 < client.max_in_flight <= 3
+
+def test_rerun_only_sends_unfinished_chunks(fake_openai, tmp_path):
+    cache = ChunkCache(tmp_path)
+    client = fake_openai(fail_on='palabraf')
+    first = extract(cache=cache)
+    assert 'palabraf' not in [item['spanish'] for item in first]
+    assert 'palabrae' in [item['spanish'] for item in first]
+
+    client = fake_openai()
+    second = extract(cache=cache)
+    assert len(client.calls) == 1 and 'palabraf' in client.calls[0]
+    assert 'palabraf' in [item['spanish'] for item in second]
+
+    client = fake_openai()
+    extract(cache=cache)
+    assert client.calls == []
+    assert cache.stats()['hits'] > 0
+
+def test_invalid_answer_is_retried_for_its_chunk_only(fake_openai, tmp_path):
+    client = fake_openai(invalid_once='palabraf')
+    vocabulary = extract(cache=ChunkCache(tmp_path))
+    assert len(client.calls) == len(set(client.calls)) + 1
+    retried = [text for text in set(client.calls) if client.calls.count(text) == 2]
+    assert len(retried) == 1 and 'palabraf' in retried[0]
+    assert 'palabraf' in [entry['spanish'] for entry in vocabulary]
+
+def test_failure_of_every_chunk_falls_back(fake_openai, tmp_path):
+    fake_openai(fail_on='analyze')
+    vocabulary = extract(cache=ChunkCache(tmp_path))
+    assert vocabulary and all(item['type'] == 'unknown' for item in vocabulary)
+
+def test_known_words_are_not_asked_about(fake_openai, tmp_path):
+    client = fake_openai()
+    lexicon = Lexicon([
+        {'spanish': 'cantar', 'english': 'to sing', 'type': 'verb', 'conjugation_group': 'ar'},
+        {'spanish': 'la noche', 'english': 'night', 'type': 'noun'},
+        {'spanish': 'ser', 'english': 'to be', 'type': 'verb', 'is_irregular': True},
+    ])
+    vocabulary = extract(cache=ChunkCache(tmp_path), lexicon=lexicon)
+    asked = {word for call in client.calls for word in analyzed(call)[1]}
+    assert not {'canto', 'cantas', 'noche', 'es'} & asked
+    assert 'palabraa' in asked
+    # The model still reads them in context
+    assert 'Canto la palabraa y cantas conmigo' in analyzed(client.calls[0])[0]
+
+    by_word = {entry['spanish']: entry for entry in vocabulary}
+    # The local entry wins over the model's "canto" and "cantas"
+    assert by_word['cantar']['english'] == 'to sing' and not {'canto', 'cantas'} & set(by_word)
+    # The English is the infinitive's, so that is the headword; the lyrics' forms are noted
+    assert by_word['cantar']['notes'] == "In the lyrics as 'canto', 'cantas'"
+    assert by_word['noche']['gender'] == 'feminine'
+    assert by_word['ser']['is_irregular'] is True
+    assert WORDS <= set(by_word)
+
+def test_lyrics_of_known_words_need_no_model(fake_openai, tmp_path):
+    client = fake_openai()
+    lexicon = Lexicon([{'spanish': 'cantar', 'english': 'to sing', 'type': 'verb'},
+                       {'spanish': 'yo', 'english': 'I', 'type': 'pronoun'},
+                       {'spanish': 'tú', 'english': 'you', 'type': 'pronoun'}])
+    vocabulary = extractor.extract_vocabulary('Yo canto, tú cantas', cache=ChunkCache(tmp_path),
+                                              lexicon=lexicon)
+    assert client.calls == []
+    assert [entry['spanish'] for entry in vocabulary] == ['yo', 'cantar', 'tú']
+
+def test_only_lines_with_new_words_are_sent(fake_openai, tmp_path):
+    client = fake_openai()
+    lexicon = Lexicon([{'spanish': 'cantar', 'english': 'to sing', 'type': 'verb'},
+                       {'spanish': 'yo', 'english': 'I', 'type': 'pronoun'}])
+    lyrics = 'Yo canto\nYo canto la palabraa\nYo canto\nla noche larga'
+    vocabulary = extractor.extract_vocabulary(lyrics, cache=ChunkCache(tmp_path), lexicon=lexicon)
+    assert [analyzed(call) for call in client.calls] == [
+        ('Yo canto la palabraa\nla noche larga', ['la', 'palabraa', 'noche', 'larga'])
+    ]
+    by_word = {entry['spanish']: entry for entry in vocabulary}
+    # The model's "cantas" is a known word it wasn't asked about; its phrase is kept
+    assert 'cantas' not in by_word and 'la noche' in by_word
+    assert by_word['palabraa']['english'] == 'word'
+
+def test_model_answers_are_shared_through_the_llm_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_cache, 'llm_cache', llm_cache.LLMCache(tmp_path / 'llm.db'))
+    client = FakeOpenAI(invalid_once='palabraf', delay=0)
+    monkeypatch.setattr(extractor, 'OpenAI', lambda: client.raw)
+    first = extract(cache=None)
+    assert 'palabraf' in [entry['spanish'] for entry in first]
+
+    # Every answer is replayed except the one that failed validation
+    client.calls.clear()
+    second = extract(cache=None)
+    assert len(client.calls) == 1 and 'palabraf' in client.calls[0]
+    assert second == first
+    stats = llm_cache.llm_cache_stats()['sites']['song-vocab.extract_vocabulary']
+    assert stats['hits'] >= 3 and stats['bypassed'] == 0
+
+def test_chunks_break_between_words():
+    text = ' '.join(['palabra'] * 200)  # no punctuation to split on
+    chunks = extractor.split_text_into_chunks(text, 100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert all(set(chunk.split()) == {'palabra'} for chunk in chunks)
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import time
+
+import tools.fetch_best_lyrics as fetch_best
+from tools.fetch_best_lyrics import _candidate_urls, fetch_best_lyrics, score_lyrics
+from tools.http_cache import HttpCache, HttpClient
+
+LYRICS = ('Camino por la calle con la luna en el cielo y en cada esquina te busco mi amor '
+          'con el corazón abierto la noche es larga y el mar está lejos pero yo quiero estar '
+          'contigo hasta que salga el sol')
+
+def fetch(replay, tmp_path, paths, **kwargs):
+    client = HttpClient(HttpCache(tmp_path))
+
+    async def run():
+        async with replay.running():
+            try:
+                results = [{'link': replay.url + path} for path in paths]
+                return await fetch_best_lyrics(results, client=client, **kwargs)
+            finally:
+                await client.aclose()
+    return asyncio.run(run())
+
+def test_score_lyrics_weighting():
+    assert score_lyrics({'spanish_lyrics': 'hola amigo ' * 10}) == 0  # too short to be a song
+    page = {'spanish_lyrics': LYRICS, 'metadata': 'Camino por la calle - Banda de Prueba'}
+    plain = score_lyrics(page)
+    assert plain > 2
+    assert score_lyrics(page, ['camino']) == round(plain + 0.5, 3)
+    assert score_lyrics({**page, 'spanish_lyrics': LYRICS + ' acepta las cookies y la privacidad'}) < plain
+    assert score_lyrics({'spanish_lyrics': 'the night is long and the sea is far away ' * 5}) < plain / 2
+
+def test_candidate_urls_accept_every_result_shape():
+    results = [{'link': 'https://a.example/1'}, {'url': 'http://b.example/2'},
+               'https://a.example/1', 'ftp://c.example/3', {'title': 'no link'}]
+    assert _candidate_urls(results, 5) == ['https://a.example/1', 'http://b.example/2']
+    assert _candidate_urls(json.dumps(results), 1) == ['https://a.example/1']
+    assert _candidate_urls('https://a.example/1', 5) == ['https://a.example/1']
+    assert _candidate_urls('not a url', 5) == [] and _candidate_urls(None, 5) == []
+
+def test_best_page_is_selected(replay, tmp_path, monkeypatch):
+    # Fetch every page rather than stopping at the first good one
+    monkeypatch.setattr(fetch_best, 'GOOD_ENOUGH', 10)
+    result = fetch(replay, tmp_path, ['/letra/camino-por-la-calle', '/letra/baila-conmigo',
+                                      '/letra/no-encontrada', '/letra/no-existe'], query='Baila conmigo')
+    assert result['url'].endswith('/letra/baila-conmigo')
+    scores = {c['url'].rsplit('/', 1)[1]: c for c in result['candidates']}
+    assert result['score'] == scores['baila-conmigo']['score'] > scores['camino-por-la-calle']['score']
+    assert scores['no-encontrada']['score'] == 0
+    assert 'error' in scores['no-existe']
+
+def test_good_page_ends_the_batch_early(replay, tmp_path):
+    replay.delays['/letra/baila-conmigo'] = 0.5
+    started = time.monotonic()
+    result = fetch(replay, tmp_path, ['/letra/baila-conmigo', '/letra/camino-por-la-calle'])
+    assert time.monotonic() - started < 0.5
+    assert result['url'].endswith('/letra/camino-por-la-calle')
+    assert result['candidates'][0]['error'] == 'Not needed'
+
+def test_fetches_per_host_are_bounded(replay, tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_best, 'GOOD_ENOUGH', 10)
+    paths = ['/letra/camino-por-la-calle', '/letra/baila-conmigo', '/letra/sin-cache']
+    replay.delays = {path: 0.05 for path in paths}
+    result = fetch(replay, tmp_path, paths, per_host=1)
+    assert result['success'] and replay.max_active == 1
+
+def test_budget_timeout_cancels_slow_fetches(replay, tmp_path):
+    replay.delays = {'/letra/camino-por-la-calle': 0.5, '/letra/baila-conmigo': 0.5}
+    started = time.monotonic()
+    result = fetch(replay, tmp_path, ['/letra/camino-por-la-calle', '/letra/baila-conmigo'], budget=0.1)
+    assert time.monotonic() - started < 0.5
+    assert not result['success'] and result['error'] == 'No page had usable lyrics'
+    assert [c['error'] for c in result['candidates']] == ['Timed out', 'Timed out']
+
+def test_no_usable_page(replay, tmp_path):
+    result = fetch(replay, tmp_path, ['/letra/no-encontrada', '/letra/no-existe'])
+    assert not result['success'] and len(result['candidates']) == 2
+    assert fetch(replay, tmp_path, [])['error'] == 'No candidate URLs'
@@ -0,0 +1,75 @@
+import asyncio
+
+from tools.get_page_content import get_page_content
+from tools.http_cache import HttpCache, HttpClient
+
+def fetch_all(replay, client, paths):
+    async def run():
+        async with replay.running():
+            try:
+                return [await client.get_text(replay.url + path) for path in paths]
+            finally:
+                await client.aclose()
+    return asyncio.run(run())
+
+def test_fresh_pages_are_served_from_disk(replay, tmp_path):
+    cache = HttpCache(tmp_path, ttl=3600)
+    client = HttpClient(cache)
+    first, second = fetch_all(replay, client, ['/letra/camino-por-la-calle'] * 2)
+
+    assert first == second and 'Camino por la calle' in first
+    assert len(replay.requests) == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+    assert stats['bytes_saved'] == len(first.encode('utf-8'))
+
+def test_stale_pages_are_revalidated(replay, tmp_path):
+    cache = HttpCache(tmp_path, ttl=0)
+    client = HttpClient(cache)
+    pages = fetch_all(replay, client, ['/letra/camino-por-la-calle', '/letra/camino-por-la-calle',
+                                       '/letra/baila-conmigo', '/letra/baila-conmigo'])
+
+    # ETag and Last-Modified are sent back, and the 304s reuse the stored bodies
+    assert replay.requests[1][1]['If-None-Match'] == '"camino-v1"'
+    assert replay.requests[3][1]['If-Modified-Since'] == 'Tue, 01 Apr 2025 10:00:00 GMT'
+    assert pages[0] == pages[1] and pages[2] == pages[3]
+    # The stored charset is used to decode cached bodies
+    assert 'corazón' in pages[3]
+    assert cache.stats()['revalidated'] == 2
+
+def test_cache_survives_restarts_and_respects_no_store(replay, tmp_path):
+    paths = ['/letra/camino-por-la-calle', '/letra/sin-cache']
+    cache = HttpCache(tmp_path)
+
+    async def run():
+        async with replay.running():
+            # A second client over the same directory stands in for a restart
+            for client in (HttpClient(HttpCache(tmp_path)), HttpClient(cache)):
+                try:
+                    for path in paths:
+                        await client.get_text(replay.url + path)
+                finally:
+                    await client.aclose()
+
+    asyncio.run(run())
+    assert [path for path, _ in replay.requests] == ['/letra/camino-por-la-calle', '/letra/sin-cache', '/letra/sin-cache']
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+
+def test_get_page_content_extracts_from_cached_page(replay, tmp_path):
+    client = HttpClient(HttpCache(tmp_path))
+
+    async def run():
+        async with replay.running():
+            try:
+                first = await get_page_content(replay.url + '/letra/baila-conmigo', client=client)
+                second = await get_page_content(replay.url + '/letra/baila-conmigo', client=client)
+                missing = await get_page_content(replay.url + '/letra/no-existe', client=client)
+            finally:
+                await client.aclose()
+            return first, second, missing
+
+    first, second, missing = asyncio.run(run())
+    assert first['success'] and 'te canto' in first['spanish_lyrics']
+    assert second['spanish_lyrics'] == first['spanish_lyrics']
+    assert not missing['success']
+    assert len(replay.requests) == 2
@@ -0,0 +1,42 @@
+from tools import language_id
+from tools.extract_vocabulary import generate_fallback_vocabulary
+from tools.save_results import clean_lyrics
+
+SPANISH = ('Bajo la luna de agosto te espero y el mar me cuenta que tú no vienes, '
+           'la arena guarda los pasos del tiempo y en mi ventana la noche se queda')
+ENGLISH = ('Under the August moon I wait for you and the sea tells me that you are '
+           'not coming, the sand keeps the footsteps of time')
+
+def test_ratio_separates_spanish_from_english():
+    assert language_id.spanish_ratio(SPANISH) > 0.9
+    assert language_id.spanish_ratio(ENGLISH) < 0.15
+    assert language_id.is_spanish(SPANISH) and language_id.is_english(ENGLISH)
+
+def test_mixed_text_is_neither():
+    ratio = language_id.spanish_ratio(SPANISH + '\n' + ENGLISH)
+    assert 0.4 < ratio < 0.7
+    assert not language_id.is_english(SPANISH + '\n' + ENGLISH)
+
+def test_one_spanish_word_does_not_make_text_spanish():
+    # The old check called anything containing "de" or an accent Spanish
+    assert not language_id.is_spanish('This is the story of Charles de Gaulle and the café')
+
+def test_too_little_text_is_unknown():
+    for text in ('', 'Edit Lyrics', '[Coro]', '1, 2, 3'):
+        assert language_id.spanish_ratio(text) is None
+        assert not language_id.is_spanish(text) and not language_id.is_english(text)
+
+def test_fallback_vocabulary_skips_english_words():
+    words = [item['spanish'] for item in generate_fallback_vocabulary(SPANISH + ' tonight with my heart')]
+    assert words[:4] == ['bajo', 'luna', 'agosto', 'espero']
+    assert not {'tonight', 'with', 'heart'} & set(words)
+
+def test_clean_lyrics_drops_translation_lines():
+    lyrics = ('Bajo la luna de agosto te espero\n'
+              'Under the August moon I wait for you\n'
+              'y el mar me cuenta que tú no vienes\n'
+              'and the sea tells me that you are not coming\n'
+              'Oh, oh')
+    assert clean_lyrics(lyrics) == ('Bajo la luna de agosto te espero\n'
+                                    'y el mar me cuenta que tú no vienes\n'
+                                    'Oh, oh')
@@ -0,0 +1,112 @@
+import json
+import sqlite3
+
+import pytest
+
+from tools.lemmatizer import candidate_lemmas
+from tools.lexicon import Lexicon, tokenize
+
+@pytest.mark.parametrize('form, lemma', [
+    ('quiero', 'querer'),     # stem change
+    ('duermo', 'dormir'),
+    ('busqué', 'buscar'),     # spelling change
+    ('cantaba', 'cantar'),
+    ('cantaré', 'cantar'),    # future, on the infinitive
+    ('era', 'ser'),           # irregular
+    ('mirándote', 'mirar'),   # attached pronoun
+    ('dímelo', 'decir'),      # two pronouns
+    ('voces', 'voz'),
+    ('bonitas', 'bonito'),
+])
+def test_candidates_include_the_dictionary_form(form, lemma):
+    assert lemma in candidate_lemmas(form)
+
+def test_ambiguous_irregular_forms_keep_every_verb():
+    assert {'decir', 'dar'} <= set(candidate_lemmas('di'))
+
+@pytest.mark.parametrize('form, verb', [
+    ('vela', 'ir'), ('velas', 'ir'),        # ve + la: ir only takes "te"
+    ('sala', 'salir'), ('salas', 'salir'),  # salir's subjunctive is salga
+    ('vena', 'venir'),                      # venga
+    ('poda', 'poder'),                      # pueda
+    ('dime', 'dar'),                        # di is only decir's imperative
+])
+def test_verbs_are_only_proposed_for_their_own_forms(form, verb):
+    assert verb not in candidate_lemmas(form)
+
+@pytest.mark.parametrize('form, lemma', [
+    ('vete', 'ir'), ('sales', 'salir'), ('duermen', 'dormir'), ('dormimos', 'dormir'),
+    ('tenía', 'tener'), ('hacía', 'hacer'), ('dámelo', 'dar'),
+])
+def test_regular_forms_of_irregular_verbs_still_resolve(form, lemma):
+    assert lemma in candidate_lemmas(form)
+
+LEXICON = Lexicon([
+    {'spanish': 'querer', 'english': 'to want', 'type': 'verb', 'is_irregular': True},
+    {'spanish': 'corazón', 'english': 'heart', 'type': 'noun', 'gender': 'masculine'},
+    {'spanish': 'tú', 'english': 'you', 'type': 'pronoun'},
+    {'spanish': 'tu', 'english': 'your', 'type': 'determiner'},
+    {'spanish': 'la playa', 'english': 'beach'},
+    {'spanish': 'Buenos días', 'english': 'Good morning', 'type': 'phrase'},
+])
+
+def test_lookup_finds_inflected_forms():
+    assert LEXICON.lookup('quieres')['spanish'] == 'querer'
+    assert LEXICON.lookup('Playas') == {'spanish': 'playa', 'english': 'beach', 'gender': 'feminine'}
+    # Accents are matched exactly first, then ignored
+    assert LEXICON.lookup('tú')['english'] == 'you'
+    assert LEXICON.lookup('tu')['english'] == 'your'
+    assert LEXICON.lookup('CORAZONES')['spanish'] == 'corazón'
+    assert LEXICON.lookup('guitarra') is None
+    # Phrases are left to the model
+    assert LEXICON.lookup('buenos') is None
+
+def test_lookup_does_not_turn_nouns_into_verbs():
+    lexicon = Lexicon([
+        {'spanish': 'ser', 'english': 'to be', 'type': 'verb'},
+        {'spanish': 'ir', 'english': 'to go', 'type': 'verb'},
+        {'spanish': 'salir', 'english': 'to go out', 'type': 'verb'},
+        {'spanish': 'venir', 'english': 'to come', 'type': 'verb'},
+        {'spanish': 'mar', 'english': 'sea', 'type': 'noun'},
+        {'spanish': 'cantar', 'english': 'to sing', 'type': 'verb'},
+        {'spanish': 'canto', 'english': 'song', 'type': 'noun'},
+    ])
+    for word in ('vela', 'velas', 'sala', 'salas', 'vena', 'seres'):
+        assert lexicon.lookup(word) is None, word
+    assert lexicon.lookup('eres')['spanish'] == 'ser'
+    assert lexicon.lookup('vete')['spanish'] == 'ir'
+    assert lexicon.lookup('mares')['spanish'] == 'mar'
+    # A form that is both: the word itself wins, a conjugation finds the verb
+    assert lexicon.lookup('canto')['english'] == 'song'
+    assert lexicon.lookup('cantaba')['spanish'] == 'cantar'
+
+def test_load_merges_sources_and_skips_missing_ones(tmp_path):
+    common = tmp_path / 'common.json'
+    common.write_text(json.dumps([{'spanish': 'ser', 'english': 'to be', 'type': 'verb'}]))
+    seeds = tmp_path / 'seed'
+    seeds.mkdir()
+    (seeds / 'travel.json').write_text(json.dumps({'group_id': 3, 'words': [
+        {'spanish': 'el hotel', 'english': 'hotel', 'correct': 0, 'wrong': 0},
+    ]}))
+    (seeds / 'broken.json').write_text('{')
+    database = tmp_path / 'portal.db'
+    conn = sqlite3.connect(database)
+    conn.execute('CREATE TABLE vocabulary (spanish, english, type, gender, conjugation_group, is_irregular)')
+    conn.executemany('INSERT INTO vocabulary VALUES (?, ?, ?, ?, ?, ?)', [
+        ('ser', 'to be (permanent)', 'verb', None, 'er', 1),
+        ('el tren', 'train', 'noun', 'masculine', None, 0),
+    ])
+    conn.commit()
+    conn.close()
+
+    lexicon = Lexicon.load(common, seeds, database)
+    # The bundled list comes first; later sources only fill in missing fields
+    assert lexicon.lookup('eres') == {'spanish': 'ser', 'english': 'to be', 'type': 'verb',
+                                      'conjugation_group': 'er', 'is_irregular': True}
+    assert lexicon.lookup('trenes')['english'] == 'train'
+    assert lexicon.lookup('hoteles')['gender'] == 'masculine'
+
+    assert len(Lexicon.load(common, tmp_path / 'missing', tmp_path / 'missing.db')) == 1
+
+def test_tokenize_keeps_first_appearance():
+    assert tokenize('Canto, y CANTO: ¡2 veces canto!') == ['canto', 'y', 'veces']
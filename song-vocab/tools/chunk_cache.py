@@ -0,0 +1,81 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Vocabulary extracted from each chunk of lyrics, stored on disk.
+#
+# Entries are keyed by the chunk text together with a namespace naming the
+# model and prompt, so re-running a song only sends the chunks that failed or
+# changed, and a new prompt never reuses answers to the old one.
+
+DEFAULT_DIRECTORY = Path(__file__).parent.parent / 'outputs' / 'vocabulary_chunks'
+
+class ChunkCache:
+    """`<sha256(namespace, chunk)>.json` holds the items of one chunk."""
+
+    def __init__(self, directory: Path = DEFAULT_DIRECTORY):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()  # chunks are extracted on several threads
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _path(self, namespace: str, chunk: str) -> Path:
+        key = hashlib.sha256(f'{namespace}\0{chunk}'.encode('utf-8')).hexdigest()
+        return self.directory / f'{key}.json'
+
+    def get(self, namespace: str, chunk: str) -> Optional[List[Dict[str, Any]]]:
+        """Stored items for `chunk`, or None."""
+        try:
+            entry = json.loads(self._path(namespace, chunk).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            entry = None
+        # Guard against the (theoretical) hash collision
+        if entry is None or entry.get('chunk') != chunk:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return entry['items']
+
+    def put(self, namespace: str, chunk: str, items: List[Dict[str, Any]]):
+        path = self._path(namespace, chunk)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({'chunk': chunk, 'items': items}, ensure_ascii=False).encode('utf-8')
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self._count('stores')
+
+    def _count(self, outcome: str):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
+
+# Shared by every extraction in the process
+chunk_cache = ChunkCache(Path(os.getenv('VOCABULARY_CACHE_DIR', DEFAULT_DIRECTORY)))
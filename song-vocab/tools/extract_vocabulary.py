@@ -1,13 +1,19 @@
-from typing import List, Optional
+from typing import Iterable, List, Optional, Tuple
+import hashlib
 import instructor
 # import ollama  # Commented out for OpenAI usage
 import logging
 from pydantic import BaseModel
 from pathlib import Path
-import os
 from openai import OpenAI
 import re
 import json
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
+from .chunk_cache import ChunkCache, chunk_cache
+from .language_id import word_log_ratio
+from .lexicon import Lexicon, spanish_lexicon, tokenize
+from shared.llm_cache import cached_client
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -23,16 +29,65 @@ class VocabularyItem(BaseModel):
     is_irregular: bool = False
     gender: Optional[str] = None
     notes: Optional[str] = None
+    lemma: Optional[str] = None  # dictionary form; items are merged on it
 
 class VocabularyResponse(BaseModel):
     vocabulary: List[VocabularyItem]
 
-def extract_vocabulary(text: str) -> List[dict]:
+# Long lyrics are split into chunks that are extracted concurrently (map) and
+# merged with duplicates removed by dictionary form (reduce)
+CHUNK_SIZE = 800
+MAX_CONCURRENT_CHUNKS = 4
+CHUNK_RETRIES = 2  # re-asks when a chunk's answer doesn't validate
+MODEL = "gpt-4o-2024-08-06"
+
+PROMPT_PATH = Path(__file__).parent.parent / "prompts" / "Extract-Vocabulary.md"
+EXTRACTION_PROMPT = PROMPT_PATH.read_text(encoding="utf-8")
+# Changing the prompt, the schema or the model must not reuse cached chunk results
+CACHE_NAMESPACE = f"{MODEL}:" + hashlib.sha256(
+    (EXTRACTION_PROMPT + json.dumps(VocabularyResponse.model_json_schema(), sort_keys=True)).encode("utf-8")
+).hexdigest()[:12]
+
+def make_client():
+    """
+    OpenAI client that returns validated VocabularyResponse objects.
+    
+    Raw answers go through the shared LLM cache; one that fails validation is
+    dropped from it, so only the corrected answer is replayed next time.
+    """
+    client = cached_client(OpenAI(), "song-vocab.extract_vocabulary")
+    structured = instructor.Instructor(
+        client=client,
+        create=instructor.patch(create=client.chat.completions.create, mode=instructor.Mode.TOOLS),
+        mode=instructor.Mode.TOOLS,
+    )
+    if hasattr(client, "forget_last"):
+        structured.on("parse:error", lambda error: client.forget_last())
+    return structured
+
+def extract_vocabulary(text: str, chunk_size: int = CHUNK_SIZE,
+                       max_workers: int = MAX_CONCURRENT_CHUNKS,
+                       cache: Optional[ChunkCache] = chunk_cache,
+                       lexicon: Lexicon = spanish_lexicon) -> List[dict]:
     """
     Extract ALL vocabulary from Spanish text using OpenAI with structured output.
     
+    Words whose dictionary form is in `lexicon` are resolved locally. Only the
+    lines holding the remaining words are sent to the model, with those words
+    listed after them, so it still sees each word in context and can pick out
+    phrases and idioms. The lines are packed into chunks by
+    split_lines_into_chunks(), up to `max_workers` chunks are sent at once, and
+    all items are merged, keeping the first item for each dictionary form.
+    Single words the model returns that were not among the new words are
+    dropped; its phrases are kept. Chunks already extracted (the same lines,
+    new words, prompt and model) come from `cache`.
+    
     Args:
         text (str): The text to extract vocabulary from
+        chunk_size (int): Longest chunk sent in one request, in characters
+        max_workers (int): Most chunk requests in flight at a time
+        cache (Optional[ChunkCache]): Per-chunk results; None disables caching
+        lexicon (Lexicon): Words that don't need the model
         
     Returns:
         List[dict]: Complete list of vocabulary items in Spanish format
@@ -45,88 +100,198 @@ def extract_vocabulary(text: str) -> List[dict]:
         logger.warning(f"Text is too short ({len(text)} chars), returning empty vocabulary")
         return []
     
+    known, unknown = resolve_known_words(text, lexicon)
+    logger.info(f"Resolved {len(known)} words locally, {len(unknown)} left for the model")
+    if not unknown:
+        return merge_vocabulary([known])
+    
     try:
-        # Initialize OpenAI client
-        client = OpenAI()
-        
-        # Create a simpler prompt for direct translation
-        prompt = f"""
-        Extract important Spanish vocabulary from this text and provide English translations.
-        For each word or phrase, provide:
-        1. The Spanish word/phrase
-        2. The English translation
-        3. The type (noun, verb, adjective, etc.)
+        # Initialize OpenAI client, shared by the worker threads
+        client = make_client()
+        chunks = chunk_requests(split_lines_into_chunks(lines_with_words(text, unknown), chunk_size), unknown)
+        logger.info(f"Extracting vocabulary from {len(chunks)} chunks")
         
-        Text: {text[:1000]}  # Limit to first 1000 chars to avoid token limits
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+            results = list(executor.map(lambda chunk: extract_chunk_vocabulary(client, chunk, cache), chunks))
+        results = [new_items(items, unknown) if items else items for items in results]
         
-        Format your response as a simple list of Spanish words with their translations.
-        Example:
-        - "sí" - "yes" - adverb
-        - "sabes" - "you know" - verb
-        - "mirándote" - "looking at you" - verb
-        """
+        failed = sum(1 for items in results if items is None)
+        if failed == len(chunks):
+            logger.error("Vocabulary extraction failed for every chunk")
+            return merge_vocabulary([known, generate_fallback_vocabulary(" ".join(unknown))])
+        if failed:
+            logger.warning(f"Vocabulary extraction failed for {failed} of {len(chunks)} chunks")
         
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o-2024-08-06",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3
-            )
-            
-            # Parse the response manually
-            content = response.choices[0].message.content
-            vocabulary = []
-            
-            # Extract vocabulary items using regex
-            pattern = r'[-•*]\s*["\'"]?([^"\']+)["\'"]?\s*[-–—]\s*["\'"]?([^"\']+)["\'"]?\s*[-–—]\s*([^\n]+)'
-            matches = re.findall(pattern, content)
-            
-            for match in matches:
-                spanish = match[0].strip()
-                english = match[1].strip()
-                word_type = match[2].strip()
-                
-                item = {
-                    "spanish": spanish,
-                    "pronunciation": "",
-                    "english": english,
-                    "type": word_type,
-                    "conjugation_group": None,
-                    "is_irregular": False,
-                    "gender": None,
-                    "notes": "Automatically extracted"
-                }
-                
-                vocabulary.append(item)
-            
-            logger.info(f"Generated {len(vocabulary)} vocabulary items")
-            return vocabulary
-            
-        except Exception as e:
-            logger.error(f"Error in extraction: {e}")
-            return generate_fallback_vocabulary(text)
+        # Local items come first so they win over the model's for the same lemma
+        vocabulary = merge_vocabulary([known, *(items for items in results if items)])
+        logger.info(f"Generated {len(vocabulary)} vocabulary items")
+        return vocabulary
         
     except Exception as e:
         logger.error(f"Failed to extract vocabulary: {str(e)}", exc_info=True)
-        return generate_fallback_vocabulary(text)
+        return merge_vocabulary([known, generate_fallback_vocabulary(" ".join(unknown))])
+
+def resolve_known_words(text: str, lexicon: Lexicon) -> Tuple[List[dict], List[str]]:
+    """
+    Split the words of `text` into items built from `lexicon` and the words
+    it doesn't know. Unknown words that read as English (ad-libs, translation
+    lines) are dropped rather than sent to the model.
+    
+    The lexicon's English is that of the dictionary form, so an item's
+    headword is the dictionary form too; the forms found in the text are
+    listed in its notes.
+    
+    Returns:
+        Tuple[List[dict], List[str]]: One item per known dictionary form,
+        also under "lemma", and the unknown words, both in order of appearance
+    """
+    known = {}
+    forms = {}
+    unknown = []
+    for word in tokenize(text):
+        entry = lexicon.lookup(word)
+        if entry is None:
+            if word_log_ratio(word) > -1:
+                unknown.append(word)
+            continue
+        lemma = entry["spanish"]
+        if word != lemma:
+            forms.setdefault(lemma, []).append(word)
+        if lemma in known:
+            continue
+        known[lemma] = {
+            "spanish": lemma,
+            "pronunciation": "",
+            "english": entry.get("english") or "",
+            "type": entry.get("type") or "unknown",
+            "conjugation_group": entry.get("conjugation_group"),
+            "is_irregular": bool(entry.get("is_irregular")),
+            "gender": entry.get("gender"),
+            "notes": None,
+            "lemma": lemma,
+        }
+    for lemma, words in forms.items():
+        known[lemma]["notes"] = "In the lyrics as " + ", ".join(f"'{word}'" for word in words)
+    return list(known.values()), unknown
+
+def lines_with_words(text: str, words: Iterable[str]) -> List[str]:
+    """Lines of `text` containing any of `words`, each once, in order."""
+    words = set(words)
+    lines = []
+    for line in dict.fromkeys(line.strip() for line in text.splitlines()):
+        if line and words.intersection(tokenize(line)):
+            lines.append(line)
+    return lines
+
+def chunk_requests(chunks: List[str], words: List[str]) -> List[str]:
+    """
+    The text sent for each chunk: its lines and the new words among them.
+    Each word is asked about in the first chunk it appears in; a chunk left
+    without words of its own is not sent.
+    """
+    requests = []
+    remaining = dict.fromkeys(words)
+    for chunk in chunks:
+        present = [word for word in tokenize(chunk) if word in remaining]
+        if present:
+            requests.append(f"{chunk}\n\nNew words: {', '.join(present)}")
+            for word in present:
+                del remaining[word]
+    return requests
+
+def new_items(items: List[dict], words: Iterable[str]) -> List[dict]:
+    """
+    The model's items for the new `words` and for phrases. Other single words
+    were resolved locally (or read as English) and are dropped.
+    """
+    words = set(words)
+    kept = []
+    for item in items:
+        key = word_key(item["spanish"])
+        if " " in key or key in words:
+            kept.append(item)
+    return kept
+
+def extract_chunk_vocabulary(client, chunk: str,
+                             cache: Optional[ChunkCache] = None) -> Optional[List[dict]]:
+    """
+    Extract the vocabulary of one chunk of text in a single structured call.
+    
+    An answer that doesn't validate against VocabularyResponse is re-asked
+    (up to CHUNK_RETRIES times) for this chunk alone, with the validation
+    errors; the other chunks are not sent again.
+    
+    Returns:
+        Optional[List[dict]]: The chunk's items, each with its dictionary form
+        under "lemma"; None if the request failed
+    """
+    if cache is not None:
+        items = cache.get(CACHE_NAMESPACE, chunk)
+        if items is not None:
+            logger.debug(f"Chunk of {len(chunk)} chars served from cache")
+            return items
+    
+    try:
+        response = client.chat.completions.create(
+            model=MODEL,
+            response_model=VocabularyResponse,
+            max_retries=CHUNK_RETRIES,
+            messages=[
+                {"role": "system", "content": EXTRACTION_PROMPT},
+                {"role": "user", "content": f"Text to analyze:\n{chunk}"}
+            ],
+            temperature=0  # the same chunk gets the same answer, so it can be cached
+        )
+    except Exception as e:
+        logger.error(f"Error in extraction: {e}")
+        return None
+    
+    items = []
+    for item in response.vocabulary:
+        item = item.model_dump()
+        item["lemma"] = item["lemma"] or item["spanish"]
+        items.append(item)
+    # An empty answer is more likely a bad reply than a chunk without words
+    if cache is not None and items:
+        cache.put(CACHE_NAMESPACE, chunk, items)
+    return items
+
+def word_key(word: str) -> str:
+    """`word` as compared: lowercase, without punctuation or a leading article."""
+    key = word.casefold().strip(" \t.,;:!?¡¿\"'")
+    # "la noche" and "noche" are the same entry
+    return re.sub(r'^(el|la|los|las|un|una)\s+', '', key)
+
+def lemma_key(item: dict) -> str:
+    """Key under which two items count as the same word."""
+    return word_key(item.get("lemma") or item.get("spanish") or "")
+
+def merge_vocabulary(chunk_results: Iterable[List[dict]]) -> List[dict]:
+    """Merge per-chunk items in order, keeping the first item for each lemma."""
+    merged = {}
+    for items in chunk_results:
+        for item in items:
+            key = lemma_key(item)
+            if key and key not in merged:
+                merged[key] = {k: v for k, v in item.items() if k != "lemma"}
+    return list(merged.values())
 
 def generate_fallback_vocabulary(text: str) -> List[dict]:
     """Generate a basic vocabulary list when the main extraction fails."""
     logger.info("Generating fallback vocabulary")
     
-    # Split text into words and get unique ones
-    words = re.findall(r'\b\w+\b', text.lower())
-    unique_words = set(words)
-    
-    # Filter for Spanish words (containing Spanish characters or common words)
-    spanish_chars = 'áéíóúñü'
-    common_spanish_words = {'el', 'la', 'los', 'las', 'un', 'una', 'y', 'o', 'de', 'en', 'con', 'por', 'para'}
-    
+    # Unique words in order of appearance, leaving out the ones that read as
+    # English (translations and ad-libs mixed into the lyrics)
     spanish_words = []
-    for word in unique_words:
-        if any(char in word for char in spanish_chars) or word in common_spanish_words:
-            if len(word) > 2:  # Skip very short words
-                spanish_words.append(word)
+    seen = set()
+    for word in re.findall(r'[a-záéíóúüñ]+', text.lower()):
+        if word in seen:
+            continue
+        seen.add(word)
+        # Skip very short words; ordinary nouns often score slightly English
+        # from their spelling alone, so only clearly English words are dropped
+        if len(word) > 2 and word_log_ratio(word) > -1:
+            spanish_words.append(word)
     
     # Create basic vocabulary items
     vocabulary = []
@@ -146,80 +311,24 @@ def generate_fallback_vocabulary(text: str) -> List[dict]:
     logger.info(f"Generated fallback vocabulary with {len(vocabulary)} items")
     return vocabulary
 
-def generate_enhanced_fallback_vocabulary(text: str) -> List[dict]:
-    """Generate a more comprehensive vocabulary list with translations."""
-    logger.info("Generating enhanced fallback vocabulary")
-    
-    try:
-        # Initialize OpenAI client
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        # Create a simpler prompt for direct translation
-        prompt = f"""
-        Extract important Spanish vocabulary from this text and provide English translations.
-        For each word or phrase, provide:
-        1. The Spanish word/phrase
-        2. The English translation
-        3. The type (noun, verb, adjective, etc.)
-        
-        Text: {text[:1000]}  # Limit to first 1000 chars to avoid token limits
-        
-        Format your response as a simple list of Spanish words with their translations.
-        Example:
-        - "sí" - "yes" - adverb
-        - "sabes" - "you know" - verb
-        - "mirándote" - "looking at you" - verb
-        """
-        
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o-2024-08-06",  # Use same model for consistency
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3
-            )
-            
-            # Parse the response manually
-            content = response.choices[0].message.content
-            vocabulary = []
-            
-            # Extract vocabulary items using regex
-            pattern = r'[-•*]\s*["\'"]?([^"\']+)["\'"]?\s*[-–—]\s*["\'"]?([^"\']+)["\'"]?\s*[-–—]\s*([^\n]+)'
-            matches = re.findall(pattern, content)
-            
-            for match in matches:
-                spanish = match[0].strip()
-                english = match[1].strip()
-                word_type = match[2].strip()
-                
-                item = {
-                    "spanish": spanish,
-                    "pronunciation": "",
-                    "english": english,
-                    "type": word_type,
-                    "conjugation_group": None,
-                    "is_irregular": False,
-                    "gender": None,
-                    "notes": "Automatically extracted"
-                }
-                
-                vocabulary.append(item)
-            
-            logger.info(f"Generated {len(vocabulary)} vocabulary items from simple extraction")
-            
-            # If we didn't get any items, try the basic fallback
-            if not vocabulary:
-                return generate_fallback_vocabulary(text)
-                
-            return vocabulary
-            
-        except Exception as e:
-            logger.error(f"Error in simple extraction: {e}")
-            return generate_fallback_vocabulary(text)
-        
-    except Exception as e:
-        logger.error(f"Failed to generate enhanced vocabulary: {e}")
-        # Fall back to the basic method
-        return generate_fallback_vocabulary(text)
+def split_lines_into_chunks(lines: List[str], max_length: int = 500) -> List[str]:
+    """Pack whole lines into chunks of maximum length, splitting longer lines with split_text_into_chunks()."""
+    chunks = []
+    current_chunk = ""
+    for line in lines:
+        if len(line) > max_length:
+            if current_chunk:
+                chunks.append(current_chunk)
+                current_chunk = ""
+            chunks.extend(split_text_into_chunks(line, max_length))
+        elif current_chunk and len(current_chunk) + 1 + len(line) > max_length:
+            chunks.append(current_chunk)
+            current_chunk = line
+        else:
+            current_chunk = f"{current_chunk}\n{line}" if current_chunk else line
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
 
 def split_text_into_chunks(text: str, max_length: int = 500) -> List[str]:
     """Split text into chunks of maximum length, trying to break at sentence boundaries."""
@@ -254,8 +363,8 @@ def split_text_into_chunks(text: str, max_length: int = 500) -> List[str]:
                         
                         # If the part is still too long, just split it by length
                         if len(part) > max_length:
-                            for i in range(0, len(part), max_length):
-                                chunks.append(part[i:i+max_length])
+                            # Break between words where possible
+                            chunks.extend(textwrap.wrap(part, max_length))
                             current_chunk = ""
                         else:
                             current_chunk = part + " "
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import urlparse
+
+from .get_page_content import get_page_content
+from .http_cache import HttpClient
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 5
+DEFAULT_PER_HOST = 2
+DEFAULT_BUDGET = 15.0  # seconds for the whole batch of fetches
+GOOD_ENOUGH = 2.5  # stop waiting for slower pages once a candidate scores this
+
+# Frequent Spanish function words; lyrics pages are dense with them, menus
+# and cookie banners are not
+SPANISH_WORDS = {
+    'el', 'la', 'los', 'las', 'un', 'una', 'de', 'del', 'en', 'y', 'que', 'a',
+    'por', 'para', 'con', 'sin', 'me', 'te', 'se', 'mi', 'tu', 'su', 'yo', 'no',
+    'es', 'lo', 'le', 'al', 'como', 'pero', 'más', 'si', 'ya', 'quiero', 'eres',
+    'soy', 'estoy', 'amor', 'corazón', 'vida', 'cuando', 'porque', 'donde', 'todo',
+}
+BOILERPLATE = re.compile(
+    r'cookies?|javascript|privacy|privacidad|copyright|©|iniciar sesión|suscríbete|newsletter',
+    re.IGNORECASE
+)
+
+def score_lyrics(page: Dict[str, Any], query_terms: List[str] = ()) -> float:
+    """
+    Score how likely a fetched page holds the song's complete Spanish lyrics.
+
+    Args:
+        page (Dict[str, Any]): A get_page_content result
+        query_terms (List[str]): Lowercase words from the search (title, artist)
+
+    Returns:
+        float: 0 for unusable pages, higher is better
+    """
+    text = page.get("spanish_lyrics") or ""
+    words = re.findall(r"[a-záéíóúüñ]+", text.lower())
+    if len(words) < 30:
+        return 0.0
+
+    spanish_ratio = sum(1 for w in words if w in SPANISH_WORDS) / len(words)
+    # Songs run a few hundred words; longer blocks are usually whole pages
+    length = min(len(words), 300) / 300
+    if len(words) > 1500:
+        length -= 0.5
+    boilerplate = len(BOILERPLATE.findall(text))
+
+    score = 4 * spanish_ratio + length - 0.2 * boilerplate
+    metadata = (page.get("metadata") or "").lower()
+    if query_terms and any(term in metadata for term in query_terms):
+        score += 0.5
+    return round(max(score, 0.0), 3)
+
+def _candidate_urls(results: Union[List[Dict[str, str]], List[str], str], top_k: int) -> List[str]:
+    if isinstance(results, str):
+        try:
+            results = json.loads(results)
+        except json.JSONDecodeError:
+            results = [results]
+    urls = []
+    for result in results or []:
+        url = (result.get("url") or result.get("link")) if isinstance(result, dict) else result
+        if url and urlparse(url).scheme in ("http", "https") and url not in urls:
+            urls.append(url)
+    return urls[:top_k]
+
+async def fetch_best_lyrics(results: Union[List[Dict[str, str]], List[str], str],
+                            query: str = "",
+                            top_k: int = DEFAULT_TOP_K,
+                            per_host: int = DEFAULT_PER_HOST,
+                            budget: float = DEFAULT_BUDGET,
+                            client: Optional[HttpClient] = None) -> Dict[str, Any]:
+    """
+    Fetch the top search results concurrently and return the best lyrics.
+
+    Args:
+        results: search_web_serp results (or plain URLs, or their JSON)
+        query (str): The search query, used to favour pages about the right song
+        top_k (int): How many of the results to fetch
+        per_host (int): Most fetches to run against one host at a time
+        budget (float): Seconds to wait for the whole batch
+        client (HttpClient): Pooled, cached client to fetch with (defaults to the shared one)
+
+    Returns:
+        Dict[str, Any]: The best page in get_page_content's format, plus its
+        score and how every candidate fared
+    """
+    urls = _candidate_urls(results, int(top_k))
+    logger.info(f"Fetching {len(urls)} candidate pages")
+    if not urls:
+        return {"success": False, "error": "No candidate URLs", "candidates": []}
+
+    query_terms = [w for w in re.findall(r"\w+", query.lower()) if len(w) > 3]
+    hosts = {}
+
+    async def fetch(url):
+        host = urlparse(url).netloc
+        limit = hosts.setdefault(host, asyncio.Semaphore(int(per_host)))
+        async with limit:
+            page = await get_page_content(url, client=client)
+        return url, page
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(fetch(url)) for url in urls]
+    candidates = {url: {"url": url, "score": None, "error": "Not needed"} for url in urls}
+    best = None
+    try:
+        for next_done in asyncio.as_completed(tasks, timeout=float(budget)):
+            url, page = await next_done
+            if not page.get("success"):
+                candidates[url]["error"] = page.get("error", "Fetch failed")
+                continue
+            score = score_lyrics(page, query_terms)
+            candidates[url] = {"url": url, "score": score}
+            if score > 0 and (best is None or score > best["score"]):
+                best = {**page, "score": score}
+            if best and best["score"] >= GOOD_ENOUGH:
+                break
+    except asyncio.TimeoutError:
+        logger.warning(f"Fetch budget of {budget}s used up")
+        for url, task in zip(urls, tasks):
+            if not task.done():
+                candidates[url]["error"] = "Timed out"
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Let the cancelled fetches unwind and release their connections
+        # before the caller moves on (or closes the session)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    elapsed = round(time.perf_counter() - started, 3)
+    summary = list(candidates.values())
+    if best is None:
+        logger.info(f"No usable lyrics among {len(urls)} pages ({elapsed}s)")
+        return {"success": False, "error": "No page had usable lyrics", "candidates": summary, "seconds": elapsed}
+
+    logger.info(f"Best lyrics from {best['url']} (score {best['score']}, {elapsed}s)")
+    return {**best, "candidates": summary, "seconds": elapsed}
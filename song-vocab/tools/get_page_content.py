@@ -1,29 +1,44 @@
-import aiohttp
+import asyncio
 from bs4 import BeautifulSoup
 from typing import Dict, Optional, Any
 import re
 import logging
-import requests
+from .http_cache import HttpClient, http_client
+from .language_id import is_english, is_spanish
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # lxml is optional; BeautifulSoup does the same job, slower
+    lxml_html = None
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Define headers for HTTP requests
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-    'Accept-Language': 'en-US,en;q=0.5',
-    'Connection': 'keep-alive',
-    'Upgrade-Insecure-Requests': '1',
-    'Cache-Control': 'max-age=0'
-}
-
-def get_page_content(url: str) -> Dict[str, Any]:
+# Elements whose text is never lyrics
+SKIP_TAGS = {'script', 'style', 'header', 'footer', 'nav'}
+
+# Common patterns for lyrics containers, as (attribute, regex or exact class),
+# in order of preference
+LYRICS_PATTERNS = [
+    # Class patterns
+    ('class', re.compile(r"lyrics?|letra|original|español", re.I)),
+    ('class', re.compile(r"song-content|song-text|track-text", re.I)),
+    # ID patterns
+    ('id', re.compile(r"lyrics?|letra|original|español", re.I)),
+    # Common Spanish lyrics sites patterns
+    ('class', "lyrics_box"),
+    ('class', "letra"),
+    ('class', "english")
+]
+
+async def get_page_content(url: str, client: Optional[HttpClient] = None) -> Dict[str, Any]:
     """
     Get the content of a web page and extract lyrics if possible.
     
     Args:
         url (str): URL of the web page to get content from
+        client (HttpClient): Pooled, cached client to fetch with (defaults to the shared one)
         
     Returns:
         Dict[str, Any]: Dictionary with page content and extracted lyrics
@@ -31,21 +46,17 @@ def get_page_content(url: str) -> Dict[str, Any]:
     logger.info(f"Getting content from URL: {url}")
     
     try:
-        # Make the request
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        
-        # Get the HTML content
-        html = response.text
+        # Get the HTML content; pages fetched before come from the cache
+        html = await (client or http_client).get_text(url)
         logger.debug(f"Got HTML content of length {len(html)}")
         
-        # Extract the lyrics
-        lyrics_data = extract_lyrics_from_html(html, url)
+        # Extract the lyrics; parsing is CPU-bound, so keep it off the event loop
+        lyrics_data = await asyncio.to_thread(extract_lyrics_from_html, html, url)
         
         # Log the results
-        spanish_lyrics = lyrics_data.get("spanish_lyrics", "")
-        english_lyrics = lyrics_data.get("english_lyrics", "")
-        metadata = lyrics_data.get("metadata", "")
+        spanish_lyrics = lyrics_data.get("spanish_lyrics") or ""
+        english_lyrics = lyrics_data.get("english_lyrics") or ""
+        metadata = lyrics_data.get("metadata") or ""
         
         logger.info(f"Extracted Spanish lyrics: {len(spanish_lyrics)} chars")
         logger.info(f"Extracted English lyrics: {len(english_lyrics)} chars")
@@ -68,29 +79,40 @@ def get_page_content(url: str) -> Dict[str, Any]:
             "success": False
         }
 
-def extract_lyrics_from_html(html: str, url: str) -> Dict[str, Optional[str]]:
+def extract_lyrics_from_html(html: str, url: str, backend: Optional[str] = None) -> Dict[str, Optional[str]]:
     """
     Extract lyrics from HTML content based on common patterns in lyrics websites.
+
+    `backend` is "lxml" (the default when lxml is installed) or "soup"; both
+    give the same result, lxml in a single pass over a C-parsed tree.
+    """
+    if backend is None:
+        backend = "lxml" if lxml_html is not None else "soup"
+    if backend == "lxml":
+        try:
+            return extract_lyrics_lxml(html, url)
+        except (etree.ParserError, ValueError, RecursionError) as e:
+            # Empty documents, XML declarations in str input, absurdly deep trees
+            logger.warning(f"lxml could not parse {url} ({e}), falling back to BeautifulSoup")
+    return extract_lyrics_soup(html, url)
+
+def extract_lyrics_soup(html: str, url: str) -> Dict[str, Optional[str]]:
+    """
+    Extract lyrics with BeautifulSoup's html.parser.
     """
     logger.info("Starting lyrics extraction from HTML")
+    # Browsers (and lxml) read CRLF and lone CR line breaks as LF
+    html = html.replace('\r\n', '\n').replace('\r', '\n')
     soup = BeautifulSoup(html, 'html.parser')
     
     # Remove script and style elements
     logger.debug("Cleaning HTML content...")
-    for element in soup(['script', 'style', 'header', 'footer', 'nav']):
+    for element in soup(list(SKIP_TAGS)):
         element.decompose()
     
-    # Common patterns for lyrics containers
     lyrics_patterns = [
-        # Class patterns
-        {"class_": re.compile(r"lyrics?|letra|original|español", re.I)},
-        {"class_": re.compile(r"song-content|song-text|track-text", re.I)},
-        # ID patterns
-        {"id": re.compile(r"lyrics?|letra|original|español", re.I)},
-        # Common Spanish lyrics sites patterns
-        {"class_": "lyrics_box"},
-        {"class_": "letra"},
-        {"class_": "english"}
+        {"class_" if attribute == 'class' else attribute: match}
+        for attribute, match in LYRICS_PATTERNS
     ]
     
     spanish_lyrics = None
@@ -109,10 +131,11 @@ def extract_lyrics_from_html(html: str, url: str) -> Dict[str, Optional[str]]:
             logger.debug(f"Extracted text length: {len(text)} chars")
             
             # Detect if text is primarily Spanish or English
-            if is_primarily_spanish(text) and not spanish_lyrics:
-                logger.info("Found Spanish lyrics")
-                spanish_lyrics = text
-            elif not is_primarily_spanish(text) and not english_lyrics:
+            if is_primarily_spanish(text):
+                if not spanish_lyrics:
+                    logger.info("Found Spanish lyrics")
+                    spanish_lyrics = text
+            elif is_primarily_english(text) and not english_lyrics:
                 logger.info("Found possible English lyrics")
                 english_lyrics = text
     
@@ -146,6 +169,102 @@ def extract_lyrics_from_html(html: str, url: str) -> Dict[str, Optional[str]]:
         "metadata": metadata.strip()
     }
 
+def _pattern_index(element) -> Optional[int]:
+    """Index of the first LYRICS_PATTERNS entry an element matches, or None.
+
+    Mirrors BeautifulSoup's matching: a class pattern is tried against each
+    class and against the whole class attribute.
+    """
+    classes = (element.get('class') or '').split()
+    element_id = element.get('id')
+    for index, (attribute, match) in enumerate(LYRICS_PATTERNS):
+        if attribute == 'class':
+            values = classes + [' '.join(classes)] if classes else []
+        else:
+            values = [element_id] if element_id is not None else []
+        for value in values:
+            if match.search(value) if hasattr(match, 'search') else value == match:
+                return index
+    return None
+
+def extract_lyrics_lxml(html: str, url: str) -> Dict[str, Optional[str]]:
+    """
+    Extract lyrics with lxml, in one traversal of the tree.
+
+    Gives the same result as extract_lyrics_soup(). Skipped elements are left
+    out while collecting text instead of being removed from the tree, and
+    every candidate (lyrics containers, paragraphs, title tags) is recorded
+    on the way, tagged with its document position so the BeautifulSoup
+    search order can be reproduced.
+    """
+    logger.info("Starting lyrics extraction from HTML (lxml)")
+    root = lxml_html.document_fromstring(html)
+
+    containers = []  # (pattern index, position, text)
+    paragraphs = []  # (position, text)
+    titles = []      # (position, text)
+    position = 0
+
+    def walk(element) -> str:
+        nonlocal position
+        position += 1
+        here = position
+        parts = [element.text or ""]
+        for child in element:
+            # Comments and processing instructions only contribute their tail
+            if isinstance(child.tag, str) and child.tag not in SKIP_TAGS:
+                parts.append(walk(child))
+            parts.append(child.tail or "")
+        text = "".join(parts)
+
+        pattern = _pattern_index(element)
+        if pattern is not None:
+            containers.append((pattern, here, text))
+        if element.tag == 'p':
+            paragraphs.append((here, text))
+        elif element.tag in ('h1', 'h2', 'title'):
+            titles.append((here, text))
+        return text
+
+    if root.tag not in SKIP_TAGS:
+        walk(root)
+
+    spanish_lyrics = None
+    english_lyrics = None
+    # The BeautifulSoup extractor visits pattern by pattern, each in document
+    # order, and keeps the first Spanish and the first English text
+    for _, _, raw in sorted(containers):
+        text = clean_text(raw)
+        if is_primarily_spanish(text):
+            if not spanish_lyrics:
+                spanish_lyrics = text
+        elif is_primarily_english(text) and not english_lyrics:
+            english_lyrics = text
+
+    if not spanish_lyrics:
+        # Largest paragraphs first, ties in document order
+        paragraphs.sort(key=lambda p: (-len(p[1]), p[0]))
+        for _, raw in paragraphs[:5]:
+            text = clean_text(raw)
+            if len(text) > 100 and is_primarily_spanish(text):  # Minimum length for lyrics
+                spanish_lyrics = text
+                break
+
+    metadata = ""
+    for _, raw in sorted(titles):
+        tag_text = raw.strip()
+        if tag_text and len(tag_text) < 100:  # Reasonable length for a title
+            metadata += tag_text + "\n"
+
+    logger.info(f"Extraction complete. Spanish lyrics: {'found' if spanish_lyrics else 'not found'}, "
+                f"English lyrics: {'found' if english_lyrics else 'not found'}")
+
+    return {
+        "spanish_lyrics": spanish_lyrics,
+        "english_lyrics": english_lyrics,
+        "metadata": metadata.strip()
+    }
+
 def clean_text(text: str) -> str:
     """
     Clean extracted text by removing extra whitespace and unnecessary characters.
@@ -163,26 +282,12 @@ def clean_text(text: str) -> str:
 
 def is_primarily_spanish(text: str) -> bool:
     """
-    Check if text contains primarily Spanish characters and words.
+    Check if text is mostly Spanish (see tools/language_id.py).
     """
-    # Common Spanish words to check for
-    spanish_words = {'el', 'la', 'en', 'de', 'que', 'y', 'con', 'por', 'para'}
-    words = set(text.lower().split())
-    spanish_word_count = len(words.intersection(spanish_words))
-    
-    # Check for Spanish-specific characters
-    spanish_chars = len(re.findall(r'[áéíóúñ¿¡]', text))
-    
-    return spanish_word_count > 0 or spanish_chars > 0
+    return is_spanish(text)
 
 def is_primarily_english(text: str) -> bool:
     """
-    Check if text contains primarily English words.
+    Check if text is mostly English (see tools/language_id.py).
     """
-    # Common English words to check for
-    english_words = {'the', 'and', 'in', 'to', 'of', 'a', 'is', 'that', 'for', 'it'}
-    words = set(text.lower().split())
-    english_word_count = len(words.intersection(english_words))
-    
-    # No special characters to check for English
-    return english_word_count > 0
\ No newline at end of file
+    return is_english(text)
@@ -0,0 +1,209 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Pooled, cached HTTP GETs for scraping lyrics pages.
+#
+# Pages are stored on disk keyed by URL, with the validators the server sent
+# (ETag, Last-Modified). Within the TTL a page is served from disk without any
+# request; after that it is revalidated with If-None-Match/If-Modified-Since
+# and a 304 reuses the stored body. All requests go through one aiohttp
+# session per event loop, so connections are kept alive and reused.
+
+DEFAULT_DIRECTORY = Path(__file__).parent.parent / 'outputs' / 'http_cache'
+DEFAULT_TTL = 24 * 3600
+
+# Define headers for HTTP requests
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+class HttpCache:
+    """On-disk store of GET responses: `<sha256(url)>.json` holds the
+    metadata, `<sha256(url)>.body` the raw bytes."""
+
+    def __init__(self, directory: Path = DEFAULT_DIRECTORY, ttl: float = DEFAULT_TTL):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        self.hits = 0          # served from disk without a request
+        self.revalidated = 0   # 304 from the server, stored body reused
+        self.misses = 0
+        self.stores = 0
+        self.bytes_saved = 0   # body bytes not downloaded thanks to the cache
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return self.directory / f'{key}.json', self.directory / f'{key}.body'
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Stored entry for `url` (metadata plus `body`), or None."""
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            meta['body'] = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url:
+            return None
+        return meta
+
+    def fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry['stored_at'] < self.ttl
+
+    def put(self, url: str, body: bytes, etag: Optional[str] = None,
+            last_modified: Optional[str] = None, encoding: Optional[str] = None):
+        meta_path, body_path = self._paths(url)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': encoding,
+            'stored_at': time.time(),
+            'size': len(body),
+        }
+        # Body first, so a readable metadata file always has its body
+        self._write(body_path, body)
+        self._write(meta_path, json.dumps(meta).encode('utf-8'))
+        with self._lock:
+            self.stores += 1
+
+    def refresh(self, url: str, entry: Dict[str, Any]):
+        """Restart the TTL of an entry the server confirmed is unchanged."""
+        meta = {k: v for k, v in entry.items() if k != 'body'}
+        meta['stored_at'] = time.time()
+        self._write(self._paths(url)[0], json.dumps(meta).encode('utf-8'))
+
+    def _write(self, path: Path, data: bytes):
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def record(self, outcome: str, size: int = 0):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            if outcome in ('hits', 'revalidated'):
+                self.bytes_saved += size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.revalidated + self.misses
+            return {
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'stores': self.stores,
+                'hit_rate': round((self.hits + self.revalidated) / lookups, 3) if lookups else None,
+                'bytes_saved': self.bytes_saved,
+            }
+
+class HttpClient:
+    """GETs through a kept-alive connection pool and an optional HttpCache.
+
+    aiohttp sessions belong to the event loop they were created on, so one is
+    kept per loop; call aclose() before a loop ends.
+    """
+
+    def __init__(self, cache: Optional[HttpCache] = None, limit: int = 20,
+                 limit_per_host: int = 4, timeout: float = 10):
+        self.cache = cache
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._sessions = {}  # event loop -> ClientSession
+        self._lock = threading.Lock()  # loops may run on different threads
+
+    def _session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # Forget sessions of loops that have finished
+            for other in [l for l in self._sessions if l.is_closed()]:
+                del self._sessions[other]
+            session = self._sessions.get(loop)
+            if session is None or session.closed:
+                connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                                 ttl_dns_cache=300)
+                session = aiohttp.ClientSession(headers=HEADERS, timeout=self.timeout, connector=connector)
+                self._sessions[loop] = session
+            return session
+
+    async def get_text(self, url: str) -> str:
+        """Body of `url` as text, from the cache when possible."""
+        entry = self.cache.get(url) if self.cache else None
+        if entry is not None and self.cache.fresh(entry):
+            self.cache.record('hits', entry['size'])
+            logger.debug(f"Cache hit for {url}")
+            return self._decode(entry)
+
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        async with self._session().get(url, headers=headers) as response:
+            if response.status == 304 and entry is not None:
+                self.cache.record('revalidated', entry['size'])
+                self.cache.refresh(url, entry)
+                logger.debug(f"Revalidated {url}")
+                return self._decode(entry)
+            response.raise_for_status()
+            body = await response.read()
+            encoding = response.get_encoding()
+
+            if self.cache:
+                self.cache.record('misses')
+                if 'no-store' not in response.headers.get('Cache-Control', ''):
+                    self.cache.put(
+                        url, body,
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified'),
+                        encoding=encoding
+                    )
+        return body.decode(encoding or 'utf-8', errors='replace')
+
+    def _decode(self, entry: Dict[str, Any]) -> str:
+        return entry['body'].decode(entry.get('encoding') or 'utf-8', errors='replace')
+
+    async def aclose(self):
+        """Close the session of the running loop."""
+        with self._lock:
+            session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats() if self.cache else {}
+
+# Shared by every page fetch in the process
+http_client = HttpClient(HttpCache(
+    Path(os.getenv('PAGE_CACHE_DIR', DEFAULT_DIRECTORY)),
+    ttl=float(os.getenv('PAGE_CACHE_TTL', DEFAULT_TTL))
+))
@@ -0,0 +1,190 @@
+import math
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+# Spanish-vs-English scoring for scraped text.
+#
+# Every word gets a log-likelihood ratio log P(word|es) - log P(word|en):
+# function words are looked up in frequency tables, other words are scored
+# from their character trigrams plus letters only one language uses (ñ, á,
+# w, apostrophes...). A word's vote is capped, so no single word can decide
+# a text, and the Spanish ratio is the Spanish share of all the votes. A page
+# that is half Spanish lyrics and half English translation scores about 0.5
+# instead of "Spanish" because it contains "de" once.
+#
+# The tables are built once at import; scoring is one regex pass over the
+# text with per-word results cached, since lyrics repeat their words a lot.
+
+# Occurrences per million words in general text, for the most frequent words
+SPANISH_WORDS = {
+    'de': 65000, 'la': 41000, 'que': 36000, 'el': 35000, 'en': 28000, 'y': 27000,
+    'a': 21000, 'los': 17000, 'se': 12000, 'del': 11000, 'las': 11000, 'un': 10000,
+    'por': 10000, 'con': 8000, 'no': 8000, 'una': 8000, 'su': 6000, 'para': 6000,
+    'es': 6000, 'al': 5000, 'lo': 5000, 'como': 4500, 'más': 4000, 'o': 3800,
+    'pero': 3000, 'sus': 2800, 'le': 2700, 'ha': 2500, 'me': 2400, 'si': 2200,
+    'sin': 2000, 'sobre': 1900, 'este': 1800, 'ya': 1800, 'entre': 1500,
+    'cuando': 1500, 'todo': 1400, 'esta': 1400, 'ser': 1300, 'son': 1300,
+    'dos': 1200, 'también': 1200, 'fue': 1200, 'había': 1100, 'era': 1000,
+    'muy': 1000, 'hasta': 900, 'desde': 900, 'está': 900, 'mi': 900,
+    'porque': 800, 'qué': 800, 'yo': 700, 'hay': 700, 'nos': 600, 'ni': 600,
+    'así': 600, 'todos': 600, 'tiene': 500, 'él': 500, 'donde': 500, 'bien': 500,
+    'ahora': 450, 'cada': 400, 'e': 400, 'vida': 400, 'te': 400, 'después': 400,
+    'aunque': 400, 'eso': 350, 'tu': 350, 'nada': 300, 'siempre': 300, 'tú': 300,
+    'nunca': 200, 'mí': 200, 'ti': 200, 'amor': 200, 'soy': 200, 'quiero': 200,
+    'corazón': 150, 'noche': 150, 'eres': 150, 'estoy': 150, 'cómo': 150,
+    'dónde': 100, 'contigo': 80,
+}
+ENGLISH_WORDS = {
+    'the': 56000, 'of': 31000, 'and': 28000, 'to': 26000, 'a': 23000, 'in': 18000,
+    'that': 11000, 'is': 10000, 'it': 10000, 'you': 9000, 'was': 9000, 'for': 8500,
+    'i': 8000, 'on': 7000, 'he': 7000, 'as': 7000, 'with': 7000, 'his': 6500,
+    'be': 6000, 'at': 5000, 'this': 5000, 'by': 5000, 'are': 4500, 'from': 4500,
+    'they': 4000, 'have': 4000, 'but': 4000, 'or': 3500, 'had': 3500, 'not': 3500,
+    'an': 3500, 'one': 3000, 'were': 3000, 'we': 3000, 'her': 3000, 'which': 3000,
+    'what': 2500, 'all': 2500, 'there': 2500, 'she': 2500, 'their': 2500,
+    'when': 2000, 'can': 2000, 'do': 2000, 'if': 2000, 'will': 2000,
+    'your': 1800, 'up': 1800, 'so': 1800, 'my': 1800, 'out': 1700, 'said': 1500,
+    'about': 1500, 'them': 1500, 'me': 1500, 'no': 1500, 'like': 1500,
+    'time': 1500, 'now': 1500, 'how': 1200, 'then': 1200, 'just': 1000,
+    'know': 1000, 'go': 800, "don't": 800, "it's": 700, "i'm": 600, 'want': 600,
+    'never': 600, 'love': 600, 'feel': 300, 'heart': 200, 'night': 200,
+}  # no "oh", "yeah" or "baby": Spanish lyrics use them just as much
+WORD_SMOOTHING = 50  # per million, for a function word the other language lacks
+
+# Most frequent character trigrams, most frequent first ("_" marks a word edge)
+SPANISH_TRIGRAMS = (
+    '_de', 'de_', '_la', 'la_', 'os_', '_el', 'el_', 'es_', '_qu', 'que', 'ue_',
+    'as_', '_en', 'en_', 'ent', '_co', 'on_', 'con', 'ión', 'ció', 'ado', 'nte',
+    'los', '_lo', '_se', 'ien', 'par', 'ara', '_pa', 'est', 'sta', 'res', 'tra',
+    'ero', 'ida', 'ada', 'ndo', 'mos', 'nto', 'ora', 'era', 'por', '_po', '_un',
+    'una', 'do_', 'te_', 'to_', 'ta_', 'ia_', 'ar_', 'er_', 'ir_', '_es', 'sa_',
+    'ra_', 'ro_', 'no_', 'mo_', 'an_', 'ano', 'aba', 'ari', 'cia', 'ios',
+    'ene', 'qui', 'ues', 'rse', 'amo', 'emo', 'ñor', 'ño_', 'cie', 'mie', 'nci',
+    'rá_', 'ón_', 'ás_', 'llo', 'lla', 'ell', 'yo_', '_yo', 'jo_', 'ja_', 'oy_',
+    'ces', 'ías',
+)
+ENGLISH_TRIGRAMS = (
+    '_th', 'the', 'he_', 'ing', 'ng_', 'ed_', '_an', 'and', 'nd_', '_to', 'to_',
+    '_of', 'of_', 'ion', '_in', 'in_', 'er_', 'ent', 'is_', '_is', 'at_', 'hat',
+    'tha', 're_', '_wh', 'll_', 'you', 'ou_', '_yo', '_be', 'ly_', 've_', 'ht_',
+    'igh', 'ght', 'ow_', '_my', 'my_', 'wit', 'ith', 'th_', '_it', 'it_', '_ha',
+    'ave', 'hav', 'her', 'ere', 'rs_', 'ts_', 'ss_', 'ck_', 'ke_', 'ks_', '_kn',
+    'now', 'sh_', '_sh', 'ay_', 'ey_', 'ays', 'ugh', 'uld', 'oul', 'ld_', 'wn_',
+    'own', '_we', 'we_', 'ew_', 'ove', 'lov', 'ee_', 'eet', 'ood', 'ook',
+    'ir_', 'ur_', 'our', 'ry_', 'dy_', 'by_', 'ty_', 'nk_', "'s_", "n't", "'m_",
+    "'ll", "'re", "'ve",
+)
+TRIGRAM_FLOOR = 0.2   # probability of an unlisted trigram, as a share of the last rank's
+TRIGRAM_SCALE = 0.35  # trigrams of one word are far from independent evidence
+
+# Letters, or runs of letters, one language practically never uses
+SPANISH_MARKS = re.compile(r'[ñáéíóú]|ü(?=[ei])')
+ENGLISH_MARKS = re.compile(r"w|k|sh|th|\w'\w")
+MARK_WEIGHT = 1.5
+
+MAX_VOTE = 3.0      # cap on one word's say, in log-likelihood units
+MIN_EVIDENCE = 2.0  # less total evidence than this and the language is unknown
+SPANISH_THRESHOLD = 0.65
+ENGLISH_THRESHOLD = 0.35
+
+WORD = re.compile(r"[a-záéíóúüñ]+(?:'[a-z]+)?")
+
+def _zipf_log_probs(ranked):
+    # Rank r gets probability ~ 1/(r + 10); only the ratios matter
+    return {gram: -math.log(rank + 10) for rank, gram in enumerate(ranked)}
+
+def _build_trigram_table():
+    spanish = _zipf_log_probs(SPANISH_TRIGRAMS)
+    english = _zipf_log_probs(ENGLISH_TRIGRAMS)
+    spanish_floor = -math.log(len(SPANISH_TRIGRAMS) + 10) + math.log(TRIGRAM_FLOOR)
+    english_floor = -math.log(len(ENGLISH_TRIGRAMS) + 10) + math.log(TRIGRAM_FLOOR)
+    return {
+        gram: spanish.get(gram, spanish_floor) - english.get(gram, english_floor)
+        for gram in set(spanish) | set(english)
+    }
+
+def _build_word_table():
+    return {
+        word: math.log((SPANISH_WORDS.get(word, 0) + WORD_SMOOTHING)
+                       / (ENGLISH_WORDS.get(word, 0) + WORD_SMOOTHING))
+        for word in set(SPANISH_WORDS) | set(ENGLISH_WORDS)
+    }
+
+TRIGRAM_LOG_RATIOS = _build_trigram_table()
+WORD_LOG_RATIOS = _build_word_table()
+
+class LanguageScore(NamedTuple):
+    spanish: float   # summed votes for Spanish
+    english: float   # summed votes for English
+    words: int       # words that voted
+
+    @property
+    def spanish_ratio(self) -> Optional[float]:
+        """Spanish share of the evidence, or None when there is too little."""
+        total = self.spanish + self.english
+        if total < MIN_EVIDENCE:
+            return None
+        return self.spanish / total
+
+@lru_cache(maxsize=50000)
+def word_log_ratio(word: str) -> float:
+    """
+    Evidence one lowercase word gives for Spanish (positive) or English
+    (negative), capped at MAX_VOTE either way.
+    """
+    if word in WORD_LOG_RATIOS:
+        score = WORD_LOG_RATIOS[word]
+    else:
+        padded = f'_{word}_'
+        score = TRIGRAM_SCALE * sum(TRIGRAM_LOG_RATIOS.get(padded[i:i + 3], 0.0)
+                                    for i in range(len(padded) - 2))
+        score += MARK_WEIGHT * (len(SPANISH_MARKS.findall(word)) - len(ENGLISH_MARKS.findall(word)))
+    return max(-MAX_VOTE, min(MAX_VOTE, score))
+
+def score_text(text: str) -> LanguageScore:
+    """
+    Spanish and English evidence in a text, in a single pass over its words.
+
+    Args:
+        text (str): Any text; case and punctuation don't matter
+
+    Returns:
+        LanguageScore: The votes for each language and how many words voted
+    """
+    spanish = english = 0.0
+    words = 0
+    for match in WORD.finditer(text.lower()):
+        score = word_log_ratio(match.group())
+        if score > 0:
+            spanish += score
+        elif score < 0:
+            english -= score
+        else:
+            continue
+        words += 1
+    return LanguageScore(spanish, english, words)
+
+def spanish_ratio(text: str) -> Optional[float]:
+    """
+    How Spanish a text is, from 0 (English) to 1 (Spanish); about 0.5 for a
+    text that mixes both evenly. None when the text has too few words to
+    tell, e.g. "Edit", "[Coro]" or an empty string.
+    """
+    return score_text(text).spanish_ratio
+
+def is_spanish(text: str, threshold: float = SPANISH_THRESHOLD) -> bool:
+    ratio = spanish_ratio(text)
+    return ratio is not None and ratio >= threshold
+
+def is_english(text: str, threshold: float = ENGLISH_THRESHOLD) -> bool:
+    ratio = spanish_ratio(text)
+    return ratio is not None and ratio <= threshold
+
+def drop_english_lines(lyrics: str) -> str:
+    """
+    Remove lines that are clearly English, such as a translation printed
+    between the Spanish lines. Lines too short to tell are kept.
+    """
+    kept: List[str] = [line for line in lyrics.split('\n') if not is_english(line)]
+    return '\n'.join(kept)
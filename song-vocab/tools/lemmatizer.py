@@ -0,0 +1,207 @@
+import unicodedata
+from typing import Dict, Iterator, List, Optional
+
+# Rule-based Spanish lemmatization.
+#
+# candidate_lemmas() lists the dictionary forms a word could come from, most
+# likely first: the word itself, singular/masculine forms, irregular verb
+# forms, then regular conjugations undone for each verb class, with stem
+# changes (quiero -> querer) and spelling changes (busqué -> buscar), and
+# attached pronouns removed (mirándote -> mirar). The rules over-generate on
+# purpose and a lexicon decides which candidate is a real word, but a
+# candidate that a real word happens to match becomes that word's entry. So a
+# verb is only proposed where its own paradigm has that ending: "sala" is not
+# salir, whose subjunctive is "salga". lemma_readings() also tells how each
+# candidate was reached, so "seres" (beings) can't match the verb ser.
+
+# Irregular verb forms that the regular rules can't undo
+IRREGULAR_FORMS = {
+    'ser': 'soy eres es somos sois son fui fuiste fue fuimos fuisteis fueron era eras éramos erais eran '
+           'sea seas seamos seáis sean fuera fueras fuéramos fueran fuese sido siendo',
+    'estar': 'estoy estás está estamos estáis están estuve estuviste estuvo estuvimos estuvieron '
+             'esté estés estemos estén estuviera estuvieras estuvieran',
+    'ir': 'voy vas va vamos vais van iba ibas íbamos ibais iban vaya vayas vayamos vayan ve id yendo ido',
+    'haber': 'he has ha hemos habéis han hay había habías habíamos habían hube hubo haya hayas hayamos '
+             'hayan hubiera hubieras hubieran habrá habría',
+    'tener': 'tengo tienes tiene tenemos tienen tuve tuviste tuvo tuvimos tuvieron tenga tengas tengamos '
+             'tengan tuviera tuvieras tuvieran tendré tendrás tendrá tendremos tendrán tendría tendrías ten',
+    'hacer': 'hago haces hace hacemos hacen hice hiciste hizo hicimos hicieron haga hagas hagamos hagan '
+             'hiciera hicieras hicieran haré harás hará haremos harán haría harías haz hecho',
+    'decir': 'digo dices dice decimos dicen dije dijiste dijo dijimos dijeron diga digas digamos digan '
+             'dijera dijeras dijeran diré dirás dirá diremos dirán diría dirías di dicho diciendo',
+    'venir': 'vengo vienes viene venimos vienen vine viniste vino vinimos vinieron venga vengas vengamos '
+             'vengan viniera vinieras vinieran vendré vendrás vendrá vendremos vendrán vendría ven viniendo',
+    'poder': 'puedo puedes puede podemos pueden pude pudiste pudo pudimos pudieron pueda puedas podamos '
+             'puedan pudiera pudieras pudieran podré podrás podrá podremos podrán podría podrías pudiendo',
+    'querer': 'quiero quieres quiere queremos quieren quise quisiste quiso quisimos quisieron quiera '
+              'quieras queramos quieran quisiera quisieras quisieran querré querrás querrá querría querrías',
+    'saber': 'sé sabes sabe sabemos saben supe supiste supo supimos supieron sepa sepas sepamos sepan '
+             'supiera supieras supieran sabré sabrás sabrá sabría',
+    'ver': 'veo ves ve vemos ven vi viste vio vimos vieron vea veas veamos vean veía veías veían visto',
+    'dar': 'doy das da damos dan di diste dio dimos dieron dé des demos den diera dieras dieran',
+    'poner': 'pongo pones pone ponemos ponen puse pusiste puso pusimos pusieron ponga pongas pongan '
+             'pusiera pondré pondrás pondrá pondría pon puesto',
+    'salir': 'salgo sales sale salimos salen salga salgas salgan saldré saldrás saldrá saldría sal',
+    'oír': 'oigo oyes oye oímos oyen oí oyó oyeron oiga oigas oigan oyendo',
+    'traer': 'traigo traes trae traje trajiste trajo trajeron traiga traigas traigan trajera',
+    'caer': 'caigo caes cae caí cayó cayeron caiga caigas caigan cayendo',
+    'morir': 'muero mueres muere murió murieron muera mueras mueran muerto muriendo',
+    'dormir': 'duermo duermes duerme durmió durmieron duerma duermas duerman durmiendo',
+    'sentir': 'siento sientes siente sintió sintieron sienta sientas sientan sintiera sintiendo',
+}
+# Some forms belong to several verbs (di: decir and dar, ve: ir and ver)
+IRREGULAR = {}
+for lemma, forms in IRREGULAR_FORMS.items():
+    for form in forms.split():
+        IRREGULAR.setdefault(form, []).append(lemma)
+
+# Regular endings and the infinitive endings they can come from
+VERB_ENDINGS = {
+    # Present indicative and subjunctive
+    'o': ('ar', 'er', 'ir'), 'as': ('ar', 'er', 'ir'), 'a': ('ar', 'er', 'ir'),
+    'amos': ('ar', 'er', 'ir'), 'áis': ('ar', 'er', 'ir'), 'an': ('ar', 'er', 'ir'),
+    'es': ('er', 'ir', 'ar'), 'e': ('er', 'ir', 'ar'), 'emos': ('er', 'ar'),
+    'éis': ('er', 'ar'), 'en': ('er', 'ir', 'ar'), 'imos': ('ir',), 'ís': ('ir',),
+    # Preterite
+    'é': ('ar',), 'aste': ('ar',), 'ó': ('ar',), 'asteis': ('ar',), 'aron': ('ar',),
+    'í': ('er', 'ir'), 'iste': ('er', 'ir'), 'ió': ('er', 'ir'), 'isteis': ('er', 'ir'),
+    'ieron': ('er', 'ir'),
+    # Imperfect indicative
+    'aba': ('ar',), 'abas': ('ar',), 'ábamos': ('ar',), 'abais': ('ar',), 'aban': ('ar',),
+    'ía': ('er', 'ir'), 'ías': ('er', 'ir'), 'íamos': ('er', 'ir'), 'íais': ('er', 'ir'),
+    'ían': ('er', 'ir'),
+    # Imperfect subjunctive
+    'ara': ('ar',), 'aras': ('ar',), 'áramos': ('ar',), 'aran': ('ar',), 'ase': ('ar',),
+    'iera': ('er', 'ir'), 'ieras': ('er', 'ir'), 'iéramos': ('er', 'ir'), 'ieran': ('er', 'ir'),
+    'iese': ('er', 'ir'),
+    # Imperative, gerund, participle
+    'ad': ('ar',), 'ed': ('er',), 'id': ('ir',),
+    'ando': ('ar',), 'iendo': ('er', 'ir'), 'yendo': ('er', 'ir'),
+    'ado': ('ar',), 'ada': ('ar',), 'ados': ('ar',), 'adas': ('ar',),
+    'ido': ('er', 'ir'), 'ida': ('er', 'ir'), 'idos': ('er', 'ir'), 'idas': ('er', 'ir'),
+}
+# Present indicative and subjunctive endings: the slots where the verbs in
+# IRREGULAR_FORMS have their own forms
+PRESENT_ENDINGS = {'o', 'as', 'a', 'amos', 'áis', 'an', 'es', 'e', 'emos', 'éis', 'en', 'imos', 'ís'}
+# Longest first: "cantaba" is cantar before it is "cantabar"
+_ENDINGS_LONGEST_FIRST = sorted(VERB_ENDINGS.items(), key=lambda item: -len(item[0]))
+# Future and conditional endings are added to the whole infinitive
+INFINITIVE_ENDINGS = ('é', 'ás', 'á', 'emos', 'éis', 'án', 'ía', 'ías', 'íamos', 'íais', 'ían')
+
+# Spelling changes that keep the sound of the stem: (in the form, in the infinitive)
+STEM_SPELLINGS = (('qu', 'c'), ('gu', 'g'), ('c', 'z'), ('j', 'g'), ('zc', 'c'), ('y', 'i'))
+# Stem vowel changes of boot verbs: (in the form, in the infinitive)
+STEM_VOWELS = (('ie', 'e'), ('ue', 'o'), ('i', 'e'), ('u', 'o'))
+
+# Object pronouns attached to infinitives, gerunds and imperatives, longest first
+CLITICS = ('selas', 'selos', 'sela', 'selo', 'melas', 'melos', 'mela', 'melo', 'telas', 'telos',
+           'tela', 'telo', 'noslas', 'noslos', 'nosla', 'noslo', 'nos', 'los', 'las', 'les',
+           'me', 'te', 'se', 'lo', 'la', 'le', 'os')
+# One-syllable imperatives, which take pronouns without an accent (dime,
+# dame), and their verbs
+SHORT_IMPERATIVES = {'di': 'decir', 'da': 'dar', 'haz': 'hacer', 'pon': 'poner', 'sal': 'salir',
+                     'ten': 'tener', 'ven': 'venir', 've': 'ir', 'sé': 'ser', 'oye': 'oír'}
+# Imperatives that only take the reflexive pronoun: "vete", but "vela" is a candle
+REFLEXIVE_ONLY = {'ve': 'te'}
+
+ACCENTED = str.maketrans('áéíóú', 'aeiou')
+
+def strip_accents(word: str) -> str:
+    """Remove acute accents; ñ and ü are kept."""
+    return word.translate(ACCENTED)
+
+def fold(text: str) -> str:
+    """Lowercase without any diacritics, for accent-insensitive matching."""
+    decomposed = unicodedata.normalize('NFD', text.casefold())
+    return ''.join(c for c in decomposed if unicodedata.category(c) != 'Mn')
+
+def nominal_candidates(word: str) -> List[str]:
+    """Singular and masculine forms of a noun or adjective."""
+    singulars = [word]
+    if word.endswith('ces'):
+        singulars.append(word[:-3] + 'z')
+    if word.endswith('es') and len(word) > 4:
+        singulars.append(word[:-2])
+    if word.endswith('s') and len(word) > 2:
+        singulars.append(word[:-1])
+    candidates = []
+    for singular in singulars:
+        candidates.append(singular)
+        if singular.endswith('a') and len(singular) > 3:
+            candidates.append(singular[:-1] + 'o')
+    return candidates
+
+def _stem_variants(stem: str) -> Iterator[str]:
+    yield stem
+    for form, original in STEM_SPELLINGS:
+        if stem.endswith(form):
+            yield stem[:-len(form)] + original
+    for form, original in STEM_VOWELS:
+        position = stem.rfind(form)
+        if position >= 0:
+            yield stem[:position] + original + stem[position + len(form):]
+
+def fits_paradigm(infinitive: str, ending: str) -> bool:
+    """
+    Whether a regular `ending` can belong to `infinitive`. Not when the verb
+    is irregular in that slot: its listed forms with the ending replace the
+    regular one (salga, not sala; venga, not vena; pueda, not poda).
+    """
+    forms = IRREGULAR_FORMS.get(infinitive)
+    if forms is None or ending not in PRESENT_ENDINGS:
+        return True
+    return not any(form.endswith(ending) for form in forms.split())
+
+def verb_candidates(word: str) -> List[str]:
+    """Infinitives a conjugated form could belong to."""
+    candidates = list(IRREGULAR.get(word, ()))
+    if word.endswith(('ar', 'er', 'ir', 'ír')):
+        candidates.append(word)
+    for ending in INFINITIVE_ENDINGS:
+        if word.endswith(ending) and word[:-len(ending)].endswith(('ar', 'er', 'ir')):
+            candidates.append(word[:-len(ending)])
+    for ending, infinitives in _ENDINGS_LONGEST_FIRST:
+        stem = word[:-len(ending)]
+        if word.endswith(ending) and len(stem) >= 2:
+            for variant in _stem_variants(stem):
+                candidates.extend(variant + infinitive for infinitive in infinitives
+                                  if fits_paradigm(variant + infinitive, ending))
+    return candidates
+
+def _without_clitics(word: str) -> Iterator[str]:
+    # mírame -> mira, dímelo -> di, diciéndote -> diciendo, hacerlo -> hacer
+    for clitic in CLITICS:
+        if not word.endswith(clitic):
+            continue
+        rest = word[:-len(clitic)]
+        plain = strip_accents(rest)
+        if REFLEXIVE_ONLY.get(plain, clitic) != clitic:
+            continue
+        if plain.endswith(('ar', 'er', 'ir', 'ndo')) or plain in SHORT_IMPERATIVES or rest != plain:
+            yield plain
+            # A second pronoun: dímelo -> díme -> di
+            yield from _without_clitics(rest)
+
+def lemma_readings(word: str) -> Dict[str, Optional[str]]:
+    """
+    Dictionary forms `word` could come from, most likely first, each with
+    how it was reached: 'nominal' (a plural or feminine undone), 'verb' (a
+    conjugation or pronoun undone) or None (the word itself, or both).
+    `word` should be lowercase.
+    """
+    readings = {word: None}
+    for candidate in nominal_candidates(word):
+        readings.setdefault(candidate, 'nominal')
+    verbs = verb_candidates(word)
+    for bare in _without_clitics(word):
+        verbs += [SHORT_IMPERATIVES[bare]] if bare in SHORT_IMPERATIVES else verb_candidates(bare)
+    for candidate in verbs:
+        readings[candidate] = 'verb' if readings.get(candidate, 'verb') == 'verb' else None
+    return readings
+
+def candidate_lemmas(word: str) -> List[str]:
+    """
+    Dictionary forms `word` could come from, most likely first, without
+    duplicates. `word` should be lowercase.
+    """
+    return list(lemma_readings(word))
@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .lemmatizer import fold, lemma_readings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Offline index of Spanish words whose translation we already know.
+#
+# Built from the common words bundled with song-vocab, the vocabulary table
+# of the language portal's database and its seed files. Words found here are
+# added to a song's vocabulary without asking the model; the lemmatizer maps
+# conjugated and plural forms in the lyrics to the dictionary forms stored.
+
+PORTAL_DIRECTORY = Path(__file__).parent.parent.parent / 'lang-portal' / 'backend-flask'
+COMMON_WORDS_PATH = Path(__file__).parent.parent / 'data' / 'common_words.json'
+
+FIELDS = ('english', 'type', 'gender', 'conjugation_group', 'is_irregular')
+ARTICLE_GENDERS = {'el': 'masculine', 'los': 'masculine', 'la': 'feminine', 'las': 'feminine'}
+
+class Lexicon:
+    """Dictionary forms mapped to their entries, looked up by any inflected form."""
+
+    def __init__(self, entries: Iterable[dict] = ()):
+        self._exact: Dict[str, dict] = {}
+        self._folded: Dict[str, dict] = {}  # without accents, for "corazon" and song titles in caps
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def add(self, entry: dict):
+        """
+        Index `entry` ({"spanish": ..., "english": ..., ...}) under its headword.
+        An article is dropped from the headword ("el hotel" -> "hotel") and
+        gives the gender; phrases of several words are skipped. A headword
+        already known only gets the fields it was missing.
+        """
+        words = (entry.get('spanish') or '').casefold().strip(' .,;:!?¡¿"\'').split()
+        gender = None
+        if len(words) == 2 and words[0] in ARTICLE_GENDERS:
+            gender = ARTICLE_GENDERS[words[0]]
+            words = words[1:]
+        if len(words) != 1 or not entry.get('english'):
+            return
+        headword = words[0]
+
+        known = self._exact.setdefault(headword, {'spanish': headword})
+        for field in FIELDS:
+            if known.get(field) is None and entry.get(field) is not None:
+                known[field] = entry[field]
+        if known.get('gender') is None and gender:
+            known['gender'] = gender
+        self._folded.setdefault(fold(headword), known)
+
+    def lookup(self, word: str) -> Optional[dict]:
+        """
+        Entry for the dictionary form of `word`, or None.
+
+        Candidates from the lemmatizer are tried in order, first as spelled
+        (so "tú" is not "tu"), then without accents. A candidate only matches
+        an entry of its own kind: an undone plural is not a verb ("seres" is
+        not ser) and an undone conjugation is not a noun. Words with no match
+        are left to the model.
+        """
+        readings = lemma_readings(word.casefold())
+        for candidate, reading in readings.items():
+            entry = self._exact.get(candidate)
+            if entry is not None and _fits(reading, entry):
+                return entry
+        for candidate, reading in readings.items():
+            entry = self._folded.get(fold(candidate))
+            if entry is not None and _fits(reading, entry):
+                return entry
+        return None
+
+    @classmethod
+    def load(cls, common_words: Path = COMMON_WORDS_PATH,
+             seed_directory: Optional[Path] = PORTAL_DIRECTORY / 'seed',
+             database: Optional[Path] = PORTAL_DIRECTORY / 'database.db') -> 'Lexicon':
+        """
+        Build the lexicon from the bundled common words, the portal database
+        and the portal seed files, in that order of precedence. Sources that
+        are missing or unreadable are skipped.
+        """
+        lexicon = cls(load_json_words(common_words))
+        if database is not None:
+            for entry in load_database_words(database):
+                lexicon.add(entry)
+        if seed_directory is not None:
+            for path in sorted(Path(seed_directory).glob('*.json')):
+                for entry in load_json_words(path):
+                    lexicon.add(entry)
+        logger.info(f"Loaded lexicon of {len(lexicon)} words")
+        return lexicon
+
+def _fits(reading: Optional[str], entry: dict) -> bool:
+    # Entries without a type match any reading
+    kind = entry.get('type')
+    if reading is None or kind is None:
+        return True
+    return (kind == 'verb') == (reading == 'verb')
+
+def load_json_words(path: Path) -> List[dict]:
+    """Entries of a word list: a JSON list, or an object with a "words" list (portal seed files)."""
+    try:
+        data = json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        logger.warning(f"Skipping word list {path}: {e}")
+        return []
+    if isinstance(data, dict):
+        data = data.get('words', [])
+    if not isinstance(data, list):
+        return []
+    return [entry for entry in data if isinstance(entry, dict)]
+
+def load_database_words(path: Path) -> List[dict]:
+    """Rows of the portal's vocabulary table; the database is opened read-only."""
+    path = Path(path)
+    if not path.exists():
+        return []
+    try:
+        conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                'SELECT spanish, english, type, gender, conjugation_group, is_irregular FROM vocabulary'
+            ).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Skipping portal database {path}: {e}")
+        return []
+    entries = []
+    for row in rows:
+        entry = dict(row)
+        if entry['is_irregular'] is not None:
+            entry['is_irregular'] = bool(entry['is_irregular'])
+        entries.append(entry)
+    return entries
+
+def tokenize(text: str) -> List[str]:
+    """Unique lowercase words of `text`, in order of appearance."""
+    return list(dict.fromkeys(re.findall(r'[^\W\d_]+', text.casefold())))
+
+# Shared by every extraction in the process
+spanish_lexicon = Lexicon.load(
+    seed_directory=Path(os.getenv('LEXICON_SEED_DIR', PORTAL_DIRECTORY / 'seed')),
+    database=Path(os.getenv('LEXICON_DB', PORTAL_DIRECTORY / 'database.db')),
+)
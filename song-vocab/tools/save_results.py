@@ -3,6 +3,7 @@ import json
 import logging
 from pathlib import Path
 import re
+from .language_id import drop_english_lines
 
 logger = logging.getLogger('song_vocab')
 
@@ -75,22 +76,14 @@ def save_results(song_id: str, lyrics: Union[str, Dict[str, str]], vocabulary: L
             }
         ]
     
-    # If we have lyrics but no vocabulary, extract vocabulary from the lyrics
+    # If we have lyrics but no vocabulary, extract vocabulary from the lyrics.
+    # Chunks the agent already extracted come from the chunk cache, so this
+    # only calls the model for text it hasn't seen; on failure it falls back
+    # to the basic word list itself.
     if lyrics_text and lyrics_text != "No lyrics found for this song." and (not vocabulary or len(vocabulary) < 5 or vocabulary[0]["spanish"] == "No vocabulary found"):
-        try:
-            # Try to use the enhanced vocabulary extraction
-            from .extract_vocabulary import generate_enhanced_fallback_vocabulary
-            vocabulary = generate_enhanced_fallback_vocabulary(lyrics_text)
-            logger.info(f"Generated enhanced vocabulary from lyrics: {len(vocabulary)} items")
-        except Exception as e:
-            logger.error(f"Failed to generate enhanced vocabulary from lyrics: {e}")
-            try:
-                # Fall back to basic extraction
-                from .extract_vocabulary import generate_fallback_vocabulary
-                vocabulary = generate_fallback_vocabulary(lyrics_text)
-                logger.info(f"Generated basic vocabulary from lyrics: {len(vocabulary)} items")
-            except Exception as e2:
-                logger.error(f"Failed to generate basic vocabulary from lyrics: {e2}")
+        from .extract_vocabulary import extract_vocabulary
+        vocabulary = extract_vocabulary(lyrics_text) or vocabulary
+        logger.info(f"Extracted vocabulary from lyrics: {len(vocabulary)} items")
     
     # Ensure all vocabulary items have the required fields
     for item in vocabulary:
@@ -128,4 +121,7 @@ def clean_lyrics(lyrics: str) -> str:
     for pattern in patterns_to_remove:
         lyrics = re.sub(pattern, '', lyrics, flags=re.DOTALL)
     
+    # Drop translation lines interleaved with the Spanish ones
+    lyrics = drop_english_lines(lyrics)
+    
     return lyrics.strip()
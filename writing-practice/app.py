@@ -12,6 +12,11 @@ from dotenv import load_dotenv
 from datetime import datetime
 import streamlit as st
 
+from shared.llm_cache import cached_client
+
+# Lifetime of cached grades, in seconds
+GRADE_CACHE_TTL = 30 * 24 * 3600
+
 # Load environment variables before anything else
 load_dotenv()
 
@@ -195,6 +200,10 @@ class SpanishTranslationApp:
         if OPENAI_API_KEY == 'not-configured':
             raise ValueError("OpenAI API key not found in root .env file")
         self.client = OpenAI(api_key=OPENAI_API_KEY)
+        # Grading (temperature 0) is cached, so resubmitting the same photo of
+        # the same sentence doesn't pay for a second vision call; sentences
+        # are sampled and always come from the model
+        self.client = cached_client(self.client, "writing-practice", ttl=GRADE_CACHE_TTL)
         self.vocabulary = None
         self.current_word = None
         self.current_sentence = None
@@ -271,7 +280,8 @@ class SpanishTranslationApp:
                             }
                         ]
                     }
-                ]
+                ],
+                temperature=0
             )
             
             feedback = completion.choices[0].message.content